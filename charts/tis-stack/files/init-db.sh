@@ -18,6 +18,7 @@ EOSQL
     echo "   -> ⚡ Activating Citus extension in: $db"
     psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$db" <<-EOSQL
         CREATE EXTENSION IF NOT EXISTS citus;
+        CREATE EXTENSION IF NOT EXISTS pg_stat_statements;
 EOSQL
 done
 
@@ -14,27 +14,107 @@ JSON_PAYLOAD='{"input_value": "benchmark_test", "input_type": "chat", "output_ty
 
 REPLICA_STEPS="1 2 4 8 16"
 
+# Each run writes to its own directory on the results volume; results_store.py keeps the history.
+RESULTS_ROOT="${RESULTS_ROOT:-/app/results}"
+export RESULTS_DIR="$RESULTS_ROOT/runs/$(date -u +%Y%m%dT%H%M%SZ)"
+mkdir -p "$RESULTS_DIR"
+
+# SEED_SCALE > 0 bulk-loads a synthetic tenant first, so every mode runs against realistic table sizes (see seed_data.py)
+if [ -n "$SEED_SCALE" ] && [ "$SEED_SCALE" != "0" ]; then
+  python3 /app/seed_data.py --scale "$SEED_SCALE" --results-dir "$RESULTS_DIR"
+fi
+
+MODE="${BENCHMARK_MODE:-steps}"
+# STREAM=true calls the run endpoint with stream=true and reports TTFB / TTFT / chunk gaps
+STREAM="${STREAM:-false}"
+STREAM_FLAG=""
+if [ "$STREAM" = "true" ]; then STREAM_FLAG="--stream"; fi
+
+# Store the run in $RESULTS_ROOT/benchmarks.sqlite and compare it with the previous run of the same mode.
+record_run() {
+  echo ""
+  echo "--- Recording run in $RESULTS_ROOT/benchmarks.sqlite (commit ${GIT_COMMIT:-unknown}) ---"
+  if python3 /app/results_store.py record --input "$1" --mode "$MODE"; then
+    python3 /app/results_store.py compare --output "$RESULTS_DIR/compare.json" || true
+  else
+    echo "⚠️  WARNING: could not record results, see $RESULTS_DIR"
+  fi
+}
+
+# Runs a mode script, records what it measured (the windows it appended to loadgen.jsonl, or $RECORD_INPUT)
+# even when it failed part way, and exits with the script's status.
+run_mode() {
+  MODE_STATUS=0
+  "$@" || MODE_STATUS=$?
+  record_run "${RECORD_INPUT:-$RESULTS_DIR/loadgen.jsonl}"
+  exit $MODE_STATUS
+}
+
+# cache_ab = same load with LANGFLOW_CACHE_TYPE memory vs redis, sampling Redis INFO + Postgres (see cache_ab.py)
+if [ "$MODE" = "cache_ab" ]; then
+  run_mode python3 /app/cache_ab.py --url "$LANGFLOW_URL" --flow-id "$FLOW_ID" --api-key "$API_KEY" --payload "$JSON_PAYLOAD" \
+    --concurrency "${USERS_PER_REPLICA:-50}" $STREAM_FLAG
+fi
+
+# citus_ab = local vs Citus-distributed hot tables on the same dataset, per-query timings (see citus_ab.py)
+if [ "$MODE" = "citus_ab" ]; then
+  run_mode python3 /app/citus_ab.py --url "$LANGFLOW_URL" --flow-id "$FLOW_ID" --api-key "$API_KEY" --payload "$JSON_PAYLOAD" \
+    $STREAM_FLAG
+fi
+
+# mix = several flows at once from a weighted traffic profile, per-flow latency and errors (see traffic_mix.py)
+if [ "$MODE" = "mix" ]; then
+  RECORD_INPUT="$RESULTS_DIR/mix.json" run_mode env FLOW_ID="$FLOW_ID" python3 /app/traffic_mix.py --url "$LANGFLOW_URL" \
+    --api-key "$API_KEY" --profile "${TRAFFIC_PROFILE:-/app/profiles/mixed.json}" --output "$RESULTS_DIR/mix.json" $STREAM_FLAG
+fi
+
+# pool_tune = pool_mode x default_pool_size probes per replica count, reading SHOW POOLS (see pool_tuner.py)
+if [ "$MODE" = "pool_tune" ]; then
+  run_mode python3 /app/pool_tuner.py --url "$LANGFLOW_URL" --flow-id "$FLOW_ID" --api-key "$API_KEY" --payload "$JSON_PAYLOAD" \
+    $STREAM_FLAG
+fi
+
+# cold_start = per-pod startup phases (schedule, container, gunicorn, /health, first run) over a scale-out (see cold_start.py).
+# It measures startup, not load, so it is not recorded in the results store; see cold-start.json in the run directory.
+if [ "$MODE" = "cold_start" ]; then
+  exec python3 /app/cold_start.py --flow-id "$FLOW_ID" --api-key "$API_KEY" --payload "$JSON_PAYLOAD"
+fi
+
+# sweep = replicas x concurrency x PgBouncer pool size with knee detection (see sweep.py)
+if [ "$MODE" = "sweep" ]; then
+  run_mode python3 /app/sweep.py --url "$LANGFLOW_URL" --flow-id "$FLOW_ID" --api-key "$API_KEY" --payload "$JSON_PAYLOAD" \
+    $STREAM_FLAG
+fi
+
+# closed = fixed users per replica, open = fixed arrival rate per replica (see loadgen.py)
+LOAD_MODE="${LOAD_MODE:-closed}"
+USERS_PER_REPLICA="${USERS_PER_REPLICA:-50}"
+RATE_PER_REPLICA="${RATE_PER_REPLICA:-20}"
+LOAD_DURATION="${LOAD_DURATION:-30}"
+
 start_monitoring() {
+  # One persistent Postgres + PgBouncer connection for the whole step (see db_sampler.py).
   echo "   [MONITOR] Starting DB metrics collection..."
-  while true; do
-    PG_POD=$(kubectl get pod -l app=postgres -o jsonpath='{.items[0].metadata.name}' 2>/dev/null)
-    if [ -n "$PG_POD" ]; then
-        STATS=$(kubectl exec "$PG_POD" -- sh -c "psql -U postgres_user -d langflow_db -tA -c \"SELECT count(*) FROM pg_stat_activity WHERE state='active';\"" 2>/dev/null)
-        WAITING=$(kubectl exec "$PG_POD" -- sh -c "psql -U postgres_user -d langflow_db -tA -c \"SELECT count(*) FROM pg_stat_activity WHERE wait_event_type IS NOT NULL;\"" 2>/dev/null)
-
-        PGB_MSG=""
-        PGB_POD=$(kubectl get pod -l app=pgbouncer -o jsonpath='{.items[0].metadata.name}' 2>/dev/null)
-        if [ -n "$PGB_POD" ]; then
-             PGB_WAIT=$(kubectl exec "$PGB_POD" -- sh -c "export PGPASSWORD='password'; psql -U postgres_user -d pgbouncer -p 6432 -tA -c 'SHOW POOLS;' | grep langflow_db | awk -F'|' '{print \$4}'" 2>/dev/null)
-             PGB_MSG="| PGB-Wait: ${PGB_WAIT:-0}"
-        fi
-
-        echo "   [DB-STAT] Active: $STATS | Waiting: $WAITING $PGB_MSG"
-    fi
-    sleep 5
-  done
+  exec python3 /app/db_sampler.py \
+    --interval "${SAMPLE_INTERVAL:-0.5}" \
+    --label "replicas-$1" \
+    --output "$RESULTS_DIR/db-replicas-$1.jsonl"
 }
 
+stop_monitoring() {
+  if [ -n "$MONITOR_PID" ]; then
+    kill $MONITOR_PID 2>/dev/null || true
+    wait $MONITOR_PID 2>/dev/null || true
+    MONITOR_PID=""
+    echo "   [MONITOR] Stopped."
+  fi
+}
+
+# set -e would otherwise leave the sampler running when anything below fails.
+MONITOR_PID=""
+trap stop_monitoring EXIT
+LOADGEN_FAILED=""
+
 echo "========================================================================"
 echo "🚀 STARTING CITUS STRESS TEST (Pod Scaling Mode)"
 echo "   Target: $LANGFLOW_URL"
@@ -57,41 +137,73 @@ for replicas in $REPLICA_STEPS; do
   sleep 15
 
   # --- MONITORING ---
-    start_monitoring &
+    start_monitoring "$replicas" &
     MONITOR_PID=$!
   # ------------------
 
-  CONCURRENCY=$((replicas * 50))
+  CONCURRENCY=$((replicas * USERS_PER_REPLICA))
+  RATE=$((replicas * RATE_PER_REPLICA))
 
-  echo "🔥 Firing load: $CONCURRENCY concurrent users for 30 seconds..."
+  if [ "$LOAD_MODE" = "open" ]; then
+    echo "🔥 Firing load: $RATE requests/sec (open loop) for ${LOAD_DURATION} seconds..."
+  else
+    echo "🔥 Firing load: $CONCURRENCY concurrent users for ${LOAD_DURATION} seconds..."
+  fi
 
-  RESULT=$(hey -z 30s -c $CONCURRENCY -t 60 \
-    -H "x-api-key: $API_KEY" \
-    -H "Content-Type: application/json" \
-    -m POST -d "$JSON_PAYLOAD" \
-    "$LANGFLOW_URL/api/v1/run/$FLOW_ID?stream=false")
+  LOADGEN_STATUS=0
+  RESULT=$(python3 /app/loadgen.py \
+    --url "$LANGFLOW_URL" \
+    --flow-id "$FLOW_ID" \
+    --api-key "$API_KEY" \
+    --mode "$LOAD_MODE" \
+    --concurrency "$CONCURRENCY" \
+    --rate "$RATE" \
+    --duration "$LOAD_DURATION" \
+    --timeout 60 \
+    --payload "$JSON_PAYLOAD" \
+    $STREAM_FLAG \
+    --label "replicas-$replicas" \
+    --replicas "$replicas" \
+    --output "$RESULTS_DIR/loadgen.jsonl" \
+    --hgrm "$RESULTS_DIR/latency-replicas-$replicas.hgrm") || LOADGEN_STATUS=$?
 
   # --- MONITORING STOP ---
-  kill $MONITOR_PID 2>/dev/null || true
-  wait $MONITOR_PID 2>/dev/null || true
-  echo "   [MONITOR] Stopped."
+  stop_monitoring
   # -----------------------
 
+  # Keep the steps that did complete: stop here and still record them below.
+  if [ "$LOADGEN_STATUS" -ne 0 ]; then
+    echo "❌ ERROR: load generator exited with status $LOADGEN_STATUS at $replicas replica(s), stopping the run."
+    LOADGEN_FAILED=1
+    break
+  fi
+
   echo ""
-  echo "--- Full 'hey' command output: ---"
-  echo "$RESULT"
+  echo "--- Load generator report: ---"
+  echo "$RESULT" | jq .
   echo "------------------------------------"
 
-  RPS=$(echo "$RESULT" | grep "Requests/sec" | awk '{print $2}')
-  ERRORS=$(echo "$RESULT" | grep "Status code distribution" -A 10 | grep "\[5" | awk '{sum+=$2} END {print sum+0}')
+  RPS=$(echo "$RESULT" | jq -r '.throughput_rps')
+  ERRORS=$(echo "$RESULT" | jq -r '.error_count')
+  echo "   RPS: $RPS | Errors: $ERRORS | p99: $(echo "$RESULT" | jq -r '.latency_ms.p99')ms"
+  if [ "$STREAM" = "true" ]; then
+    echo "   TTFB p50/p99: $(echo "$RESULT" | jq -r '"\(.stream.ttfb_ms.p50)/\(.stream.ttfb_ms.p99)"')ms | TTFT p50/p99: $(echo "$RESULT" | jq -r 'if .stream.ttft_ms then "\(.stream.ttft_ms.p50)/\(.stream.ttft_ms.p99)" else "-" end')ms"
+  fi
 
   if [ "$ERRORS" -gt 0 ]; then
       echo "⚠️  WARNING: High error rate detected! System might be overloaded."
   fi
 done
 
+record_run "$RESULTS_DIR/loadgen.jsonl"
+
+kubectl scale deployment langflow --replicas=1
+if [ -n "$LOADGEN_FAILED" ]; then
+  echo "❌ BENCHMARK INCOMPLETE, see the error above."
+  exit 1
+fi
+
 echo ""
 echo "========================================================================"
 echo "✅ BENCHMARK COMPLETED."
 echo "========================================================================"
-kubectl scale deployment langflow --replicas=1
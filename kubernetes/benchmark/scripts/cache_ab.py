@@ -0,0 +1,237 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import statistics
+
+import redis
+
+import db_sampler
+from sweep import LANGFLOW_DEPLOYMENT, NAMESPACE, WINDOWS_FILE, load_kube_config, restart, run_window
+
+# Cache A/B: the same closed-loop load against Langflow with LANGFLOW_CACHE_TYPE switched between
+# variants (default: in-process "memory" vs "redis"). While each variant is measured, Redis INFO is
+# sampled over one persistent connection next to the usual Postgres / PgBouncer sampler, and the report
+# sets the latency change against the change in Postgres activity and statement rate.
+
+REDIS_HOST = os.getenv("REDIS_HOST", "redis")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
+LANGFLOW_CONFIGMAP = os.getenv("LANGFLOW_CONFIGMAP", "langflow-config")
+
+# Cumulative INFO counters reported as per-tick deltas; the rest are gauges.
+REDIS_COUNTERS = ("keyspace_hits", "keyspace_misses", "evicted_keys", "expired_keys", "total_commands_processed")
+REDIS_GAUGES = ("used_memory", "instantaneous_ops_per_sec", "connected_clients")
+
+
+def log(msg):
+    print(msg, file=sys.stderr, flush=True)
+
+
+class RedisSampler:
+    def __init__(self, host=REDIS_HOST, port=REDIS_PORT, password=REDIS_PASSWORD):
+        self.client = redis.Redis(host=host, port=port, password=password, socket_timeout=5,
+                                  single_connection_client=True)
+        self.prev = None
+
+    def sample(self):
+        info = self.client.info()
+        row = {f"redis_{k}": info.get(k, 0) for k in REDIS_GAUGES}
+        row.update({f"redis_{k}_delta": None for k in REDIS_COUNTERS})
+        if self.prev is not None:
+            for k in REDIS_COUNTERS:
+                row[f"redis_{k}_delta"] = info.get(k, 0) - self.prev.get(k, 0)
+        self.prev = {k: info.get(k, 0) for k in REDIS_COUNTERS}
+        return row
+
+    def close(self):
+        self.client.close()
+
+
+class Monitor:
+    # Samples Redis and Postgres/PgBouncer on a fixed-rate schedule in a background thread.
+    def __init__(self, args, label):
+        self.args = args
+        self.redis = RedisSampler(args.redis_host, args.redis_port, args.redis_password)
+        self.db = db_sampler.Sampler(db_sampler.parse_args(["--label", label, "--top-every", "0"]))
+        self.rows = []
+        self.errors = 0
+        self.last_error = None
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.loop, daemon=True)
+        self.output = open(os.path.join(args.results_dir, f"cache-ab-{label}.jsonl"), "a")
+
+    def loop(self):
+        started = time.perf_counter()
+        n = 0
+        while not self.stop_event.is_set():
+            # A failed tick is counted and skipped; an exception escaping here would end sampling silently.
+            try:
+                row = self.db.sample()
+                row.update(self.redis.sample())
+            except Exception as e:
+                self.errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                log(f"[CACHE-AB] Sample failed ({self.errors} so far): {self.last_error}")
+            else:
+                self.rows.append(row)
+                self.output.write(json.dumps(row, default=str) + "\n")
+            n += 1
+            self.stop_event.wait(max(0.0, started + n * self.args.interval - time.perf_counter()))
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop_event.set()
+        self.thread.join()
+        self.output.close()
+        self.db.close()
+        self.redis.close()
+
+
+def set_cache_type(apps, core, cache_type, timeout):
+    log(f"[CACHE-AB] Switching LANGFLOW_CACHE_TYPE={cache_type} and restarting Langflow...")
+    core.patch_namespaced_config_map(LANGFLOW_CONFIGMAP, NAMESPACE, {"data": {"LANGFLOW_CACHE_TYPE": cache_type}})
+    restart(apps, LANGFLOW_DEPLOYMENT, timeout)
+
+
+def current_cache_type(core):
+    return core.read_namespaced_config_map(LANGFLOW_CONFIGMAP, NAMESPACE).data.get("LANGFLOW_CACHE_TYPE", "memory")
+
+
+def mean_of(rows, key):
+    values = [r[key] for r in rows if r.get(key) is not None]
+    return round(statistics.fmean(values), 3) if values else None
+
+
+def sum_of(rows, key):
+    return sum(r[key] for r in rows if r.get(key) is not None)
+
+
+def summarize(cache_type, report, monitor, seconds):
+    rows = monitor.rows
+    hits, misses = sum_of(rows, "redis_keyspace_hits_delta"), sum_of(rows, "redis_keyspace_misses_delta")
+    lat = report["latency_ms"]
+    return {
+        "cache_type": cache_type,
+        "throughput_rps": report["throughput_rps"],
+        "error_count": report["error_count"],
+        "latency_ms": {k: lat[k] for k in ("p50", "p90", "p99", "mean")},
+        "postgres": {
+            "active_mean": mean_of(rows, "pg_active"),
+            "active_max": max((r["pg_active"] for r in rows), default=None),
+            "connections_mean": mean_of(rows, "pg_total"),
+            "statements_per_s": round(sum_of(rows, "pg_calls") / seconds, 2) if seconds else None,
+            "pgb_cl_waiting_mean": mean_of(rows, "pgb_cl_waiting"),
+        },
+        "redis": {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+            "evictions": sum_of(rows, "redis_evicted_keys_delta"),
+            "ops_per_s_mean": mean_of(rows, "redis_instantaneous_ops_per_sec"),
+            "used_memory_max": max((r["redis_used_memory"] for r in rows), default=None),
+        },
+        "samples": len(rows),
+        "sample_errors": monitor.errors,
+        "last_sample_error": monitor.last_error,
+    }
+
+
+def pct_change(base, other):
+    if base in (None, 0) or other is None:
+        return None
+    return round((other - base) / base * 100.0, 2)
+
+
+def compare(baseline, variant):
+    return {
+        "baseline": baseline["cache_type"],
+        "variant": variant["cache_type"],
+        "throughput_pct": pct_change(baseline["throughput_rps"], variant["throughput_rps"]),
+        "p50_pct": pct_change(baseline["latency_ms"]["p50"], variant["latency_ms"]["p50"]),
+        "p99_pct": pct_change(baseline["latency_ms"]["p99"], variant["latency_ms"]["p99"]),
+        "pg_active_pct": pct_change(baseline["postgres"]["active_mean"], variant["postgres"]["active_mean"]),
+        "pg_statements_per_s_pct": pct_change(baseline["postgres"]["statements_per_s"],
+                                              variant["postgres"]["statements_per_s"]),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Langflow cache on/off A/B with Redis and Postgres sampling.")
+    parser.add_argument("--url", default=os.getenv("LANGFLOW_URL", "http://langflow:7860"))
+    parser.add_argument("--flow-id", required=True)
+    parser.add_argument("--api-key", required=True)
+    parser.add_argument("--payload", default=None)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--variants", default=os.getenv("CACHE_AB_VARIANTS") or "memory,redis",
+                        help="LANGFLOW_CACHE_TYPE values, the first one is the baseline")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("CACHE_AB_CONCURRENCY", "50")))
+    parser.add_argument("--warmup", type=float, default=15.0, help="seconds of unmeasured load per variant")
+    parser.add_argument("--measure", type=float, default=float(os.getenv("LOAD_DURATION", "60")))
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between Redis/DB samples")
+    parser.add_argument("--redis-host", default=REDIS_HOST)
+    parser.add_argument("--redis-port", type=int, default=REDIS_PORT)
+    parser.add_argument("--redis-password", default=REDIS_PASSWORD)
+    parser.add_argument("--rollout-timeout", type=float, default=300.0)
+    parser.add_argument("--results-dir", default=os.getenv("RESULTS_DIR", "/app/results"))
+    args = parser.parse_args(argv)
+    args.variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.results_dir, exist_ok=True)
+    apps, core = load_kube_config()
+    original = current_cache_type(core)
+    log(f"[CACHE-AB] Variants {args.variants} at concurrency {args.concurrency}, {args.measure:.0f}s each")
+
+    results = []
+    try:
+        for cache_type in args.variants:
+            if cache_type != current_cache_type(core):
+                set_cache_type(apps, core, cache_type, args.rollout_timeout)
+            # Warm-up fills the cache (and Langflow's own graph cache) so the measured window is steady.
+            run_window(args, args.concurrency, args.warmup, f"cache-{cache_type}-warmup")
+            with Monitor(args, f"cache-{cache_type}") as monitor:
+                started = time.perf_counter()
+                report = run_window(args, args.concurrency, args.measure, f"cache-{cache_type}",
+                                    output=os.path.join(args.results_dir, WINDOWS_FILE))
+                seconds = time.perf_counter() - started
+            summary = summarize(cache_type, report, monitor, seconds)
+            results.append(summary)
+            if monitor.errors:
+                log(f"[CACHE-AB] WARNING: {monitor.errors} of {monitor.errors + len(monitor.rows)} samples failed for "
+                    f"{cache_type}, its Redis / Postgres figures cover the remaining samples only")
+            log(f"[CACHE-AB] {cache_type}: {summary['throughput_rps']} ok/s, p50 {summary['latency_ms']['p50']}ms "
+                f"p99 {summary['latency_ms']['p99']}ms | pg active {summary['postgres']['active_mean']} "
+                f"stmts/s {summary['postgres']['statements_per_s']} | redis hit ratio {summary['redis']['hit_ratio']}")
+    finally:
+        if current_cache_type(core) != original:
+            set_cache_type(apps, core, original, args.rollout_timeout)
+
+    report = {
+        "timestamp": time.time(),
+        "flow_id": args.flow_id,
+        "concurrency": args.concurrency,
+        "measure_s": args.measure,
+        "variants": results,
+        "comparisons": [compare(results[0], r) for r in results[1:]],
+    }
+    with open(os.path.join(args.results_dir, "cache-ab.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    for c in report["comparisons"]:
+        log(f"[CACHE-AB] {c['variant']} vs {c['baseline']}: throughput {c['throughput_pct']}%, "
+            f"p50 {c['p50_pct']}%, p99 {c['p99_pct']}%, pg active {c['pg_active_pct']}%, "
+            f"pg statements/s {c['pg_statements_per_s_pct']}%")
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+import psycopg2
+import psycopg2.extras
+
+import db_sampler
+from sweep import WINDOWS_FILE, run_window
+
+# Citus layout A/B: Langflow's hot tables as plain local tables vs Citus-distributed tables.
+# The hot tables have foreign keys to flow (and flow to user / folder), so in the distributed layout
+# those become reference tables first, then the hot tables are distributed (create_reference_table /
+# create_distributed_table; undistribute_table goes back). An arm whose hot tables did not end up in
+# the requested layout is marked invalid and not measured or compared. With --restore-snapshot both
+# layouts start from the same dataset: the hot tables are snapshotted once, and before each layout
+# they are truncated and refilled from the snapshot. That TRUNCATE hits the live tables, so it is off
+# unless asked for; without it two layouts are only run with --allow-unrestored, and their comparisons
+# are then marked invalid (later layouts see the rows written by earlier ones). pg_stat_statements is reset, the run workload is replayed, and per-query timings
+# are collected. Queries are matched across layouts by normalised text, since queryids change when
+# Citus rewrites the tables.
+
+HOT_TABLES = os.getenv("CITUS_AB_TABLES", "message:id,transaction:id,vertex_build:build_id")
+# Referenced by the hot tables, in foreign key order (a reference table may only point at other reference tables).
+REFERENCE_TABLES = os.getenv("CITUS_AB_REFERENCE_TABLES", "user,folder,flow")
+RESTORE_SNAPSHOT = os.getenv("CITUS_AB_RESTORE", "false") == "true"
+ALLOW_UNRESTORED = os.getenv("CITUS_AB_ALLOW_UNRESTORED", "false") == "true"
+SNAPSHOT_PREFIX = "bench_snapshot_"
+
+STATEMENTS_SQL = """
+    SELECT query, calls, total_exec_time AS total_ms, mean_exec_time AS mean_ms, stddev_exec_time AS stddev_ms,
+           rows, shared_blks_hit, shared_blks_read
+    FROM pg_stat_statements s JOIN pg_database d ON d.oid = s.dbid
+    WHERE d.datname = current_database() AND query NOT ILIKE '%%pg_stat_statements%%'
+    ORDER BY total_exec_time DESC
+    LIMIT %s
+"""
+
+
+def log(msg):
+    print(msg, file=sys.stderr, flush=True)
+
+
+def parse_tables(value):
+    tables = []
+    for item in filter(None, (v.strip() for v in value.split(","))):
+        name, _, column = item.partition(":")
+        tables.append((name, column or "id"))
+    return tables
+
+
+def query_all(conn, sql, params=None):
+    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        cur.execute(sql, params)
+        return [dict(r) for r in cur.fetchall()] if cur.description else []
+
+
+def parse_names(value):
+    return [(name, None) for name in filter(None, (v.strip() for v in value.split(",")))]
+
+
+def citus_type(conn, table):
+    # "distributed", "reference" or None for a plain local table.
+    rows = query_all(conn, "SELECT citus_table_type FROM citus_tables WHERE table_name = %s::regclass",
+                     (f'"{table}"',))
+    return rows[0]["citus_table_type"] if rows else None
+
+
+def existing_tables(conn, tables):
+    names = {r["table_name"] for r in query_all(
+        conn, "SELECT table_name FROM information_schema.tables WHERE table_schema = 'public'")}
+    missing = [t for t, _ in tables if t not in names]
+    if missing:
+        log(f"[CITUS-AB] Skipping tables that do not exist in this Langflow version: {', '.join(missing)}")
+    return [(t, c) for t, c in tables if t in names]
+
+
+def snapshot(conn, tables, refresh):
+    for table, _ in tables:
+        snap = f"{SNAPSHOT_PREFIX}{table}"
+        exists = query_all(conn, "SELECT to_regclass(%s) AS r", (snap,))[0]["r"]
+        if exists and not refresh:
+            continue
+        with conn.cursor() as cur:
+            cur.execute(f'DROP TABLE IF EXISTS "{snap}"')
+            cur.execute(f'CREATE TABLE "{snap}" AS SELECT * FROM "{table}"')
+        log(f"[CITUS-AB] Snapshot {table} -> {snap}")
+
+
+def restore(conn, tables):
+    # Same rows for every layout; the snapshot is a plain local table either way.
+    counts = {}
+    with conn.cursor() as cur:
+        for table, _ in tables:
+            cur.execute(f'TRUNCATE "{table}"')
+            cur.execute(f'INSERT INTO "{table}" SELECT * FROM "{SNAPSHOT_PREFIX}{table}"')
+            counts[table] = cur.rowcount
+    return counts
+
+
+def set_table_type(conn, table, column, target, shard_count):
+    # target: "distributed" (on column), "reference" or None (local). Returns the type it ended up with.
+    current = citus_type(conn, table)
+    if current == target:
+        return current
+    try:
+        with conn.cursor() as cur:
+            if current is not None:
+                cur.execute("SELECT undistribute_table(%s, cascade_via_foreign_keys => true)", (f'"{table}"',))
+            if target == "reference":
+                cur.execute("SELECT create_reference_table(%s)", (f'"{table}"',))
+            elif target == "distributed":
+                if shard_count:
+                    cur.execute("SET citus.shard_count = %s", (shard_count,))
+                cur.execute("SELECT create_distributed_table(%s, %s)", (f'"{table}"', column))
+    except psycopg2.Error as e:
+        log(f"[CITUS-AB] {table}: could not switch to {target or 'local'}: {(e.pgerror or str(e)).strip()}")
+    return citus_type(conn, table)
+
+
+def apply_layout(conn, tables, reference_tables, layout, shard_count):
+    # Reference tables before the hot tables that point at them, and the other way round going back.
+    if layout == "distributed":
+        steps = [(t, c, "reference") for t, c in reference_tables] + [(t, c, "distributed") for t, c in tables]
+    else:
+        steps = [(t, c, None) for t, c in tables] + [(t, c, None) for t, c in reversed(reference_tables)]
+    applied = {}
+    for table, column, target in steps:
+        applied[table] = set_table_type(conn, table, column, target, shard_count) or "local"
+    return applied
+
+
+def layout_problem(applied, tables, layout):
+    # Why this arm does not measure the layout it is named after, or None.
+    wanted = "distributed" if layout == "distributed" else "local"
+    hot = {t: applied.get(t) for t, _ in tables}
+    if layout == "distributed" and "distributed" not in hot.values():
+        return "no hot table could be distributed"
+    if layout == "local" and any(v != "local" for v in hot.values()):
+        return "hot tables still distributed: " + ", ".join(t for t, v in hot.items() if v != "local")
+    off = [t for t, v in hot.items() if v != wanted]
+    if off:
+        log(f"[CITUS-AB] {layout}: measuring with {', '.join(off)} left as they were")
+    return None
+
+
+def statements(conn, top_n):
+    rows = query_all(conn, STATEMENTS_SQL, (top_n,))
+    return [{k: (round(float(v), 3) if isinstance(v, float) or k.endswith("_ms") else v) for k, v in r.items()}
+            for r in rows]
+
+
+def compare_statements(baseline, variant):
+    base = {s["query"]: s for s in baseline}
+    out = []
+    for s in variant:
+        b = base.get(s["query"])
+        if b is None or not b["mean_ms"]:
+            continue
+        out.append({
+            "query": s["query"][:200],
+            "baseline_mean_ms": b["mean_ms"],
+            "variant_mean_ms": s["mean_ms"],
+            "mean_pct": round((s["mean_ms"] - b["mean_ms"]) / b["mean_ms"] * 100.0, 2),
+            "baseline_calls": b["calls"],
+            "variant_calls": s["calls"],
+        })
+    return sorted(out, key=lambda r: -abs(r["mean_pct"]))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Citus distributed vs local tables A/B on the run workload.")
+    parser.add_argument("--url", default=os.getenv("LANGFLOW_URL", "http://langflow:7860"))
+    parser.add_argument("--flow-id", required=True)
+    parser.add_argument("--api-key", required=True)
+    parser.add_argument("--payload", default=None)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--tables", type=parse_tables, default=HOT_TABLES, help="table:distribution_column,...")
+    parser.add_argument("--reference-tables", type=parse_names, default=REFERENCE_TABLES,
+                        help="tables the hot tables reference, made reference tables in the distributed layout")
+    parser.add_argument("--layouts", default="local,distributed", help="order to measure in; the first is the baseline")
+    parser.add_argument("--shard-count", type=int, default=0, help="citus.shard_count for new distributions (0 = default)")
+    parser.add_argument("--restore-snapshot", action="store_true", default=RESTORE_SNAPSHOT,
+                        help="TRUNCATE the live hot tables and refill them from a snapshot before each layout")
+    parser.add_argument("--allow-unrestored", action="store_true", default=ALLOW_UNRESTORED,
+                        help="compare layouts without --restore-snapshot; the comparisons are marked invalid")
+    parser.add_argument("--refresh-snapshot", action="store_true", help="re-snapshot the current table contents")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("USERS_PER_REPLICA", "50")))
+    parser.add_argument("--warmup", type=float, default=10.0)
+    parser.add_argument("--measure", type=float, default=float(os.getenv("LOAD_DURATION", "60")))
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--top-n", type=int, default=25)
+    parser.add_argument("--results-dir", default=os.getenv("RESULTS_DIR", "/app/results"))
+    args = parser.parse_args(argv)
+    args.layouts = [v.strip() for v in args.layouts.split(",") if v.strip()]
+    if any(layout not in ("local", "distributed") for layout in args.layouts):
+        parser.error("--layouts takes local and/or distributed")
+    if len(args.layouts) > 1 and not (args.restore_snapshot or args.allow_unrestored):
+        parser.error("comparing layouts needs --restore-snapshot (CITUS_AB_RESTORE=true) so both run on the same "
+                     "dataset; pass --allow-unrestored (CITUS_AB_ALLOW_UNRESTORED=true) to run them anyway")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.results_dir, exist_ok=True)
+    conn, has_statements = db_sampler.connect_postgres(db_sampler.parse_args([]))
+    if not has_statements:
+        sys.exit("pg_stat_statements is required (shared_preload_libraries, see postgresql.conf.template)")
+
+    tables = existing_tables(conn, args.tables)
+    reference_tables = existing_tables(conn, args.reference_tables)
+    original = {t: citus_type(conn, t) for t, _ in reference_tables + tables}
+    if args.restore_snapshot:
+        snapshot(conn, tables, args.refresh_snapshot)
+    else:
+        log("[CITUS-AB] Without --restore-snapshot (CITUS_AB_RESTORE=true) each layout runs on the live tables as "
+            "they are, so later layouts see the rows written by earlier ones; comparisons are marked invalid")
+    log(f"[CITUS-AB] Layouts {args.layouts} on {', '.join(t for t, _ in tables)} at concurrency {args.concurrency}")
+
+    results = []
+    try:
+        for layout in args.layouts:
+            rows = restore(conn, tables) if args.restore_snapshot else None
+            applied = apply_layout(conn, tables, reference_tables, layout, args.shard_count)
+            problem = layout_problem(applied, tables, layout)
+            if problem:
+                log(f"[CITUS-AB] {layout}: arm invalid, not measured: {problem}")
+                results.append({"layout": layout, "valid": False, "invalid_reason": problem, "tables": applied,
+                                "rows": rows})
+                continue
+            with conn.cursor() as cur:
+                cur.execute("ANALYZE")
+            run_window(args, args.concurrency, args.warmup, f"citus-{layout}-warmup")
+            query_all(conn, "SELECT pg_stat_statements_reset()")
+            report = run_window(args, args.concurrency, args.measure, f"citus-{layout}",
+                                output=os.path.join(args.results_dir, WINDOWS_FILE))
+            stmts = statements(conn, args.top_n)
+            results.append({
+                "layout": layout,
+                "valid": True,
+                "tables": applied,
+                "rows": rows,
+                "throughput_rps": report["throughput_rps"],
+                "error_count": report["error_count"],
+                "latency_ms": report["latency_ms"],
+                "db_exec_ms_total": round(sum(s["total_ms"] for s in stmts), 3),
+                "statements": stmts,
+            })
+            lat = report["latency_ms"]
+            log(f"[CITUS-AB] {layout}: {report['throughput_rps']} ok/s, p50 {lat['p50']}ms p99 {lat['p99']}ms, "
+                f"top-{args.top_n} statements {results[-1]['db_exec_ms_total']}ms total")
+    finally:
+        log("[CITUS-AB] Restoring the original table layout...")
+        for table, column in tables + list(reversed(reference_tables)):
+            if original[table] is None:
+                set_table_type(conn, table, column, None, args.shard_count)
+        for table, column in reference_tables + tables:
+            if original[table] is not None:
+                set_table_type(conn, table, column, original[table], args.shard_count)
+        conn.close()
+
+    valid = [r for r in results if r["valid"]]
+
+    report = {
+        "timestamp": time.time(),
+        "flow_id": args.flow_id,
+        "concurrency": args.concurrency,
+        "measure_s": args.measure,
+        "same_dataset": args.restore_snapshot,
+        "layouts": results,
+        # Only arms that really ran in their layout are compared, and only valid on the same dataset.
+        "comparisons": [
+            {"baseline": valid[0]["layout"], "variant": r["layout"], "valid": args.restore_snapshot,
+             "invalid_reason": None if args.restore_snapshot else "layouts did not start from the same dataset",
+             "statements": compare_statements(valid[0]["statements"], r["statements"])}
+            for r in valid[1:]
+        ] if results and results[0]["valid"] else [],
+    }
+    with open(os.path.join(args.results_dir, "citus-ab.json"), "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    for c in report["comparisons"]:
+        if not c["valid"]:
+            log(f"[CITUS-AB] {c['variant']} vs {c['baseline']}: INVALID, {c['invalid_reason']}")
+        for s in c["statements"][:5]:
+            log(f"[CITUS-AB] {c['variant']} vs {c['baseline']}: {s['mean_pct']:+.1f}% mean "
+                f"({s['baseline_mean_ms']} -> {s['variant_mean_ms']}ms) {s['query'][:90]}")
+    print(json.dumps({k: v for k, v in report.items() if k != "layouts"} |
+                     {"layouts": [{k: v for k, v in r.items() if k != "statements"} for r in results]}, default=str))
+    if len(valid) < len(results):
+        sys.exit(f"[CITUS-AB] Invalid arm(s): {', '.join(r['layout'] for r in results if not r['valid'])}, see above")
+
+
+if __name__ == "__main__":
+    main()
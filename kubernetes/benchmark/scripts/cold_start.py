@@ -0,0 +1,302 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import threading
+
+import httpx
+from kubernetes.stream import stream
+
+import loadgen
+from sweep import LANGFLOW_DEPLOYMENT, NAMESPACE, current_replicas, load_kube_config, scale
+
+# Cold-start profiler: scale Langflow from --from-replicas to --to-replicas and follow every new pod
+# through its startup phases, all as seconds since the scale request:
+#   created / scheduled / container_started / k8s_ready  - pod metadata and conditions (1s resolution)
+#   gunicorn_master / gunicorn_worker                      - process start times read from /proc in the pod,
+#                                                            same process tree test-gunicorn.sh inspects
+#   health_ok / first_run_ok                               - first 200 from /health and from the run
+#                                                            endpoint, called on the pod IP directly
+# The report has the distribution of every phase and stage across pods and rounds, plus how long after
+# Kubernetes marks a pod Ready it actually serves its first run, which is what the fixed
+# "Stabilizing (15s)" in benchmark.sh tries to cover.
+
+POD_SELECTOR = os.getenv("LANGFLOW_POD_SELECTOR", "app=langflow")
+LANGFLOW_PORT = int(os.getenv("LANGFLOW_PORT", "7860"))
+
+PHASES = ("created", "scheduled", "container_started", "gunicorn_master", "gunicorn_worker",
+          "health_ok", "k8s_ready", "first_run_ok")
+# Consecutive startup stages, each the time between two phases.
+STAGES = (
+    ("schedule", "created", "scheduled"),
+    ("image+container", "scheduled", "container_started"),
+    ("gunicorn boot", "container_started", "gunicorn_worker"),
+    ("app init", "gunicorn_worker", "health_ok"),
+    ("first run", "health_ok", "first_run_ok"),
+    ("ready -> first run", "k8s_ready", "first_run_ok"),
+)
+
+# Prints "<shell pid> <boot time> <clock ticks/s>", then "<pid> <ppid> <start ticks>" per process.
+# The comm field is stripped first, since it may contain spaces.
+PROC_SCRIPT = r"""
+echo "$$ $(awk '/^btime/ {print $2}' /proc/stat) $(getconf CLK_TCK 2>/dev/null || echo 100)"
+for f in /proc/[0-9]*/stat; do
+  sed 's/^\([0-9]*\) (.*) /\1 /' "$f" 2>/dev/null | awk '{print $1, $3, $21}'
+done
+"""
+
+
+def log(msg):
+    print(msg, file=sys.stderr, flush=True)
+
+
+def ts(value):
+    return value.timestamp() if value else None
+
+
+def condition_time(pod, kind):
+    for c in pod.status.conditions or []:
+        if c.type == kind and c.status == "True":
+            return ts(c.last_transition_time)
+    return None
+
+
+def container_started(pod):
+    for cs in pod.status.container_statuses or []:
+        if cs.state and cs.state.running:
+            return ts(cs.state.running.started_at)
+    return None
+
+
+def gunicorn_times(core, name, namespace=NAMESPACE):
+    # Workers are processes whose parent is neither PID 1 nor outside the container; their parent is
+    # the gunicorn arbiter. The exec'd shell and its pipes are left out.
+    out = stream(core.connect_get_namespaced_pod_exec, name, namespace, command=["/bin/sh", "-c", PROC_SCRIPT],
+                 stderr=False, stdin=False, stdout=True, tty=False)
+    lines = out.strip().splitlines()
+    shell, btime, hz = lines[0].split()
+    shell, btime, hz = int(shell), float(btime), float(hz)
+    procs = {}
+    for line in lines[1:]:
+        parts = line.split()
+        if len(parts) == 3 and all(p.isdigit() for p in parts):
+            procs[int(parts[0])] = (int(parts[1]), btime + int(parts[2]) / hz)
+
+    def from_shell(pid):
+        while pid in procs and pid not in (0, 1):
+            if pid == shell:
+                return True
+            pid = procs[pid][0]
+        return False
+
+    workers = sorted((start, pid, ppid) for pid, (ppid, start) in procs.items()
+                     if pid != 1 and ppid not in (0, 1) and not from_shell(pid))
+    if not workers:
+        return {}
+    arbiter = workers[0][2]
+    siblings = [start for start, _, ppid in workers if ppid == arbiter]
+    return {"gunicorn_master": procs[arbiter][1] if arbiter in procs else None,
+            "gunicorn_worker": workers[0][0],
+            "gunicorn_last_worker": max(siblings),
+            "gunicorn_workers": len(siblings)}
+
+
+class PodProbe(threading.Thread):
+    # Polls one pod directly (not through the Service, which would hit the warm pods).
+    def __init__(self, args, ip, deadline):
+        super().__init__(daemon=True)
+        self.args = args
+        self.base = f"http://{ip}:{LANGFLOW_PORT}"
+        self.deadline = deadline
+        self.times = {}
+        self.first_run_ms = None
+        self.attempts = {"health": 0, "run": 0}
+        self.error = None
+
+    def poll(self, client, kind, call):
+        while time.time() < self.deadline:
+            self.attempts[kind] += 1
+            started = time.perf_counter()
+            try:
+                if call(client).status_code == 200:
+                    return time.time(), (time.perf_counter() - started) * 1000.0
+            except httpx.HTTPError as e:
+                self.error = f"{kind}: {type(e).__name__}"
+            time.sleep(self.args.probe_interval)
+        return None, None
+
+    def run(self):
+        payload = json.loads(self.args.payload) if self.args.payload else loadgen.DEFAULT_PAYLOAD
+        headers = {"x-api-key": self.args.api_key}
+        with httpx.Client(timeout=self.args.probe_timeout) as client:
+            self.times["health_ok"], _ = self.poll(client, "health", lambda c: c.get(f"{self.base}/health"))
+            if self.times["health_ok"] is None:
+                return
+            # The first run on a fresh worker is the cold one; it gets the full request timeout.
+            client.timeout = httpx.Timeout(self.args.timeout)
+            self.times["first_run_ok"], self.first_run_ms = self.poll(
+                client, "run", lambda c: c.post(f"{self.base}/api/v1/run/{self.args.flow_id}?stream=false",
+                                                json=payload, headers=headers))
+
+
+def follow_scale_out(apps, core, args, round_no):
+    scale(apps, LANGFLOW_DEPLOYMENT, args.from_replicas, args.rollout_timeout)
+    # Pods still terminating from the scale-in are on their way out and do not count towards from_replicas.
+    existing = {p.metadata.name for p in core.list_namespaced_pod(NAMESPACE, label_selector=POD_SELECTOR).items
+                if not p.metadata.deletion_timestamp}
+    expected = args.to_replicas - len(existing)
+    log(f"[COLD] Round {round_no}: scaling {args.from_replicas} -> {args.to_replicas} ({expected} new pod(s))")
+
+    t0 = time.time()
+    deadline = t0 + args.pod_timeout
+    apps.patch_namespaced_deployment_scale(LANGFLOW_DEPLOYMENT, NAMESPACE, {"spec": {"replicas": args.to_replicas}})
+    pods, probes = {}, {}
+    while time.time() < deadline:
+        for pod in core.list_namespaced_pod(NAMESPACE, label_selector=POD_SELECTOR).items:
+            name = pod.metadata.name
+            if name in existing or pod.metadata.deletion_timestamp:
+                continue
+            pods[name] = pod
+            if name not in probes and pod.status.pod_ip:
+                probes[name] = PodProbe(args, pod.status.pod_ip, deadline)
+                probes[name].start()
+        if len(pods) >= expected and len(probes) == len(pods) and not any(p.is_alive() for p in probes.values()):
+            break
+        time.sleep(args.poll_interval)
+
+    results = []
+    for name, pod in sorted(pods.items()):
+        probe = probes.get(name)
+        if probe:
+            probe.join(timeout=max(0.0, deadline - time.time()))
+        pod = core.read_namespaced_pod(name, NAMESPACE)
+        times = {
+            "created": ts(pod.metadata.creation_timestamp),
+            "scheduled": condition_time(pod, "PodScheduled"),
+            "container_started": container_started(pod),
+            "k8s_ready": condition_time(pod, "Ready"),
+            **(probe.times if probe else {}),
+        }
+        extra = {}
+        if times["container_started"]:
+            try:
+                extra = gunicorn_times(core, name)
+            except Exception as e:
+                log(f"[COLD] {name}: could not read the process tree ({type(e).__name__}: {e})")
+        times.update({k: v for k, v in extra.items() if k in PHASES})
+        result = {
+            "round": round_no,
+            "pod": name,
+            "node": pod.spec.node_name,
+            "phases_s": {k: round(times[k] - t0, 3) if times.get(k) else None for k in PHASES},
+            "gunicorn_workers": extra.get("gunicorn_workers"),
+            "gunicorn_last_worker_s": round(extra["gunicorn_last_worker"] - t0, 3) if extra else None,
+            "first_run_ms": round(probe.first_run_ms, 1) if probe and probe.first_run_ms else None,
+            "attempts": probe.attempts if probe else None,
+            "error": None if times.get("first_run_ok") else (probe.error if probe else "no pod IP") or "timeout",
+        }
+        result["stages_s"] = {label: round(result["phases_s"][b] - result["phases_s"][a], 3)
+                              if result["phases_s"][a] is not None and result["phases_s"][b] is not None else None
+                              for label, a, b in STAGES}
+        results.append(result)
+        p = result["phases_s"]
+        log(f"[COLD] {name}: scheduled {p['scheduled']}s, started {p['container_started']}s, "
+            f"worker {p['gunicorn_worker']}s, health {p['health_ok']}s, ready {p['k8s_ready']}s, "
+            f"first run {p['first_run_ok']}s{' ERROR: ' + result['error'] if result['error'] else ''}")
+    if len(results) < expected:
+        log(f"[COLD] Round {round_no}: only {len(results)} of {expected} new pods appeared within {args.pod_timeout:.0f}s")
+    return results
+
+
+def distribution(values):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+
+    def pct(q):
+        return values[max(0, math.ceil(q * len(values)) - 1)]
+
+    return {"n": len(values), "min": values[0], "p50": pct(0.5), "p90": pct(0.9), "max": values[-1],
+            "mean": round(sum(values) / len(values), 3)}
+
+
+def summarize(pods):
+    rounds = sorted({p["round"] for p in pods})
+    return {
+        "phases_s": {k: distribution(p["phases_s"][k] for p in pods) for k in PHASES},
+        "stages_s": {label: distribution(p["stages_s"][label] for p in pods) for label, _, _ in STAGES},
+        "first_run_ms": distribution(p["first_run_ms"] for p in pods),
+        # Scale request until the last new pod served a run, per round.
+        "scale_out_s": [max((p["phases_s"]["first_run_ok"] for p in pods
+                             if p["round"] == r and p["phases_s"]["first_run_ok"] is not None), default=None)
+                        for r in rounds],
+        "failed_pods": sum(1 for p in pods if p["error"]),
+    }
+
+
+def print_table(summary):
+    log("=" * 78)
+    log(f"{'seconds':<22} {'n':>4} {'min':>8} {'p50':>8} {'p90':>8} {'max':>8}")
+    for section in ("phases_s", "stages_s"):
+        for name, d in summary[section].items():
+            if d:
+                log(f"{name:<22} {d['n']:>4} {d['min']:>8.2f} {d['p50']:>8.2f} {d['p90']:>8.2f} {d['max']:>8.2f}")
+        log("-" * 78)
+    log(f"scale-out to last first run per round: {summary['scale_out_s']}s, failed pods: {summary['failed_pods']}")
+    log("=" * 78)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Langflow pod cold-start profiler over a scale-out.")
+    parser.add_argument("--flow-id", required=True)
+    parser.add_argument("--api-key", required=True)
+    parser.add_argument("--payload", default=None)
+    parser.add_argument("--from-replicas", type=int, default=int(os.getenv("COLD_START_FROM") or "1"))
+    parser.add_argument("--to-replicas", type=int, default=int(os.getenv("COLD_START_TO") or "16"))
+    parser.add_argument("--rounds", type=int, default=int(os.getenv("COLD_START_ROUNDS") or "1"),
+                        help="scale-outs to repeat; every round starts from --from-replicas again")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="seconds between pod listings")
+    parser.add_argument("--probe-interval", type=float, default=0.25, help="seconds between /health and run probes")
+    parser.add_argument("--probe-timeout", type=float, default=2.0, help="per /health probe")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per run request")
+    parser.add_argument("--pod-timeout", type=float, default=600.0, help="give up on a round after N seconds")
+    parser.add_argument("--rollout-timeout", type=float, default=300.0)
+    parser.add_argument("--results-dir", default=os.getenv("RESULTS_DIR", "/app/results"))
+    args = parser.parse_args(argv)
+    if args.to_replicas <= args.from_replicas:
+        parser.error("--to-replicas must be larger than --from-replicas")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.results_dir, exist_ok=True)
+    apps, core = load_kube_config()
+    original_replicas = current_replicas(apps, LANGFLOW_DEPLOYMENT)
+
+    pods = []
+    try:
+        for round_no in range(1, args.rounds + 1):
+            pods.extend(follow_scale_out(apps, core, args, round_no))
+    finally:
+        log("[COLD] Restoring the original replica count...")
+        scale(apps, LANGFLOW_DEPLOYMENT, original_replicas, args.rollout_timeout)
+
+    summary = summarize(pods)
+    print_table(summary)
+    report = {
+        "timestamp": time.time(),
+        "flow_id": args.flow_id,
+        "params": {k: v for k, v in vars(args).items() if k not in ("api_key", "payload")},
+        "summary": summary,
+        "pods": pods,
+    }
+    with open(os.path.join(args.results_dir, "cold-start.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps({"summary": summary}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+import os
+import sys
+import csv
+import json
+import time
+import signal
+import argparse
+
+import psycopg2
+import psycopg2.extras
+
+# Sub-second Postgres / PgBouncer sampler for benchmark runs.
+# Keeps exactly one connection to Postgres and one to the PgBouncer admin console for the whole
+# run (instead of kubectl exec + psql per sample), and writes one timestamped row per tick.
+# `ts` is wall-clock epoch seconds, the same clock loadgen.py reports, so both timelines line up.
+
+PG_HOST = os.getenv("POSTGRES_HOST", "postgres-db")
+PG_PORT = int(os.getenv("POSTGRES_PORT", "5432"))
+PG_DB = os.getenv("POSTGRES_DB", "langflow_db")
+PG_USER = os.getenv("POSTGRES_USER", "postgres_user")
+PG_PASSWORD = os.getenv("POSTGRES_PASSWORD", os.getenv("PGPASSWORD", "password"))
+PGB_HOST = os.getenv("PGBOUNCER_HOST", "pgbouncer")
+PGB_PORT = int(os.getenv("PGBOUNCER_PORT", "6432"))
+
+ACTIVITY_SQL = """
+    SELECT
+        count(*) FILTER (WHERE state = 'active') AS active,
+        count(*) FILTER (WHERE state = 'idle') AS idle,
+        count(*) FILTER (WHERE state LIKE 'idle in transaction%%') AS idle_in_tx,
+        count(*) FILTER (WHERE wait_event_type IS NOT NULL AND state = 'active') AS waiting,
+        count(*) AS total
+    FROM pg_stat_activity
+    WHERE datname = %s AND pid <> pg_backend_pid()
+"""
+
+WAIT_EVENTS_SQL = """
+    SELECT wait_event_type || ':' || wait_event AS event, count(*) AS n
+    FROM pg_stat_activity
+    WHERE datname = %s AND state = 'active' AND wait_event_type IS NOT NULL AND pid <> pg_backend_pid()
+    GROUP BY 1
+"""
+
+STATEMENTS_TOTAL_SQL = """
+    SELECT coalesce(sum(calls), 0) AS calls, coalesce(sum(total_exec_time), 0) AS exec_ms
+    FROM pg_stat_statements s JOIN pg_database d ON d.oid = s.dbid
+    WHERE d.datname = %s
+"""
+
+STATEMENTS_TOP_SQL = """
+    SELECT queryid, left(query, 160) AS query, calls, total_exec_time AS exec_ms, rows
+    FROM pg_stat_statements s JOIN pg_database d ON d.oid = s.dbid
+    WHERE d.datname = %s
+    ORDER BY total_exec_time DESC
+    LIMIT %s
+"""
+
+# Cumulative PgBouncer SHOW STATS counters that are reported as per-tick deltas.
+PGB_STAT_COUNTERS = ("total_xact_count", "total_query_count", "total_wait_time", "total_xact_time", "total_query_time")
+
+
+class Stopper:
+    def __init__(self):
+        self.stopped = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+    def stop(self, *_):
+        self.stopped = True
+
+
+def log(msg):
+    print(msg, file=sys.stderr, flush=True)
+
+
+def connect_postgres(args):
+    conn = psycopg2.connect(host=args.pg_host, port=args.pg_port, dbname=args.pg_db,
+                            user=args.pg_user, password=args.pg_password,
+                            application_name="db_sampler", connect_timeout=5)
+    conn.autocommit = True
+    has_statements = False
+    with conn.cursor() as cur:
+        try:
+            cur.execute("CREATE EXTENSION IF NOT EXISTS pg_stat_statements")
+            cur.execute("SELECT 1 FROM pg_stat_statements LIMIT 1")
+            has_statements = True
+        except psycopg2.Error as e:
+            log(f"[SAMPLER] pg_stat_statements unavailable, statement metrics disabled: {e.pgerror or e}")
+    return conn, has_statements
+
+
+def connect_pgbouncer(args):
+    # The admin console only speaks the simple query protocol and has no transactions.
+    conn = psycopg2.connect(host=args.pgb_host, port=args.pgb_port, dbname="pgbouncer",
+                            user=args.pg_user, password=args.pg_password, connect_timeout=5)
+    conn.autocommit = True
+    return conn
+
+
+def show(conn, command, database):
+    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        cur.execute(command)
+        return [dict(r) for r in cur.fetchall() if r.get("database") == database]
+
+
+class Sampler:
+    def __init__(self, args):
+        self.args = args
+        self.pg, self.has_statements = connect_postgres(args)
+        self.pgb = None
+        if not args.no_pgbouncer:
+            try:
+                self.pgb = connect_pgbouncer(args)
+            except psycopg2.Error as e:
+                log(f"[SAMPLER] PgBouncer admin console unavailable, pool metrics disabled: {e}")
+        self.tick = 0
+        self.prev_statements = None
+        self.prev_pgb_stats = None
+        self.prev_ts = None
+
+    def sample(self):
+        ts = time.time()
+        started = time.perf_counter()
+        row = {"ts": round(ts, 3)}
+        if self.args.label:
+            row["label"] = self.args.label
+
+        with self.pg.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+            cur.execute(ACTIVITY_SQL, (self.args.pg_db,))
+            row.update({f"pg_{k}": v for k, v in cur.fetchone().items()})
+            cur.execute(WAIT_EVENTS_SQL, (self.args.pg_db,))
+            row["pg_wait_events"] = {r["event"]: r["n"] for r in cur.fetchall()}
+
+            if self.has_statements:
+                cur.execute(STATEMENTS_TOTAL_SQL, (self.args.pg_db,))
+                totals = cur.fetchone()
+                row["pg_calls"] = row["pg_exec_ms"] = None
+                if self.prev_statements is not None:
+                    row["pg_calls"] = int(totals["calls"] - self.prev_statements["calls"])
+                    row["pg_exec_ms"] = round(float(totals["exec_ms"] - self.prev_statements["exec_ms"]), 3)
+                self.prev_statements = totals
+                if self.args.top_every and self.tick % self.args.top_every == 0:
+                    cur.execute(STATEMENTS_TOP_SQL, (self.args.pg_db, self.args.top_n))
+                    row["pg_top_statements"] = [
+                        {**r, "queryid": str(r["queryid"]), "exec_ms": round(float(r["exec_ms"]), 3)}
+                        for r in cur.fetchall()
+                    ]
+
+        if self.pgb is not None:
+            pools = show(self.pgb, "SHOW POOLS", self.args.pg_db)
+            for key in ("cl_active", "cl_waiting", "sv_active", "sv_idle", "sv_used"):
+                row[f"pgb_{key}"] = sum(int(p.get(key) or 0) for p in pools)
+            # maxwait is the oldest waiting client of each pool, so the worst pool wins rather than the sum.
+            oldest_us = max((int(p.get("maxwait") or 0) * 1000000 + int(p.get("maxwait_us") or 0) for p in pools), default=0)
+            row["pgb_maxwait"], row["pgb_maxwait_us"] = divmod(oldest_us, 1000000)
+            stats = show(self.pgb, "SHOW STATS", self.args.pg_db)
+            current = {k: sum(int(s.get(k) or 0) for s in stats) for k in PGB_STAT_COUNTERS}
+            # Deltas start empty so every row (and the CSV header) has the same columns.
+            row.update({f"pgb_{k}_delta": None for k in PGB_STAT_COUNTERS})
+            row["pgb_xact_per_s"] = row["pgb_avg_wait_ms"] = None
+            if self.prev_pgb_stats is not None and self.prev_ts is not None:
+                for k in PGB_STAT_COUNTERS:
+                    row[f"pgb_{k}_delta"] = current[k] - self.prev_pgb_stats[k]
+                xacts = row["pgb_total_xact_count_delta"]
+                row["pgb_xact_per_s"] = round(xacts / max(ts - self.prev_ts, 1e-6), 2)
+                # total_wait_time is in microseconds: average client wait per transaction in this tick.
+                row["pgb_avg_wait_ms"] = round(row["pgb_total_wait_time_delta"] / xacts / 1000.0, 3) if xacts else 0.0
+            self.prev_pgb_stats = current
+
+        self.prev_ts = ts
+        self.tick += 1
+        row["sample_ms"] = round((time.perf_counter() - started) * 1000.0, 3)
+        return row
+
+    def close(self):
+        for conn in (self.pg, self.pgb):
+            if conn is not None:
+                conn.close()
+
+
+class Writer:
+    def __init__(self, path, fmt):
+        self.fmt = fmt
+        self.file = open(path, "a", newline="") if path else sys.stdout
+        self.csv = None
+
+    def write(self, row):
+        if self.fmt == "jsonl":
+            self.file.write(json.dumps(row, default=str) + "\n")
+        else:
+            flat = {k: (json.dumps(v) if isinstance(v, (dict, list)) else v)
+                    for k, v in row.items() if k != "pg_top_statements"}
+            if self.csv is None:
+                self.csv = csv.DictWriter(self.file, fieldnames=list(flat), extrasaction="ignore")
+                if self.file is sys.stdout or self.file.tell() == 0:
+                    self.csv.writeheader()
+            self.csv.writerow(flat)
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sample Postgres and PgBouncer metrics over persistent connections.")
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between samples")
+    parser.add_argument("--duration", type=float, default=0, help="stop after N seconds (0 = until SIGTERM)")
+    parser.add_argument("--output", default=None, help="file to append to (default stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--label", default="")
+    parser.add_argument("--top-every", type=int, default=10, help="emit top statements every N samples (0 = never)")
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--print-every", type=float, default=5.0, help="seconds between one-line status logs on stderr")
+    parser.add_argument("--pg-host", default=PG_HOST)
+    parser.add_argument("--pg-port", type=int, default=PG_PORT)
+    parser.add_argument("--pg-db", default=PG_DB)
+    parser.add_argument("--pg-user", default=PG_USER)
+    parser.add_argument("--pg-password", default=PG_PASSWORD)
+    parser.add_argument("--pgb-host", default=PGB_HOST)
+    parser.add_argument("--pgb-port", type=int, default=PGB_PORT)
+    parser.add_argument("--no-pgbouncer", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    stopper = Stopper()
+    sampler = Sampler(args)
+    writer = Writer(args.output, args.format)
+    log(f"[SAMPLER] Sampling {args.pg_host}:{args.pg_port}/{args.pg_db} every {args.interval}s"
+        f"{'' if sampler.pgb is None else f' (+ PgBouncer {args.pgb_host}:{args.pgb_port})'}")
+
+    started = time.perf_counter()
+    last_print = 0.0
+    n = 0
+    try:
+        while not stopper.stopped:
+            row = sampler.sample()
+            writer.write(row)
+            now = time.perf_counter()
+            if args.print_every and now - last_print >= args.print_every:
+                last_print = now
+                log(f"   [DB-STAT] Active: {row['pg_active']} | Waiting: {row['pg_waiting']}"
+                    f"{'' if 'pgb_cl_waiting' not in row else ' | PGB-Wait: ' + str(row['pgb_cl_waiting'])}"
+                    f" | sample {row['sample_ms']}ms")
+            if args.duration and now - started >= args.duration:
+                break
+            # Fixed-rate schedule: a slow sample shortens the next sleep instead of drifting the timeline.
+            n += 1
+            delay = started + n * args.interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    finally:
+        writer.close()
+        sampler.close()
+        log(f"[SAMPLER] Stopped after {sampler.tick} samples.")
+
+
+if __name__ == "__main__":
+    main()
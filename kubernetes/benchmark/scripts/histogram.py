@@ -0,0 +1,143 @@
+import math
+
+# Log-linear latency histogram with the same bucket layout as HdrHistogram:
+# values are kept to SIGNIFICANT_DIGITS precision across the whole range, so
+# p999 of a 30s run is as exact as p50 without keeping every sample.
+# Values are recorded in integer microseconds.
+SIGNIFICANT_DIGITS = 3
+
+
+class LatencyHistogram:
+    def __init__(self, significant_digits=SIGNIFICANT_DIGITS):
+        self.significant_digits = significant_digits
+        largest_single_unit = 2 * 10 ** significant_digits
+        self.sub_bucket_count = 2 ** math.ceil(math.log2(largest_single_unit))
+        self.sub_bucket_half_count = self.sub_bucket_count // 2
+        self.sub_bucket_half_count_magnitude = int(math.log2(self.sub_bucket_half_count))
+        self.sub_bucket_mask = self.sub_bucket_count - 1
+        self.counts = {}
+        self.total_count = 0
+        self.min_value = None
+        self.max_value = 0
+        self.total_value = 0
+        self.total_value_sq = 0
+
+    # --- bucket math ---
+    def _counts_index(self, value):
+        bucket_index = (value | self.sub_bucket_mask).bit_length() - (self.sub_bucket_half_count_magnitude + 1)
+        sub_bucket_index = value >> bucket_index
+        return ((bucket_index + 1) << self.sub_bucket_half_count_magnitude) + (sub_bucket_index - self.sub_bucket_half_count)
+
+    def _value_range(self, index):
+        bucket_index = (index >> self.sub_bucket_half_count_magnitude) - 1
+        sub_bucket_index = (index & (self.sub_bucket_half_count - 1)) + self.sub_bucket_half_count
+        if bucket_index < 0:
+            sub_bucket_index -= self.sub_bucket_half_count
+            bucket_index = 0
+        lowest = sub_bucket_index << bucket_index
+        return lowest, lowest + (1 << bucket_index) - 1
+
+    # --- recording ---
+    def record(self, value_us, count=1):
+        value_us = max(int(value_us), 0)
+        index = self._counts_index(value_us)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total_count += count
+        self.total_value += value_us * count
+        self.total_value_sq += value_us * value_us * count
+        self.max_value = max(self.max_value, value_us)
+        self.min_value = value_us if self.min_value is None else min(self.min_value, value_us)
+
+    def record_seconds(self, seconds):
+        self.record(round(seconds * 1_000_000))
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total_count += other.total_count
+        self.total_value += other.total_value
+        self.total_value_sq += other.total_value_sq
+        self.max_value = max(self.max_value, other.max_value)
+        if other.min_value is not None:
+            self.min_value = other.min_value if self.min_value is None else min(self.min_value, other.min_value)
+        return self
+
+    # --- queries ---
+    def value_at_percentile(self, percentile):
+        if not self.total_count:
+            return 0
+        target = max(1, math.ceil(min(percentile, 100.0) / 100.0 * self.total_count))
+        running = 0
+        for index in sorted(self.counts):
+            running += self.counts[index]
+            if running >= target:
+                return min(self._value_range(index)[1], self.max_value)
+        return self.max_value
+
+    def mean(self):
+        return self.total_value / self.total_count if self.total_count else 0.0
+
+    def stddev(self):
+        if not self.total_count:
+            return 0.0
+        mean = self.mean()
+        return math.sqrt(max(self.total_value_sq / self.total_count - mean * mean, 0.0))
+
+    def summary_ms(self):
+        return {
+            "count": self.total_count,
+            "min": (self.min_value or 0) / 1000.0,
+            "mean": round(self.mean() / 1000.0, 3),
+            "stddev": round(self.stddev() / 1000.0, 3),
+            "p50": self.value_at_percentile(50) / 1000.0,
+            "p90": self.value_at_percentile(90) / 1000.0,
+            "p99": self.value_at_percentile(99) / 1000.0,
+            "p999": self.value_at_percentile(99.9) / 1000.0,
+            "max": self.max_value / 1000.0,
+        }
+
+    # --- serialisation ---
+    def to_dict(self):
+        return {
+            "significant_digits": self.significant_digits,
+            "counts": {str(k): v for k, v in sorted(self.counts.items())},
+            "min": self.min_value,
+            "max": self.max_value,
+            "total_value": self.total_value,
+            "total_value_sq": self.total_value_sq,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        hist = cls(data.get("significant_digits", SIGNIFICANT_DIGITS))
+        hist.counts = {int(k): v for k, v in data.get("counts", {}).items()}
+        hist.total_count = sum(hist.counts.values())
+        hist.min_value = data.get("min")
+        hist.max_value = data.get("max", 0)
+        hist.total_value = data.get("total_value", 0)
+        hist.total_value_sq = data.get("total_value_sq", 0)
+        return hist
+
+    def percentile_distribution(self, ticks_per_half_distance=5, unit_ratio=1000.0):
+        # Same layout as HdrHistogram's outputPercentileDistribution (values in ms),
+        # so the .hgrm files load directly into the HdrHistogram plotter.
+        lines = [f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}", ""]
+        if self.total_count:
+            percentile = 0.0
+            while True:
+                value = self.value_at_percentile(percentile)
+                count = self._count_at_or_below(value)
+                fraction = count / self.total_count
+                inverse = "inf" if fraction >= 1.0 else f"{1.0 / (1.0 - fraction):.2f}"
+                lines.append(f"{value / unit_ratio:12.3f} {fraction:14.12f} {count:10d} {inverse:>14}")
+                if count >= self.total_count:
+                    break
+                half_distance = 2 ** (math.floor(math.log2(100.0 / (100.0 - percentile))) + 1)
+                percentile += 100.0 / (half_distance * ticks_per_half_distance)
+        lines.append(f"#[Mean    = {self.mean() / unit_ratio:12.3f}, StdDeviation   = {self.stddev() / unit_ratio:12.3f}]")
+        lines.append(f"#[Max     = {self.max_value / unit_ratio:12.3f}, Total count    = {self.total_count:12d}]")
+        lines.append(f"#[Buckets = {len(self.counts):12d}, SubBuckets     = {self.sub_bucket_count:12d}]")
+        return "\n".join(lines) + "\n"
+
+    def _count_at_or_below(self, value):
+        return sum(c for i, c in self.counts.items() if self._value_range(i)[0] <= value)
@@ -0,0 +1,492 @@
+import os
+import re
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from http import HTTPStatus
+from collections import Counter
+from email.parser import BytesParser
+from email.policy import HTTP
+from urllib.parse import parse_qs, urlsplit
+
+# Stand-in Langflow API for offline benchmarking of the init scripts and loadgen.py.
+# Stdlib only (asyncio streams, hand-rolled HTTP/1.1 with keep-alive). It implements the endpoints
+# the tooling uses, keeps users / API keys / projects / flows in memory, and can add a latency
+# distribution and inject failures per route, seeded so runs are reproducible.
+#
+#   --latency run=lognormal:200:0.4     median 200ms, sigma 0.4 (also const:MS, uniform:LO:HI,
+#                                       normal:MEAN:SD, exp:MEAN; route "default" applies to the rest)
+#   --fail upload=0.05:503              5% of uploads answer 503 (or "reset" to drop the connection,
+#                                       "hang" to never answer)
+#   --run-workers 8                     at most 8 concurrent runs, the rest queue (gunicorn workers)
+#   --latency token=normal:30:10        gap between token events of stream=true runs
+#
+# Routes: health, login, api_key, users, projects, flows, upload, batch, run, token, default.
+# GET /_stub/stats returns request counts per route and status.
+
+STUB_HOST = os.getenv("STUB_HOST", "127.0.0.1")
+STUB_PORT = int(os.getenv("STUB_PORT", "7860"))
+SUPERUSER = os.getenv("LANGFLOW_SUPERUSER", "admin")
+SUPERUSER_PASSWORD = os.getenv("LANGFLOW_SUPERUSER_PASSWORD", "admin")
+DEFAULT_FOLDER = "My Collection"
+HEADER_FIELDS = ("id", "name", "folder_id", "is_component", "endpoint_name", "description", "updated_at")
+
+
+def log(msg):
+    print(msg, file=sys.stderr, flush=True)
+
+
+# --- Latency / failure specs ---
+
+def parse_distribution(spec):
+    kind, *params = spec.split(":")
+    p = [float(x) for x in params]
+    samplers = {
+        "const": lambda rng: p[0],
+        "uniform": lambda rng: rng.uniform(p[0], p[1]),
+        "normal": lambda rng: max(0.0, rng.gauss(p[0], p[1])),
+        "lognormal": lambda rng: rng.lognormvariate(math.log(p[0]), p[1]),
+        "exp": lambda rng: rng.expovariate(1.0 / p[0]) if p[0] else 0.0,
+    }
+    arity = {"const": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exp": 1}
+    if kind not in samplers:
+        raise argparse.ArgumentTypeError(f"unknown distribution '{kind}' (const, uniform, normal, lognormal, exp)")
+    if len(p) != arity[kind]:
+        raise argparse.ArgumentTypeError(f"'{kind}' takes {arity[kind]} parameter(s), got '{spec}'")
+    return samplers[kind]
+
+
+def parse_route_specs(values, parse_value):
+    specs = {}
+    for value in values:
+        for item in filter(None, (v.strip() for v in value.split(";"))):
+            route, _, spec = item.partition("=")
+            if not spec:
+                raise argparse.ArgumentTypeError(f"expected ROUTE=SPEC, got '{item}'")
+            specs[route.strip()] = parse_value(spec.strip())
+    return specs
+
+
+def parse_failure(spec):
+    rate, _, kind = spec.partition(":")
+    kind = kind or "500"
+    if kind not in ("reset", "hang") and not kind.isdigit():
+        raise argparse.ArgumentTypeError(f"failure kind must be an HTTP status, 'reset' or 'hang', got '{kind}'")
+    return float(rate), kind
+
+
+# --- HTTP plumbing ---
+
+class HTTPError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+class Request:
+    def __init__(self, method, target, headers, body):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = parts.path
+        self.query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        # None for an empty body; every JSON endpoint of the API takes an object otherwise.
+        try:
+            value = json.loads(self.body or b"null")
+        except ValueError:
+            raise HTTPError(422, "invalid JSON body")
+        if value is not None and not isinstance(value, dict):
+            raise HTTPError(422, "expected a JSON object")
+        return value
+
+    def form(self):
+        return {k: v[-1] for k, v in parse_qs(self.body.decode()).items()}
+
+    def files(self):
+        # multipart/form-data -> {field: bytes}
+        raw = b"Content-Type: " + self.headers.get("content-type", "").encode() + b"\r\n\r\n" + self.body
+        message = BytesParser(policy=HTTP).parsebytes(raw)
+        if not message.is_multipart():
+            raise HTTPError(422, "expected multipart/form-data")
+        return {part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+                for part in message.iter_parts()}
+
+
+async def read_request(reader):
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    method, target, _ = line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0") or 0)
+    body = await reader.readexactly(length) if length else b""
+    return Request(method, target, headers, body)
+
+
+def encode_response(status, payload, keep_alive):
+    body = json.dumps(payload).encode()
+    head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode() + body
+
+
+class EventStream:
+    # Handler result for stream=true: (event, data) pairs, each sent as its own chunk after `delay(event)` ms.
+    def __init__(self, events, delay):
+        self.events = events
+        self.delay = delay
+
+    async def write(self, writer, keep_alive):
+        writer.write((f"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n"
+                      f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode())
+        for event, data in self.events:
+            await asyncio.sleep(self.delay(event) / 1000)
+            block = json.dumps({"event": event, "data": data}).encode() + b"\n\n"
+            writer.write(f"{len(block):x}\r\n".encode() + block + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+# --- Fake Langflow ---
+
+def now_iso():
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime())
+
+
+class LangflowStub:
+    def __init__(self, latency=None, failures=None, run_workers=0, seed=None, stream_tokens=20):
+        self.latency = latency or {}
+        self.stream_tokens = stream_tokens
+        self.failures = failures or {}
+        self.rng = random.Random(seed)
+        self.run_slots = asyncio.Semaphore(run_workers) if run_workers else None
+        self.stats = Counter()
+        self.users, self.tokens, self.api_keys, self.projects, self.flows = {}, {}, {}, {}, {}
+        self.api_key_ids = {}
+        self.create_user(SUPERUSER, SUPERUSER_PASSWORD, is_superuser=True, is_active=True)
+        self.routes = [
+            ("GET", r"/health(_check)?", "health", self.health),
+            ("GET", r"/_stub/stats", "stub", self.get_stats),
+            ("POST", r"/api/v1/login", "login", self.login),
+            ("POST", r"/api/v1/api_key/?", "api_key", self.create_api_key),
+            ("DELETE", r"/api/v1/api_key/(?P<key_id>[^/]+)", "api_key", self.delete_api_key),
+            ("GET", r"/api/v1/users/whoami", "users", self.whoami),
+            ("GET", r"/api/v1/users/?", "users", self.list_users),
+            ("POST", r"/api/v1/users/?", "users", self.add_user),
+            ("PATCH", r"/api/v1/users/(?P<user_id>[^/]+)", "users", self.patch_user),
+            ("GET", r"/api/v1/projects/?", "projects", self.list_projects),
+            ("POST", r"/api/v1/projects/?", "projects", self.add_project),
+            ("GET", r"/api/v1/flows/?", "flows", self.list_flows),
+            ("POST", r"/api/v1/flows/?", "flows", self.add_flow),
+            ("POST", r"/api/v1/flows/upload/?", "upload", self.upload_flows),
+            ("POST", r"/api/v1/flows/batch/?", "batch", self.batch_flows),
+            ("PATCH", r"/api/v1/flows/(?P<flow_id>[^/]+)", "flows", self.patch_flow),
+            ("DELETE", r"/api/v1/flows/(?P<flow_id>[^/]+)", "flows", self.delete_flow),
+            ("POST", r"/api/v1/run/(?P<flow_id>[^/]+)", "run", self.run_flow),
+        ]
+        self.routes = [(m, re.compile(p + "$"), name, h) for m, p, name, h in self.routes]
+
+    # --- state helpers ---
+
+    def create_user(self, username, password, is_superuser=False, is_active=True):
+        user = {"id": str(uuid.uuid4()), "username": username, "password": password, "is_superuser": is_superuser,
+                "is_active": is_active, "create_at": now_iso(), "updated_at": now_iso()}
+        self.users[user["id"]] = user
+        self.create_project(user, DEFAULT_FOLDER, "")
+        return user
+
+    def create_project(self, user, name, description):
+        project = {"id": str(uuid.uuid4()), "name": name, "description": description, "parent_id": None,
+                   "user_id": user["id"]}
+        self.projects[project["id"]] = project
+        return project
+
+    def default_folder(self, user):
+        return next(p["id"] for p in self.projects.values() if p["user_id"] == user["id"] and p["name"] == DEFAULT_FOLDER)
+
+    def create_flow(self, user, payload, folder_id=None):
+        if not isinstance(payload, dict) or not payload.get("name"):
+            raise HTTPError(422, "flow needs a name")
+        taken = {f["name"] for f in self.flows.values() if f["user_id"] == user["id"]}
+        name, n = payload["name"], 1
+        while name in taken:
+            name, n = f"{payload['name']} ({n})", n + 1
+        flow = {**payload, "id": str(uuid.uuid4()), "name": name, "user_id": user["id"],
+                "folder_id": folder_id or payload.get("folder_id") or self.default_folder(user),
+                "is_component": payload.get("is_component", False), "updated_at": now_iso()}
+        self.flows[flow["id"]] = flow
+        return flow
+
+    def public_user(self, user):
+        return {k: v for k, v in user.items() if k != "password"}
+
+    def authenticate(self, request, superuser=False):
+        user = None
+        auth = request.headers.get("authorization", "")
+        if auth.lower().startswith("bearer "):
+            user = self.users.get(self.tokens.get(auth[7:].strip()))
+        elif request.headers.get("x-api-key"):
+            user = self.users.get(self.api_keys.get(request.headers["x-api-key"]))
+        if user is None or not user["is_active"]:
+            raise HTTPError(401, "Could not validate credentials")
+        if superuser and not user["is_superuser"]:
+            raise HTTPError(403, "The user doesn't have enough privileges")
+        return user
+
+    def owned_flow(self, user, flow_id):
+        flow = self.flows.get(flow_id)
+        if flow is None or flow["user_id"] != user["id"]:
+            raise HTTPError(404, "Flow not found")
+        return flow
+
+    # --- handlers: (request, **path params) -> (status, payload) ---
+
+    async def health(self, request):
+        return 200, {"status": "ok", "chat": "ok", "db": "ok"}
+
+    async def get_stats(self, request):
+        return 200, {f"{route} {status}": n for (route, status), n in sorted(self.stats.items())}
+
+    async def login(self, request):
+        form = request.form()
+        user = next((u for u in self.users.values() if u["username"] == form.get("username")), None)
+        if user is None or user["password"] != form.get("password"):
+            raise HTTPError(401, "Incorrect username or password")
+        if not user["is_active"]:
+            raise HTTPError(401, "Inactive user")
+        token = uuid.uuid4().hex
+        self.tokens[token] = user["id"]
+        return 200, {"access_token": token, "refresh_token": uuid.uuid4().hex, "token_type": "bearer"}
+
+    async def create_api_key(self, request):
+        user = self.authenticate(request)
+        key = f"sk-{uuid.uuid4().hex}"
+        self.api_keys[key] = user["id"]
+        key_id = str(uuid.uuid4())
+        self.api_key_ids[key_id] = key
+        return 200, {"id": key_id, "name": (request.json() or {}).get("name"), "api_key": key,
+                     "user_id": user["id"]}
+
+    async def delete_api_key(self, request, key_id):
+        user = self.authenticate(request)
+        key = self.api_key_ids.get(key_id)
+        if key is None or self.api_keys.get(key) != user["id"]:
+            raise HTTPError(404, "API Key not found")
+        del self.api_key_ids[key_id], self.api_keys[key]
+        return 200, {"detail": "API Key deleted"}
+
+    async def whoami(self, request):
+        return 200, self.public_user(self.authenticate(request))
+
+    async def list_users(self, request):
+        self.authenticate(request, superuser=True)
+        users = [self.public_user(u) for u in self.users.values()]
+        return 200, {"total_count": len(users), "users": users}
+
+    async def add_user(self, request):
+        body = request.json() or {}
+        if any(u["username"] == body.get("username") for u in self.users.values()):
+            raise HTTPError(400, "This username is unavailable.")
+        user = self.create_user(body.get("username"), body.get("password"), is_active=False)
+        return 201, self.public_user(user)
+
+    async def patch_user(self, request, user_id):
+        self.authenticate(request, superuser=True)
+        user = self.users.get(user_id)
+        if user is None:
+            raise HTTPError(404, "User not found")
+        user.update({k: v for k, v in (request.json() or {}).items() if k in ("is_active", "is_superuser", "password")})
+        return 200, self.public_user(user)
+
+    async def list_projects(self, request):
+        user = self.authenticate(request)
+        return 200, [p for p in self.projects.values() if p["user_id"] == user["id"]]
+
+    async def add_project(self, request):
+        user = self.authenticate(request)
+        body = request.json() or {}
+        return 201, self.create_project(user, body.get("name"), body.get("description", ""))
+
+    async def list_flows(self, request):
+        user = self.authenticate(request)
+        flows = [f for f in self.flows.values() if f["user_id"] == user["id"]]
+        if request.query.get("header_flows") == "true":
+            flows = [{k: f.get(k) for k in HEADER_FIELDS} for f in flows]
+        return 200, flows
+
+    async def add_flow(self, request):
+        user = self.authenticate(request)
+        return 201, self.create_flow(user, request.json())
+
+    async def upload_flows(self, request):
+        user = self.authenticate(request)
+        content = request.files().get("file")
+        if content is None:
+            raise HTTPError(422, "file is required")
+        try:
+            data = json.loads(content)
+        except ValueError:
+            raise HTTPError(422, "file is not valid JSON")
+        flows = data["flows"] if isinstance(data, dict) and "flows" in data else [data]
+        return 201, [self.create_flow(user, f, request.query.get("folder_id")) for f in flows]
+
+    async def batch_flows(self, request):
+        user = self.authenticate(request)
+        return 201, [self.create_flow(user, f) for f in (request.json() or {}).get("flows", [])]
+
+    async def patch_flow(self, request, flow_id):
+        flow = self.owned_flow(self.authenticate(request), flow_id)
+        flow.update({k: v for k, v in (request.json() or {}).items() if k not in ("id", "user_id")})
+        flow["updated_at"] = now_iso()
+        return 200, flow
+
+    async def delete_flow(self, request, flow_id):
+        self.owned_flow(self.authenticate(request), flow_id)
+        del self.flows[flow_id]
+        return 200, {"message": "Flow deleted successfully"}
+
+    async def run_flow(self, request, flow_id):
+        user = self.authenticate(request)
+        flow = self.owned_flow(user, flow_id)
+        body = request.json() or {}
+        text = body.get("input_value", "")
+        if request.query.get("stream") == "true":
+            # Same event sequence as Langflow: the stored user message, LLM tokens, then the end result.
+            tokens = [f"{text} " if i == 0 else f"tok{i} " for i in range(self.stream_tokens)]
+            events = [("add_message", {"sender": "User", "text": text})]
+            events += [("token", {"chunk": t, "id": flow_id}) for t in tokens]
+            events += [("end", {"result": {"session_id": body.get("session_id") or flow["id"], "text": "".join(tokens)}})]
+            sampler = self.latency.get("token")
+            return 200, EventStream(events, lambda event: sampler(self.rng) if sampler and event == "token" else 0.0)
+        return 200, {
+            "session_id": body.get("session_id") or flow["id"],
+            "outputs": [{"inputs": {"input_value": text},
+                         "outputs": [{"results": {"message": {"text": text}}, "component_display_name": "Chat Output"}]}],
+        }
+
+    # --- dispatch ---
+
+    def match(self, request):
+        path_known = False
+        for method, pattern, name, handler in self.routes:
+            m = pattern.match(request.path)
+            if m:
+                path_known = True
+                if method == request.method:
+                    return name, handler, m.groupdict()
+        return ("default", None, 405 if path_known else 404)
+
+    async def dispatch(self, request):
+        # Returns (status, payload), or None to drop the connection without answering.
+        name, handler, params = self.match(request)
+        if handler is None:
+            return params, {"detail": HTTPStatus(params).phrase}
+
+        rate, kind = self.failures.get(name, self.failures.get("default", (0.0, None)))
+        failing = rate and self.rng.random() < rate
+        sampler = self.latency.get(name, self.latency.get("default"))
+        delay_ms = sampler(self.rng) if sampler else 0.0
+
+        if failing and kind == "hang":
+            await asyncio.Event().wait()
+        if name == "run" and self.run_slots and not failing:
+            async with self.run_slots:
+                await asyncio.sleep(delay_ms / 1000)
+                return await self.call(handler, request, params)
+        await asyncio.sleep(delay_ms / 1000)
+        if failing:
+            return None if kind == "reset" else (int(kind), {"detail": "injected failure"})
+        return await self.call(handler, request, params)
+
+    async def call(self, handler, request, params):
+        try:
+            return await handler(request, **params)
+        except HTTPError as e:
+            return e.status, {"detail": e.detail}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                name = self.match(request)[0]
+                response = await self.dispatch(request)
+                if response is None:
+                    self.stats[(name, "reset")] += 1
+                    break
+                status, payload = response
+                self.stats[(name, status)] += 1
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                if isinstance(payload, EventStream):
+                    await payload.write(writer, keep_alive)
+                else:
+                    writer.write(encode_response(status, payload, keep_alive))
+                    await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(args):
+    stub = LangflowStub(args.latency, args.fail, args.run_workers, args.seed, args.stream_tokens)
+    server = await asyncio.start_server(stub.handle_connection, args.host, args.port, backlog=4096)
+    log(f"[STUB] Langflow stub listening on http://{args.host}:{args.port} "
+        f"(superuser '{SUPERUSER}', latency routes {sorted(args.latency) or '-'}, failures {sorted(args.fail) or '-'})")
+    async with server:
+        await server.serve_forever()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="In-memory Langflow API stub with latency and failure injection.")
+    parser.add_argument("--host", default=STUB_HOST)
+    parser.add_argument("--port", type=int, default=STUB_PORT)
+    parser.add_argument("--latency", action="append", default=[os.getenv("STUB_LATENCY", "")],
+                        help="ROUTE=DIST:params, repeatable or ';'-separated")
+    parser.add_argument("--fail", action="append", default=[os.getenv("STUB_FAIL", "")],
+                        help="ROUTE=RATE[:STATUS|reset|hang], repeatable or ';'-separated")
+    parser.add_argument("--run-workers", type=int, default=int(os.getenv("STUB_RUN_WORKERS", "0")),
+                        help="max concurrent /run requests, 0 = unlimited")
+    parser.add_argument("--stream-tokens", type=int, default=int(os.getenv("STUB_STREAM_TOKENS", "20")),
+                        help="token events per stream=true run; the 'token' latency route spaces them")
+    parser.add_argument("--seed", type=int, default=int(os.getenv("STUB_SEED", "1")))
+    args = parser.parse_args(argv)
+    try:
+        args.latency = parse_route_specs(args.latency, parse_distribution)
+        args.fail = parse_route_specs(args.fail, parse_failure)
+    except (argparse.ArgumentTypeError, ValueError, IndexError) as e:
+        parser.error(str(e))
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
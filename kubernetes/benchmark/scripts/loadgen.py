@@ -0,0 +1,285 @@
+import os
+import sys
+import json
+import math
+import time
+import asyncio
+import argparse
+from collections import Counter
+
+import httpx
+
+from histogram import LatencyHistogram
+
+# Async load generator for /api/v1/run/{flow_id}.
+#   closed: a fixed number of users, each sends its next request when the previous returns.
+#   open:   requests are started on a fixed arrival schedule whether or not earlier ones finished.
+#           Latency is measured from the *scheduled* start, so time spent queued behind a slow
+#           server (or a full client pool) is counted instead of hidden (coordinated omission).
+# With --stream the run endpoint is called with stream=true and the event stream is consumed as it
+# arrives: time to first byte, time to first token event, gaps between events and total duration are
+# recorded per request, which is what a chat user actually perceives.
+# latency_ms (and the histogram / .hgrm) covers successful requests only; failed requests that reached the
+# server or timed out go to error_latency_ms. A client_overload miss was never sent and is only counted.
+
+LANGFLOW_URL = os.getenv("LANGFLOW_URL", "http://langflow:7860").rstrip("/")
+DEFAULT_PAYLOAD = {"input_value": "benchmark_test", "input_type": "chat", "output_type": "chat", "tweaks": {}}
+
+
+def log(msg):
+    print(msg, file=sys.stderr, flush=True)
+
+
+class ClientOverload(Exception):
+    pass
+
+
+def classify(status=None, exc=None):
+    if exc is not None:
+        if isinstance(exc, ClientOverload):
+            return "client_overload"
+        if isinstance(exc, httpx.TimeoutException):
+            return "timeout"
+        if isinstance(exc, httpx.ConnectError):
+            return "connect_error"
+        if isinstance(exc, httpx.RemoteProtocolError):
+            return "connection_reset"
+        return type(exc).__name__
+    if status >= 500:
+        return "http_5xx"
+    if status == 429:
+        return "http_429"
+    if status >= 400:
+        return "http_4xx"
+    return None
+
+
+class RunStats:
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.error_histogram = LatencyHistogram()
+        self.status_codes = Counter()
+        self.errors = Counter()
+        self.completed = 0
+        self.ok = 0
+        self.started_at = None
+        # Successful completions per second since started_at, for run-to-run significance tests.
+        self.ok_per_second = Counter()
+        # Streaming only (all measured from the same start as the total latency).
+        self.ttfb = LatencyHistogram()
+        self.ttft = LatencyHistogram()
+        self.chunk_gaps = LatencyHistogram()
+        self.chunks = 0
+
+    def observe(self, latency_s, status=None, exc=None):
+        self.completed += 1
+        if status is not None:
+            self.status_codes[str(status)] += 1
+        error_class = classify(status, exc)
+        if error_class:
+            self.errors[error_class] += 1
+            if error_class != "client_overload":
+                self.error_histogram.record_seconds(latency_s)
+        else:
+            self.histogram.record_seconds(latency_s)
+            self.ok += 1
+            if self.started_at is not None:
+                self.ok_per_second[int(time.time() - self.started_at)] += 1
+
+
+async def send_one(client, url, payload, stats, scheduled_at=None, headers=None):
+    started = scheduled_at if scheduled_at is not None else time.perf_counter()
+    try:
+        resp = await client.post(url, json=payload, headers=headers)
+        await resp.aread()
+        stats.observe(time.perf_counter() - started, status=resp.status_code)
+    except httpx.HTTPError as e:
+        stats.observe(time.perf_counter() - started, exc=e)
+
+
+def stream_events(buffer):
+    # Langflow streams one JSON event per block, blocks separated by a blank line (SSE "data:" tolerated).
+    *events, rest = buffer.split(b"\n\n")
+    return [e for e in events if e.strip()], rest
+
+
+def event_type(raw):
+    text = raw.strip()
+    if text.startswith(b"data:"):
+        text = text[5:].strip()
+    try:
+        return json.loads(text).get("event")
+    except (ValueError, AttributeError):
+        return None
+
+
+async def send_one_stream(client, url, payload, stats, scheduled_at=None, headers=None):
+    started = scheduled_at if scheduled_at is not None else time.perf_counter()
+    try:
+        async with client.stream("POST", url, json=payload, headers=headers) as resp:
+            buffer = b""
+            first_byte = first_token = last_event = None
+            async for chunk in resp.aiter_bytes():
+                now = time.perf_counter()
+                if first_byte is None:
+                    first_byte = now
+                    stats.ttfb.record_seconds(now - started)
+                events, buffer = stream_events(buffer + chunk)
+                for raw in events:
+                    if last_event is not None:
+                        stats.chunk_gaps.record_seconds(now - last_event)
+                    last_event = now
+                    stats.chunks += 1
+                    if first_token is None and event_type(raw) == "token":
+                        first_token = now
+                        stats.ttft.record_seconds(now - started)
+            if buffer.strip():
+                stats.chunks += 1
+        stats.observe(time.perf_counter() - started, status=resp.status_code)
+    except httpx.HTTPError as e:
+        stats.observe(time.perf_counter() - started, exc=e)
+
+
+async def run_closed(client, url, payload, stats, concurrency, duration, send=send_one):
+    deadline = time.perf_counter() + duration
+
+    async def user():
+        while time.perf_counter() < deadline:
+            await send(client, url, payload, stats)
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+
+
+async def run_open(client, url, payload, stats, rate, duration, max_inflight, send=send_one):
+    interval = 1.0 / rate
+    started = time.perf_counter()
+    inflight = set()
+    n = 0
+    while True:
+        scheduled_at = started + n * interval
+        if scheduled_at - started >= duration:
+            break
+        delay = scheduled_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(inflight) >= max_inflight:
+            # The client itself is saturated; record the miss instead of silently pausing the schedule.
+            stats.observe(time.perf_counter() - scheduled_at, exc=ClientOverload())
+        else:
+            task = asyncio.create_task(send(client, url, payload, stats, scheduled_at))
+            inflight.add(task)
+            task.add_done_callback(inflight.discard)
+        n += 1
+    if inflight:
+        await asyncio.gather(*inflight)
+
+
+async def run_step(args):
+    url = f"{args.url}/api/v1/run/{args.flow_id}?stream={'true' if args.stream else 'false'}"
+    send = send_one_stream if args.stream else send_one
+    payload = json.loads(args.payload) if args.payload else DEFAULT_PAYLOAD
+    headers = {"x-api-key": args.api_key, "Content-Type": "application/json"}
+    pool_size = args.concurrency if args.mode == "closed" else args.max_inflight
+    limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+    stats = RunStats()
+
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=args.timeout) as client:
+        stats.started_at = time.time()
+        started = time.perf_counter()
+        if args.mode == "closed":
+            await run_closed(client, url, payload, stats, args.concurrency, args.duration, send)
+        else:
+            await run_open(client, url, payload, stats, args.rate, args.duration, args.max_inflight, send)
+        elapsed = time.perf_counter() - started
+
+    return stats, elapsed
+
+
+def summarize_stats(stats, elapsed, stream=False):
+    summary = {
+        "requests": stats.completed,
+        "ok": stats.ok,
+        "errors": dict(stats.errors),
+        "error_count": sum(stats.errors.values()),
+        "status_codes": dict(stats.status_codes),
+        "throughput_rps": round(stats.ok / elapsed, 3) if elapsed else 0.0,
+        "latency_ms": stats.histogram.summary_ms(),
+        "error_latency_ms": stats.error_histogram.summary_ms() if stats.error_histogram.total_count else None,
+        "stream": None,
+    }
+    if stream:
+        summary["stream"] = {
+            "ttfb_ms": stats.ttfb.summary_ms(),
+            "ttft_ms": stats.ttft.summary_ms() if stats.ttft.total_count else None,
+            "chunk_gap_ms": stats.chunk_gaps.summary_ms(),
+            "chunks_per_request": round(stats.chunks / stats.completed, 2) if stats.completed else 0.0,
+        }
+    return summary
+
+
+def build_report(args, stats, elapsed):
+    return {
+        "timestamp": time.time(),
+        "started_at": stats.started_at,
+        "label": args.label,
+        "replicas": args.replicas,
+        "mode": args.mode,
+        "concurrency": args.concurrency if args.mode == "closed" else None,
+        "target_rate": args.rate if args.mode == "open" else None,
+        "duration_s": round(elapsed, 3),
+        **summarize_stats(stats, elapsed, args.stream),
+        "ok_per_second": [stats.ok_per_second.get(i, 0) for i in range(math.ceil(elapsed))],
+        "histogram": stats.histogram.to_dict(),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Async load generator for the Langflow run endpoint.")
+    parser.add_argument("--url", default=LANGFLOW_URL)
+    parser.add_argument("--flow-id", required=True)
+    parser.add_argument("--api-key", required=True)
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--concurrency", type=int, default=50, help="closed mode: number of users")
+    parser.add_argument("--rate", type=float, default=50.0, help="open mode: arrivals per second")
+    parser.add_argument("--max-inflight", type=int, default=2000, help="open mode: client-side cap")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout, seconds")
+    parser.add_argument("--payload", default=None, help="JSON body, defaults to the benchmark chat input")
+    parser.add_argument("--stream", action="store_true", help="call with stream=true and time the event stream")
+    parser.add_argument("--label", default="")
+    parser.add_argument("--replicas", type=int, default=None)
+    parser.add_argument("--output", default=None, help="append the JSON report to this JSONL file")
+    parser.add_argument("--hgrm", default=None, help="write the HDR percentile distribution here")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    log(f"[LOADGEN] {args.mode} loop{' (streaming)' if args.stream else ''} against flow {args.flow_id} "
+        f"for {args.duration:.0f}s "
+        f"({'concurrency ' + str(args.concurrency) if args.mode == 'closed' else 'rate ' + str(args.rate) + '/s'})")
+
+    stats, elapsed = asyncio.run(run_step(args))
+    report = build_report(args, stats, elapsed)
+
+    if args.hgrm:
+        with open(args.hgrm, "w") as f:
+            f.write(stats.histogram.percentile_distribution())
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(json.dumps(report) + "\n")
+
+    lat = report["latency_ms"]
+    log(f"[LOADGEN] {report['requests']} requests, {report['throughput_rps']} ok/s, "
+        f"errors {report['errors'] or 0} | p50 {lat['p50']}ms p90 {lat['p90']}ms "
+        f"p99 {lat['p99']}ms p999 {lat['p999']}ms")
+    if report["stream"]:
+        st = report["stream"]
+        ttft = f"{st['ttft_ms']['p50']}/{st['ttft_ms']['p99']}ms" if st["ttft_ms"] else "-"
+        log(f"[LOADGEN] stream: ttfb p50/p99 {st['ttfb_ms']['p50']}/{st['ttfb_ms']['p99']}ms, ttft p50/p99 {ttft}, "
+            f"chunk gap p99 {st['chunk_gap_ms']['p99']}ms, {st['chunks_per_request']} chunks/request")
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import statistics
+
+import db_sampler
+from sweep import (
+    LANGFLOW_DEPLOYMENT,
+    WINDOWS_FILE,
+    current_replicas,
+    int_list,
+    load_kube_config,
+    pgbouncer_settings,
+    run_window,
+    scale,
+    set_pgbouncer_settings,
+)
+
+# PgBouncer pool tuner: short load probes against the run endpoint for every pool_mode x default_pool_size
+# candidate at each replica count, while SHOW POOLS (cl_waiting, maxwait) and pg_stat_activity are sampled.
+# A candidate is saturated when clients queue in PgBouncer (cl_waiting / maxwait over the limits), the run
+# errors, or Postgres runs more active backends than --pg-active-limit. Per replica count the recommendation
+# is the smallest unsaturated pool within --tolerance of the best unsaturated throughput, rendered as a Helm
+# values file for pgbouncer.pool.
+
+POOL_SETTINGS = ("POOL_MODE", "DEFAULT_POOL_SIZE", "MIN_POOL_SIZE")
+
+
+def log(msg):
+    print(msg, file=sys.stderr, flush=True)
+
+
+class PoolMonitor:
+    # Samples PgBouncer and Postgres on a fixed-rate schedule in a background thread.
+    def __init__(self, interval, label):
+        self.interval = interval
+        self.sampler = db_sampler.Sampler(db_sampler.parse_args(["--label", label, "--top-every", "0"]))
+        self.rows = []
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.loop, daemon=True)
+
+    def loop(self):
+        started = time.perf_counter()
+        n = 0
+        while not self.stop_event.is_set():
+            self.rows.append(self.sampler.sample())
+            n += 1
+            self.stop_event.wait(max(0.0, started + n * self.interval - time.perf_counter()))
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop_event.set()
+        self.thread.join()
+        self.sampler.close()
+
+
+def values(rows, key):
+    return [r[key] for r in rows if r.get(key) is not None]
+
+
+def mean_of(rows, key, digits=2):
+    found = values(rows, key)
+    return round(statistics.fmean(found), digits) if found else None
+
+
+def maxwait_ms(row):
+    # SHOW POOLS splits the oldest client wait into whole seconds and the microsecond remainder.
+    return row.get("pgb_maxwait", 0) * 1000.0 + row.get("pgb_maxwait_us", 0) / 1000.0
+
+
+def summarize_probe(report, rows):
+    waits = [maxwait_ms(r) for r in rows if r.get("pgb_maxwait") is not None]
+    return {
+        "throughput_rps": report["throughput_rps"],
+        "p50_ms": report["latency_ms"]["p50"],
+        "p99_ms": report["latency_ms"]["p99"],
+        "error_rate": round(report["error_count"] / report["requests"], 4) if report["requests"] else 0.0,
+        "cl_waiting_mean": mean_of(rows, "pgb_cl_waiting"),
+        "cl_waiting_max": max(values(rows, "pgb_cl_waiting"), default=None),
+        "maxwait_ms_max": round(max(waits), 1) if waits else None,
+        "avg_wait_ms_mean": mean_of(rows, "pgb_avg_wait_ms", 3),
+        "sv_active_max": max(values(rows, "pgb_sv_active"), default=None),
+        "pg_active_mean": mean_of(rows, "pg_active"),
+        "pg_active_max": max(values(rows, "pg_active"), default=None),
+        "samples": len(rows),
+    }
+
+
+def saturation(probe, args):
+    reasons = []
+    if probe["cl_waiting_mean"] is not None and probe["cl_waiting_mean"] > args.max_cl_waiting:
+        reasons.append("cl_waiting")
+    if probe["maxwait_ms_max"] is not None and probe["maxwait_ms_max"] > args.max_wait_ms:
+        reasons.append("maxwait")
+    if probe["error_rate"] > args.max_error_rate:
+        reasons.append("errors")
+    if args.pg_active_limit and probe["pg_active_max"] is not None and probe["pg_active_max"] >= args.pg_active_limit:
+        reasons.append("pg_active")
+    return reasons
+
+
+def recommend(probes, tolerance):
+    # Smallest unsaturated pool close to the best unsaturated throughput; modes keep their --modes order.
+    ok = [p for p in probes if not p["saturated"]]
+    if not ok:
+        best = max(probes, key=lambda p: p["throughput_rps"])
+        return {**best, "all_saturated": True}
+    best = max(p["throughput_rps"] for p in ok)
+    fits = [p for p in ok if p["throughput_rps"] >= (1 - tolerance) * best]
+    return {**min(fits, key=lambda p: (p["pool_size"], p["mode_rank"])), "all_saturated": False}
+
+
+def pool_settings(core, keys=POOL_SETTINGS):
+    current = pgbouncer_settings(core)
+    return {k: current[k] for k in keys if k in current}
+
+
+def render_values(rec, min_pool_size):
+    return (
+        f"# Generated by pool_tuner.py for {rec['replicas']} Langflow replica(s): {rec['throughput_rps']} ok/s, "
+        f"p99 {rec['p99_ms']}ms, cl_waiting {rec['cl_waiting_mean']}, maxwait {rec['maxwait_ms_max']}ms\n"
+        f"# helm upgrade tis-stack ./charts/tis-stack --reuse-values -f <this file>\n"
+        "pgbouncer:\n"
+        "  pool:\n"
+        f"    mode: {rec['mode']}\n"
+        f"    default_pool_size: {rec['pool_size']}\n"
+        f"    min_pool_size: {min(min_pool_size, rec['pool_size'])}\n"
+    )
+
+
+def probe(args, mode, pool_size, replicas):
+    label = f"pool-{mode}-{pool_size}-r{replicas}"
+    concurrency = replicas * args.users_per_replica
+    run_window(args, concurrency, args.warmup, f"{label}-warmup")
+    with PoolMonitor(args.interval, label) as monitor:
+        report = run_window(args, concurrency, args.measure, label, replicas,
+                            os.path.join(args.results_dir, WINDOWS_FILE))
+    result = {"mode": mode, "mode_rank": args.modes.index(mode), "pool_size": pool_size, "replicas": replicas,
+              "concurrency": concurrency, **summarize_probe(report, monitor.rows)}
+    result["saturated"] = saturation(result, args)
+    log(f"[POOL] {label}: {result['throughput_rps']} ok/s, p99 {result['p99_ms']}ms, "
+        f"cl_waiting {result['cl_waiting_mean']}, maxwait {result['maxwait_ms_max']}ms, "
+        f"pg active {result['pg_active_max']}{' SATURATED: ' + ','.join(result['saturated']) if result['saturated'] else ''}")
+    return result
+
+
+def print_table(recommendations):
+    log("=" * 78)
+    log(f"{'replicas':>8} {'mode':>12} {'pool':>6} {'ok/s':>10} {'p99 ms':>9} {'cl_wait':>8} {'maxwait':>8}  note")
+    for r in recommendations:
+        log(f"{r['replicas']:>8} {r['mode']:>12} {r['pool_size']:>6} {r['throughput_rps']:>10} {r['p99_ms']:>9} "
+            f"{r['cl_waiting_mean'] if r['cl_waiting_mean'] is not None else '-':>8} "
+            f"{r['maxwait_ms_max'] if r['maxwait_ms_max'] is not None else '-':>8}  "
+            f"{'every candidate saturated' if r['all_saturated'] else ''}")
+    log("=" * 78)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="PgBouncer pool_mode / default_pool_size tuner.")
+    parser.add_argument("--url", default=os.getenv("LANGFLOW_URL", "http://langflow:7860"))
+    parser.add_argument("--flow-id", required=True)
+    parser.add_argument("--api-key", required=True)
+    parser.add_argument("--payload", default=None)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--modes", default=os.getenv("POOL_TUNE_MODES") or "session,transaction",
+                        help="pool_mode candidates, the order breaks ties")
+    parser.add_argument("--pool-sizes", type=int_list, default=os.getenv("POOL_TUNE_SIZES") or "10 20 40 80")
+    parser.add_argument("--replicas", type=int_list, default=os.getenv("POOL_TUNE_REPLICAS") or "1 2 4")
+    parser.add_argument("--users-per-replica", type=int, default=int(os.getenv("USERS_PER_REPLICA") or "50"))
+    parser.add_argument("--warmup", type=float, default=10.0)
+    parser.add_argument("--measure", type=float, default=30.0, help="probe length, seconds")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between SHOW POOLS samples")
+    parser.add_argument("--max-cl-waiting", type=float, default=1.0, help="mean clients queued in PgBouncer")
+    parser.add_argument("--max-wait-ms", type=float, default=100.0, help="longest PgBouncer client wait")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--pg-active-limit", type=int, default=int(os.getenv("POOL_TUNE_PG_ACTIVE_LIMIT") or "0"),
+                        help="active Postgres backends treated as saturation, e.g. 2-3x the DB cores (0 = off)")
+    parser.add_argument("--tolerance", type=float, default=0.03, help="throughput within this fraction of the best")
+    parser.add_argument("--rollout-timeout", type=float, default=300.0)
+    parser.add_argument("--results-dir", default=os.getenv("RESULTS_DIR", "/app/results"))
+    args = parser.parse_args(argv)
+    args.modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    if any(m not in ("session", "transaction", "statement") for m in args.modes):
+        parser.error("--modes takes session, transaction and/or statement")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(args.results_dir, exist_ok=True)
+    apps, core = load_kube_config()
+    original = pool_settings(core)
+    original_replicas = current_replicas(apps, LANGFLOW_DEPLOYMENT)
+    min_pool_size = int(original.get("MIN_POOL_SIZE", 50))
+    log(f"[POOL] modes {args.modes} x pool sizes {args.pool_sizes} x replicas {args.replicas}, "
+        f"{args.users_per_replica} users per replica (current: {original})")
+
+    probes = []
+    try:
+        for mode in args.modes:
+            for pool_size in args.pool_sizes:
+                # min_pool_size above default_pool_size would pin the pool at its minimum.
+                set_pgbouncer_settings(apps, core, {"POOL_MODE": mode, "DEFAULT_POOL_SIZE": pool_size,
+                                                    "MIN_POOL_SIZE": min(min_pool_size, pool_size)},
+                                       args.rollout_timeout)
+                for replicas in args.replicas:
+                    scale(apps, LANGFLOW_DEPLOYMENT, replicas, args.rollout_timeout)
+                    probes.append(probe(args, mode, pool_size, replicas))
+    finally:
+        log("[POOL] Restoring original PgBouncer settings and replica count...")
+        if pool_settings(core, original) != original:
+            set_pgbouncer_settings(apps, core, original, args.rollout_timeout)
+        scale(apps, LANGFLOW_DEPLOYMENT, original_replicas, args.rollout_timeout)
+
+    recommendations = [recommend([p for p in probes if p["replicas"] == r], args.tolerance)
+                       for r in args.replicas if any(p["replicas"] == r for p in probes)]
+    print_table(recommendations)
+    for rec in recommendations:
+        path = os.path.join(args.results_dir, f"pgbouncer-values-r{rec['replicas']}.yaml")
+        with open(path, "w") as f:
+            f.write(render_values(rec, min_pool_size))
+        log(f"[POOL] {rec['replicas']} replica(s): pool_mode={rec['mode']} default_pool_size={rec['pool_size']} -> {path}")
+
+    report = {
+        "timestamp": time.time(),
+        "flow_id": args.flow_id,
+        "original": original,
+        "params": {k: v for k, v in vars(args).items() if k not in ("api_key", "payload")},
+        "probes": probes,
+        "recommendations": recommendations,
+    }
+    with open(os.path.join(args.results_dir, "pool-tune.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps({"recommendations": recommendations}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+import os
+import re
+import sys
+import json
+import math
+import time
+import sqlite3
+import hashlib
+import argparse
+import statistics
+
+from histogram import LatencyHistogram
+
+# Benchmark history in one SQLite file on the results volume.
+#   record:  store a run's loadgen reports (one row per replica step or measured window) keyed by git
+#            commit, chart values and mode. benchmark.sh records every mode that drives load: steps, sweep,
+#            cache_ab, citus_ab and pool_tune append their windows to the run's loadgen.jsonl, mix records
+#            its mix.json (a step per flow plus the total). cold_start measures pod startup, not load, and
+#            is only kept in its cold-start.json.
+#   list:    recent runs.
+#   compare: candidate vs baseline run of the same mode, step by step (replica count and label). Throughput is compared with Welch's t-test on
+#            the per-second ok counts loadgen records, error rates with a two-proportion z-test, and p99
+#            with distribution-free confidence intervals read off the stored latency histograms (order
+#            statistics), so a regression is only flagged when it is both significant and larger than
+#            --min-effect.
+
+RESULTS_ROOT = os.getenv("RESULTS_ROOT", "/app/results")
+RESULTS_STORE = os.getenv("RESULTS_STORE") or os.path.join(RESULTS_ROOT, "benchmarks.sqlite")
+# Chart values under a matching key (the --set credentials) are never stored, hashed or passed to the Job.
+SECRET_KEY = re.compile(os.getenv("CHART_VALUES_SECRET_KEYS", "password|secret|key|token|credential"), re.IGNORECASE)
+REDACTED = "<redacted>"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recorded_at REAL NOT NULL,
+    git_commit TEXT NOT NULL,
+    values_hash TEXT NOT NULL,
+    chart_values TEXT,
+    mode TEXT,
+    label TEXT,
+    run_dir TEXT
+);
+CREATE TABLE IF NOT EXISTS steps (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    replicas INTEGER,
+    label TEXT,
+    mode TEXT,
+    concurrency INTEGER,
+    target_rate REAL,
+    duration_s REAL,
+    requests INTEGER,
+    ok INTEGER,
+    error_count INTEGER,
+    throughput_rps REAL,
+    p50_ms REAL,
+    p90_ms REAL,
+    p99_ms REAL,
+    p999_ms REAL,
+    mean_ms REAL,
+    ok_per_second TEXT,
+    histogram TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_key ON runs (values_hash, git_commit);
+CREATE INDEX IF NOT EXISTS steps_run ON steps (run_id, replicas);
+"""
+
+
+def log(msg):
+    print(msg, file=sys.stderr, flush=True)
+
+
+def connect(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+    scrub_stored_values(conn)
+    return conn
+
+
+def redact(values):
+    if isinstance(values, dict):
+        return {k: REDACTED if SECRET_KEY.search(str(k)) else redact(v) for k, v in values.items()}
+    if isinstance(values, list):
+        return [redact(v) for v in values]
+    return values
+
+
+def values_key(raw):
+    # Same values in a different key order are the same configuration. Only the redacted values are kept,
+    # so the hash tracks tuning values and a rotated password does not split the history.
+    if not raw:
+        return "none", None
+    try:
+        canonical = json.dumps(redact(json.loads(raw)), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        # Not JSON, so nothing can be told apart from a secret: keep the hash only.
+        return hashlib.sha256(raw.strip().encode()).hexdigest()[:12], None
+    return hashlib.sha256(canonical.encode()).hexdigest()[:12], canonical
+
+
+def scrub_stored_values(conn):
+    # Runs recorded before values were redacted: redact them in place and re-key them to match new runs.
+    with conn:
+        for row in conn.execute("SELECT id, chart_values FROM runs WHERE chart_values IS NOT NULL").fetchall():
+            values_hash, canonical = values_key(row["chart_values"])
+            if canonical != row["chart_values"]:
+                conn.execute("UPDATE runs SET values_hash = ?, chart_values = ? WHERE id = ?",
+                             (values_hash, canonical, row["id"]))
+
+
+def read_reports(path):
+    # loadgen JSONL, or a traffic_mix report (one indented JSON document).
+    with open(path) as f:
+        text = f.read()
+    try:
+        doc = json.loads(text)
+    except ValueError:
+        doc = None
+    if isinstance(doc, dict) and "flows" in doc and "total" in doc:
+        label = doc.get("label") or "mix"
+        return ([{**r, "label": f"{label}-{name}"} for name, r in doc["flows"].items()]
+                + [{**doc["total"], "label": f"{label}-total"}])
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def record(conn, reports, git_commit, chart_values, mode, label, run_dir):
+    values_hash, canonical = values_key(chart_values)
+    with conn:
+        run_id = conn.execute(
+            "INSERT INTO runs (recorded_at, git_commit, values_hash, chart_values, mode, label, run_dir) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (time.time(), git_commit, values_hash, canonical, mode, label, run_dir)).lastrowid
+        for r in reports:
+            lat = r["latency_ms"]
+            conn.execute(
+                "INSERT INTO steps VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, r.get("replicas"), r.get("label"), r.get("mode"), r.get("concurrency"),
+                 r.get("target_rate"), r.get("duration_s"), r["requests"], r["ok"], r["error_count"],
+                 r["throughput_rps"], lat["p50"], lat["p90"], lat["p99"], lat["p999"], lat["mean"],
+                 json.dumps(r.get("ok_per_second") or []), json.dumps(r["histogram"]) if r.get("histogram") else None))
+    return run_id, values_hash
+
+
+def resolve_run(conn, ref, exclude=None, values_hash=None, mode=None):
+    # A run id, "latest", or a commit prefix (its latest run); optionally restricted to one values hash / mode.
+    where, params = [], []
+    if exclude is not None:
+        where.append("id <> ?")
+        params.append(exclude)
+    if values_hash is not None:
+        where.append("values_hash = ?")
+        params.append(values_hash)
+    if mode is not None:
+        where.append("mode = ?")
+        params.append(mode)
+    if ref.isdigit():
+        where.append("id = ?")
+        params.append(int(ref))
+    elif ref not in ("latest", "previous"):
+        where.append("git_commit LIKE ?")
+        params.append(ref + "%")
+    sql = f"SELECT * FROM runs {'WHERE ' + ' AND '.join(where) if where else ''} ORDER BY id DESC LIMIT 1"
+    return conn.execute(sql, params).fetchone()
+
+
+def steps_by_key(conn, run_id):
+    # Steps mode labels its steps by replica count; the other modes label each measured window.
+    return {(row["replicas"], row["label"]): row
+            for row in conn.execute("SELECT * FROM steps WHERE run_id = ?", (run_id,))}
+
+
+def two_sided_p(z):
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+def welch(a, b):
+    # Normal approximation of Welch's t-test; a step gives tens of one-second samples.
+    if len(a) < 2 or len(b) < 2:
+        return None
+    se = math.sqrt(statistics.variance(a) / len(a) + statistics.variance(b) / len(b))
+    if se == 0:
+        return 1.0 if statistics.fmean(a) == statistics.fmean(b) else 0.0
+    return two_sided_p((statistics.fmean(b) - statistics.fmean(a)) / se)
+
+
+def proportion_p(errors_a, n_a, errors_b, n_b):
+    if not n_a or not n_b:
+        return None
+    pooled = (errors_a + errors_b) / (n_a + n_b)
+    se = math.sqrt(pooled * (1 - pooled) * (1 / n_a + 1 / n_b))
+    if se == 0:
+        return 1.0
+    return two_sided_p((errors_b / n_b - errors_a / n_a) / se)
+
+
+def quantile_ci(hist, q, z):
+    # Ranks n*q -/+ z*sqrt(n*q*(1-q)) bound the q-quantile regardless of the latency distribution.
+    n = hist.total_count
+    if not n:
+        return None
+    half = z * math.sqrt(n * q * (1 - q))
+    lo = max(1, math.floor(n * q - half))
+    hi = min(n, math.ceil(n * q + half))
+    return hist.value_at_percentile(100.0 * lo / n) / 1000.0, hist.value_at_percentile(100.0 * hi / n) / 1000.0
+
+
+def trim(samples):
+    # The first and last seconds are partial (ramp-up, drain).
+    return samples[1:-1] if len(samples) > 4 else samples
+
+
+def pct(base, other):
+    return round((other - base) / base * 100.0, 2) if base else None
+
+
+def error_rate(step):
+    return step["error_count"] / step["requests"] if step["requests"] else 0.0
+
+
+def compare_step(base, cand, alpha, min_effect, z):
+    tput_p = welch(trim(json.loads(base["ok_per_second"])), trim(json.loads(cand["ok_per_second"])))
+    tput_pct = pct(base["throughput_rps"], cand["throughput_rps"])
+    err_p = proportion_p(base["error_count"], base["requests"], cand["error_count"], cand["requests"])
+
+    base_ci = cand_ci = None
+    if base["histogram"] and cand["histogram"]:
+        base_ci = quantile_ci(LatencyHistogram.from_dict(json.loads(base["histogram"])), 0.99, z)
+        cand_ci = quantile_ci(LatencyHistogram.from_dict(json.loads(cand["histogram"])), 0.99, z)
+    p99_pct = pct(base["p99_ms"], cand["p99_ms"])
+
+    regressions = []
+    if tput_p is not None and tput_p < alpha and tput_pct is not None and tput_pct <= -min_effect:
+        regressions.append("throughput")
+    if base_ci and cand_ci and cand_ci[0] > base_ci[1] and p99_pct is not None and p99_pct >= min_effect:
+        regressions.append("p99")
+    if err_p is not None and err_p < alpha and error_rate(cand) > error_rate(base):
+        regressions.append("errors")
+    return {
+        "replicas": cand["replicas"],
+        "label": cand["label"],
+        "throughput_rps": [base["throughput_rps"], cand["throughput_rps"]],
+        "throughput_pct": tput_pct,
+        "throughput_p": None if tput_p is None else round(tput_p, 5),
+        "p99_ms": [base["p99_ms"], cand["p99_ms"]],
+        "p99_pct": p99_pct,
+        "p99_ci_ms": [base_ci, cand_ci],
+        "error_rate": [round(error_rate(base), 5), round(error_rate(cand), 5)],
+        "error_p": None if err_p is None else round(err_p, 5),
+        "regressions": regressions,
+    }
+
+
+def compare(conn, baseline, candidate, alpha, min_effect):
+    z = statistics.NormalDist().inv_cdf(1 - alpha / 2)
+    base_steps, cand_steps = steps_by_key(conn, baseline["id"]), steps_by_key(conn, candidate["id"])
+    return [compare_step(base_steps[k], cand_steps[k], alpha, min_effect, z)
+            for k in sorted(set(base_steps) & set(cand_steps), key=lambda k: (k[0] is None, k[0] or 0, k[1] or ""))]
+
+
+def cmd_record(args, conn):
+    try:
+        reports = read_reports(args.input)
+    except OSError as e:
+        sys.exit(f"[STORE] Cannot read {args.input}: {e}")
+    if not reports:
+        sys.exit(f"[STORE] No reports in {args.input}")
+    chart_values = args.chart_values
+    if args.chart_values_file and os.path.exists(args.chart_values_file):
+        with open(args.chart_values_file) as f:
+            chart_values = f.read()
+    run_id, values_hash = record(conn, reports, args.commit, chart_values, args.mode, args.label, args.run_dir)
+    log(f"[STORE] Recorded run {run_id} ({len(reports)} step(s)) commit {args.commit} values {values_hash}")
+    print(json.dumps({"run_id": run_id, "values_hash": values_hash}))
+
+
+def cmd_list(args, conn):
+    rows = conn.execute(
+        "SELECT r.id, r.recorded_at, r.git_commit, r.values_hash, r.mode, r.label, count(s.run_id) AS steps, "
+        "max(s.throughput_rps) AS best_rps FROM runs r LEFT JOIN steps s ON s.run_id = r.id "
+        "GROUP BY r.id ORDER BY r.id DESC LIMIT ?", (args.limit,)).fetchall()
+    print(f"{'run':>5} {'recorded (UTC)':<20} {'commit':<12} {'values':<12} {'mode':<8} {'steps':>5} {'best rps':>9}  label")
+    for r in rows:
+        recorded = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(r["recorded_at"]))
+        print(f"{r['id']:>5} {recorded:<20} {r['git_commit'][:12]:<12} {r['values_hash']:<12} {r['mode'] or '':<8} "
+              f"{r['steps']:>5} {r['best_rps'] or 0:>9.1f}  {r['label'] or ''}")
+
+
+def cmd_compare(args, conn):
+    candidate = resolve_run(conn, args.candidate)
+    if candidate is None:
+        sys.exit(f"[STORE] No run matches candidate '{args.candidate}'")
+    # By default the baseline is the previous run of the same mode with the same chart values.
+    baseline = resolve_run(conn, args.baseline, exclude=candidate["id"],
+                           values_hash=None if args.any_values else candidate["values_hash"], mode=candidate["mode"])
+    if baseline is None:
+        log(f"[STORE] No baseline run for '{args.baseline}' (mode {candidate['mode']}, values "
+            f"{candidate['values_hash']}), nothing to compare")
+        return 0
+    if baseline["values_hash"] != candidate["values_hash"]:
+        log(f"[STORE] Note: comparing across chart values {baseline['values_hash']} -> {candidate['values_hash']}")
+
+    results = compare(conn, baseline, candidate, args.alpha, args.min_effect)
+    log(f"[STORE] Run {candidate['id']} ({candidate['git_commit'][:12]}) vs baseline run {baseline['id']} "
+        f"({baseline['git_commit'][:12]}), alpha {args.alpha}, min effect {args.min_effect}%")
+    print(f"{'replicas':>8} {'step':<24} {'rps base->cand':>20} {'rps %':>8} {'p':>8} {'p99 base->cand ms':>22} "
+          f"{'p99 %':>8}  flags")
+    for r in results:
+        rps = f"{r['throughput_rps'][0]:.1f}->{r['throughput_rps'][1]:.1f}"
+        p99 = f"{r['p99_ms'][0]:.1f}->{r['p99_ms'][1]:.1f}"
+        p = "-" if r["throughput_p"] is None else f"{r['throughput_p']:.3f}"
+        print(f"{r['replicas'] if r['replicas'] is not None else '-':>8} {(r['label'] or '-')[:24]:<24} {rps:>20} {r['throughput_pct'] or 0:>+8.1f} "
+              f"{p:>8} {p99:>22} {r['p99_pct'] or 0:>+8.1f}  {'REGRESSION: ' + ','.join(r['regressions']) if r['regressions'] else 'ok'}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"baseline": dict(baseline), "candidate": dict(candidate), "steps": results}, f, indent=2)
+    regressed = [r for r in results if r["regressions"]]
+    if regressed:
+        log(f"[STORE] {len(regressed)} step(s) regressed")
+    return 1 if regressed and args.fail_on_regression else 0
+
+
+def cmd_redact_values(args):
+    # Used by `make run-benchmark` before the values leave the workstation.
+    raw = sys.stdin.read().strip()
+    print(values_key(raw)[1] or "{}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark result history and regression comparison.")
+    parser.add_argument("--db", default=RESULTS_STORE)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="store a run's loadgen reports")
+    rec.add_argument("--input", required=True, help="loadgen JSONL (one report per step / window) or mix.json")
+    rec.add_argument("--commit", default=os.getenv("GIT_COMMIT") or "unknown")
+    rec.add_argument("--chart-values", default=None, help="chart values as JSON")
+    rec.add_argument("--chart-values-file", default=os.getenv("CHART_VALUES_FILE"),
+                     help="chart values JSON file (mounted from the benchmark-chart-values ConfigMap)")
+    rec.add_argument("--mode", default=os.getenv("BENCHMARK_MODE") or "steps")
+    rec.add_argument("--label", default=os.getenv("BENCHMARK_LABEL", ""))
+    rec.add_argument("--run-dir", default=os.getenv("RESULTS_DIR"))
+
+    lst = sub.add_parser("list", help="show recent runs")
+    lst.add_argument("--limit", type=int, default=20)
+
+    cmp_ = sub.add_parser("compare", help="flag regressions of a run against a baseline")
+    cmp_.add_argument("--candidate", default="latest", help="run id, commit prefix or 'latest'")
+    cmp_.add_argument("--baseline", default="previous", help="run id, commit prefix or 'previous'")
+    cmp_.add_argument("--any-values", action="store_true", help="allow a baseline with different chart values")
+    cmp_.add_argument("--alpha", type=float, default=0.01, help="significance level")
+    cmp_.add_argument("--min-effect", type=float, default=5.0, help="smallest change in %% worth flagging")
+    cmp_.add_argument("--fail-on-regression", action="store_true", help="exit 1 when a step regressed")
+    cmp_.add_argument("--output", default=None, help="write the comparison as JSON")
+
+    sub.add_parser("redact-values", help="read chart values JSON on stdin, print it with secrets redacted")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "redact-values":
+        return cmd_redact_values(args)
+    conn = connect(args.db)
+    try:
+        handler = {"record": cmd_record, "list": cmd_list, "compare": cmd_compare}[args.command]
+        sys.exit(handler(args, conn) or 0)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+import io
+import os
+import sys
+import json
+import itertools
+import time
+import uuid
+import random
+import argparse
+import datetime
+
+import psycopg2
+
+from db_sampler import PG_DB, PG_HOST, PG_PASSWORD, PG_PORT, PG_USER
+
+# Synthetic tenant data for DB-scale benchmarks: users, projects (folders), flows, API keys, messages,
+# transactions and vertex builds, generated lazily and streamed into Postgres with COPY over a single
+# connection. Row counts are per scale unit, so --scale 10 looks like a tenant ten times the size of
+# --scale 1. Only columns the running Langflow version has are written; NOT NULL columns it added later
+# get a type default. Seeded users are prefixed (SEED_PREFIX) so a re-run can find and replace them.
+
+SEED_PREFIX = os.getenv("SEED_PREFIX", "seed_")
+COPY_BUFFER = 1 << 20
+
+# Rows per scale unit (users) and per parent row (everything else).
+DEFAULT_COUNTS = {
+    "users": 100,
+    "projects_per_user": 3,
+    "flows_per_user": 20,
+    "api_keys_per_user": 2,
+    "messages_per_flow": 50,
+    "transactions_per_flow": 40,
+    "builds_per_flow": 10,
+}
+
+# Children first: the order rows are removed in, reversed for loading.
+SEED_TABLES = ("message", "transaction", "vertex_build", "apikey", "flow", "folder", "user")
+
+
+def log(msg):
+    print(msg, file=sys.stderr, flush=True)
+
+
+def copy_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        value = "t" if value else "f"
+    elif isinstance(value, (dict, list)):
+        value = json.dumps(value, separators=(",", ":"))
+    elif isinstance(value, datetime.datetime):
+        value = value.isoformat()
+    else:
+        value = str(value)
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class RowStream(io.RawIOBase):
+    # File-like view over a row generator in COPY text format, so nothing is materialised up front.
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+        self.buffer = b""
+        self.count = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        parts, length = [self.buffer], len(self.buffer)
+        while size < 0 or length < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            line = ("\t".join(copy_value(row.get(c)) for c in self.columns) + "\n").encode()
+            parts.append(line)
+            length += len(line)
+            self.count += 1
+        data = b"".join(parts)
+        if size < 0:
+            size = len(data)
+        chunk, self.buffer = data[:size], data[size:]
+        return chunk
+
+
+class Generator:
+    def __init__(self, args, columns, enums):
+        self.args = args
+        self.columns = columns
+        self.enums = enums
+        self.rng = random.Random(args.seed)
+        self.now = datetime.datetime.now(datetime.timezone.utc)
+        self.user_ids = []
+        self.folder_ids = {}
+        self.flow_ids = []
+
+    def uuid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def past(self):
+        return self.now - datetime.timedelta(seconds=self.rng.uniform(0, self.args.history_days * 86400))
+
+    def fill(self, table, row):
+        # NOT NULL columns without a server default that this generator does not know about.
+        for name, (nullable, default, data_type, udt) in self.columns[table].items():
+            if name in row or nullable == "YES" or default is not None:
+                continue
+            if data_type == "boolean":
+                row[name] = False
+            elif data_type in ("integer", "bigint", "smallint", "numeric", "double precision", "real"):
+                row[name] = 0
+            elif data_type in ("json", "jsonb"):
+                row[name] = {}
+            elif data_type.startswith("timestamp"):
+                row[name] = self.now
+            elif data_type == "uuid":
+                row[name] = self.uuid()
+            elif data_type == "USER-DEFINED" and self.enums.get(udt):
+                row[name] = self.enums[udt][0]
+            else:
+                row[name] = ""
+        return row
+
+    def flow_graph(self):
+        nodes = [{
+            "id": f"Node-{i}",
+            "type": "genericNode",
+            "position": {"x": i * 320, "y": self.rng.randint(0, 600)},
+            "data": {"id": f"Node-{i}", "type": "Prompt", "node": {
+                "template": {"template": {"value": "x" * self.rng.randint(50, 400), "type": "str"}},
+                "description": "synthetic node", "base_classes": ["Message"],
+            }},
+        } for i in range(self.args.flow_nodes)]
+        edges = [{"id": f"edge-{i}", "source": f"Node-{i}", "target": f"Node-{i + 1}"}
+                 for i in range(self.args.flow_nodes - 1)]
+        return {"nodes": nodes, "edges": edges, "viewport": {"x": 0, "y": 0, "zoom": 1}}
+
+    def users(self):
+        for n in range(self.args.users):
+            user_id = self.uuid()
+            self.user_ids.append(user_id)
+            yield self.fill("user", {
+                "id": user_id,
+                "username": f"{SEED_PREFIX}{n:06d}",
+                # Not a valid hash on purpose: seeded users exist for their data, not to log in.
+                "password": "!",
+                "is_active": True,
+                "is_superuser": False,
+                "create_at": self.past(),
+                "updated_at": self.now,
+            })
+
+    def folders(self):
+        for user_id in self.user_ids:
+            for n in range(self.args.projects_per_user):
+                folder_id = self.uuid()
+                self.folder_ids.setdefault(user_id, []).append(folder_id)
+                yield self.fill("folder", {
+                    "id": folder_id,
+                    "name": f"Project {n + 1}",
+                    "description": "seeded project",
+                    "user_id": user_id,
+                })
+
+    def flows(self):
+        for user_id in self.user_ids:
+            folders = self.folder_ids.get(user_id) or [None]
+            for n in range(self.args.flows_per_user):
+                flow_id = self.uuid()
+                self.flow_ids.append(flow_id)
+                yield self.fill("flow", {
+                    "id": flow_id,
+                    "name": f"Flow {n + 1}",
+                    "description": "seeded flow",
+                    "data": self.flow_graph(),
+                    "user_id": user_id,
+                    "folder_id": folders[n % len(folders)],
+                    "updated_at": self.past(),
+                    "is_component": False,
+                    "tags": [],
+                    "access_type": "PRIVATE",
+                })
+
+    def api_keys(self):
+        for user_id in self.user_ids:
+            for n in range(self.args.api_keys_per_user):
+                yield self.fill("apikey", {
+                    "id": self.uuid(),
+                    "name": f"seed key {n + 1}",
+                    "api_key": f"sk-{self.uuid()}",
+                    "user_id": user_id,
+                    "created_at": self.past(),
+                    "total_uses": self.rng.randint(0, 10000),
+                    "is_active": True,
+                })
+
+    def messages(self):
+        for flow_id in self.flow_ids:
+            sessions = [self.uuid() for _ in range(max(1, self.args.messages_per_flow // 10))]
+            for n in range(self.args.messages_per_flow):
+                user_turn = n % 2 == 0
+                yield self.fill("message", {
+                    "id": self.uuid(),
+                    "timestamp": self.past(),
+                    "sender": "User" if user_turn else "Machine",
+                    "sender_name": "User" if user_turn else "AI",
+                    "session_id": sessions[n % len(sessions)],
+                    "text": "lorem ipsum " * self.rng.randint(2, 60),
+                    "files": [],
+                    "error": False,
+                    "edit": False,
+                    "properties": {},
+                    "category": "message",
+                    "content_blocks": [],
+                    "flow_id": flow_id,
+                })
+
+    def transactions(self):
+        for flow_id in self.flow_ids:
+            for n in range(self.args.transactions_per_flow):
+                yield self.fill("transaction", {
+                    "id": self.uuid(),
+                    "timestamp": self.past(),
+                    "vertex_id": f"Node-{n % self.args.flow_nodes}",
+                    "target_id": f"Node-{(n + 1) % self.args.flow_nodes}",
+                    "inputs": {"input_value": "benchmark"},
+                    "outputs": {"message": "ok"},
+                    "status": "success",
+                    "flow_id": flow_id,
+                })
+
+    def builds(self):
+        for flow_id in self.flow_ids:
+            for n in range(self.args.builds_per_flow):
+                yield self.fill("vertex_build", {
+                    "build_id": self.uuid(),
+                    "id": f"Node-{n % self.args.flow_nodes}",
+                    "timestamp": self.past(),
+                    "data": {"results": {}},
+                    "artifacts": {},
+                    "params": "",
+                    "valid": True,
+                    "flow_id": flow_id,
+                })
+
+
+def connect(args):
+    return psycopg2.connect(host=args.pg_host, port=args.pg_port, dbname=args.pg_db, user=args.pg_user,
+                            password=args.pg_password, application_name="seed_data", connect_timeout=5)
+
+
+def table_columns(conn):
+    with conn.cursor() as cur:
+        cur.execute("""SELECT table_name, column_name, is_nullable, column_default, data_type, udt_name
+                       FROM information_schema.columns
+                       WHERE table_schema = 'public' AND table_name = ANY(%s)""", (list(SEED_TABLES),))
+        columns = {}
+        for table, name, nullable, default, data_type, udt in cur.fetchall():
+            columns.setdefault(table, {})[name] = (nullable, default, data_type, udt)
+        cur.execute("""SELECT t.typname, array_agg(e.enumlabel ORDER BY e.enumsortorder)
+                       FROM pg_type t JOIN pg_enum e ON e.enumtypid = t.oid GROUP BY t.typname""")
+        enums = dict(cur.fetchall())
+    return columns, enums
+
+
+def seeded_users(conn):
+    with conn.cursor() as cur:
+        cur.execute('SELECT count(*) FROM "user" WHERE username LIKE %s', (SEED_PREFIX.replace("_", "\\_") + "%",))
+        return cur.fetchone()[0]
+
+
+def remove_seed(conn, columns):
+    pattern = SEED_PREFIX.replace("_", "\\_") + "%"
+    users = 'SELECT id FROM "user" WHERE username LIKE %s'
+    flows = f"SELECT id FROM flow WHERE user_id IN ({users})"
+    with conn, conn.cursor() as cur:
+        for table in SEED_TABLES:
+            if table not in columns:
+                continue
+            if "flow_id" in columns[table]:
+                cur.execute(f'DELETE FROM "{table}" WHERE flow_id IN ({flows})', (pattern,))
+            elif table == "user":
+                cur.execute('DELETE FROM "user" WHERE username LIKE %s', (pattern,))
+            else:
+                cur.execute(f'DELETE FROM "{table}" WHERE user_id IN ({users})', (pattern,))
+            log(f"[SEED] Removed {cur.rowcount} seeded row(s) from {table}")
+
+
+def copy_rows(conn, table, rows):
+    # Every row of a table carries the same keys; columns left out keep their server default.
+    first = next(rows, None)
+    if first is None:
+        return {"rows": 0, "seconds": 0.0}
+    names = list(first)
+    stream = RowStream(itertools.chain([first], rows), names)
+    column_list = ", ".join(f'"{n}"' for n in names)
+    started = time.perf_counter()
+    with conn, conn.cursor() as cur:
+        cur.copy_expert(f'COPY "{table}" ({column_list}) FROM STDIN', stream, size=COPY_BUFFER)
+    seconds = time.perf_counter() - started
+    log(f"[SEED] {table}: {stream.count} row(s) in {seconds:.2f}s ({stream.count / seconds if seconds else 0:.0f} rows/s)")
+    return {"rows": stream.count, "seconds": round(seconds, 3)}
+
+
+def table_sizes(conn, tables):
+    with conn.cursor() as cur:
+        cur.execute("""SELECT relname, pg_total_relation_size(c.oid), reltuples::bigint
+                       FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+                       WHERE n.nspname = 'public' AND relname = ANY(%s)""", (list(tables),))
+        return {name: {"bytes": size, "estimated_rows": rows} for name, size, rows in cur.fetchall()}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-load a synthetic large tenant into the Langflow database.")
+    parser.add_argument("--scale", type=float, default=float(os.getenv("SEED_SCALE") or "1"),
+                        help=f"multiplier on the per-unit user count (1 = {DEFAULT_COUNTS['users']} users)")
+    for key, value in DEFAULT_COUNTS.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, default=value)
+    parser.add_argument("--flow-nodes", type=int, default=8, help="nodes per generated flow graph")
+    parser.add_argument("--history-days", type=float, default=90.0, help="spread timestamps over this many days")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="replace seeded data even if it already matches --scale")
+    parser.add_argument("--remove", action="store_true", help="only remove previously seeded data")
+    parser.add_argument("--pg-host", default=PG_HOST)
+    parser.add_argument("--pg-port", type=int, default=PG_PORT)
+    parser.add_argument("--pg-db", default=PG_DB)
+    parser.add_argument("--pg-user", default=PG_USER)
+    parser.add_argument("--pg-password", default=PG_PASSWORD)
+    parser.add_argument("--results-dir", default=os.getenv("RESULTS_DIR", "/app/results"))
+    args = parser.parse_args(argv)
+    args.users = max(1, round(args.users * args.scale))
+    args.flow_nodes = max(1, args.flow_nodes)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    conn = connect(args)
+    columns, enums = table_columns(conn)
+    missing = [t for t in SEED_TABLES if t not in columns]
+    if missing:
+        log(f"[SEED] Tables not in this Langflow version, skipped: {', '.join(missing)}")
+
+    existing = seeded_users(conn)
+    if args.remove or existing and (args.reset or existing != args.users):
+        remove_seed(conn, columns)
+    if args.remove:
+        conn.close()
+        return
+    if existing == args.users and not args.reset:
+        log(f"[SEED] {existing} seeded user(s) already present at scale {args.scale}, nothing to do (--reset to reload)")
+        conn.close()
+        return
+
+    log(f"[SEED] Scale {args.scale}: {args.users} users x {args.flows_per_user} flows, "
+        f"{args.messages_per_flow} messages / {args.transactions_per_flow} transactions per flow")
+    gen = Generator(args, columns, enums)
+    plan = [("user", gen.users), ("folder", gen.folders), ("flow", gen.flows), ("apikey", gen.api_keys),
+             ("message", gen.messages), ("transaction", gen.transactions), ("vertex_build", gen.builds)]
+
+    started = time.perf_counter()
+    loaded = {}
+    try:
+        for table, rows in plan:
+            if table in columns:
+                # Parents must exist for the id lists children reference, so a skipped table still runs its generator.
+                loaded[table] = copy_rows(conn, table, (
+                    {k: v for k, v in row.items() if k in columns[table]} for row in rows()))
+            else:
+                for _ in rows():
+                    pass
+        # Fresh statistics, otherwise the planner keeps treating the tables as empty.
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            for table in loaded:
+                cur.execute(f'ANALYZE "{table}"')
+        sizes = table_sizes(conn, loaded)
+    finally:
+        conn.close()
+
+    seconds = time.perf_counter() - started
+    total = sum(t["rows"] for t in loaded.values())
+    report = {
+        "timestamp": time.time(),
+        "scale": args.scale,
+        "seconds": round(seconds, 3),
+        "rows_total": total,
+        "tables": {t: {**loaded[t], **sizes.get(t, {})} for t in loaded},
+    }
+    os.makedirs(args.results_dir, exist_ok=True)
+    with open(os.path.join(args.results_dir, "seed.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    log(f"[SEED] Loaded {total} row(s) in {seconds:.1f}s ({total / seconds if seconds else 0:.0f} rows/s)")
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
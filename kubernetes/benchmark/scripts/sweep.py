@@ -0,0 +1,305 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import datetime
+import statistics
+
+from kubernetes import client, config
+
+import loadgen
+
+# Replica x concurrency x PgBouncer pool-size sweep driven through the Kubernetes API.
+# For every (pool size, replicas) configuration the concurrency is ramped up; each level is warmed
+# up until throughput is steady, then measured. Per configuration the report marks the throughput
+# knee (where extra users stop buying throughput) and the latency cliff (where p99 blows up or errors
+# appear), which is what deployment and pool sizing should be based on.
+
+NAMESPACE = os.getenv("BENCH_NAMESPACE", "default")
+LANGFLOW_DEPLOYMENT = os.getenv("LANGFLOW_DEPLOYMENT", "langflow")
+PGBOUNCER_DEPLOYMENT = os.getenv("PGBOUNCER_DEPLOYMENT", "pgbouncer")
+PGBOUNCER_CONFIGMAP = os.getenv("PGBOUNCER_CONFIGMAP", "pgbouncer-config")
+# Measured windows, next to the mode's own report in the run directory.
+WINDOWS_FILE = "loadgen.jsonl"
+
+
+def log(msg):
+    print(msg, file=sys.stderr, flush=True)
+
+
+def int_list(value):
+    return [int(v) for v in str(value).replace(",", " ").split() if v]
+
+
+# --- Kubernetes ---
+
+def load_kube_config():
+    try:
+        config.load_incluster_config()
+    except config.ConfigException:
+        config.load_kube_config()
+    return client.AppsV1Api(), client.CoreV1Api()
+
+
+def wait_rollout(apps, name, replicas, timeout, namespace=NAMESPACE):
+    # Same condition as `kubectl rollout status`: the new generation is observed and fully available.
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        dep = apps.read_namespaced_deployment_status(name, namespace)
+        st = dep.status
+        if (st.observed_generation or 0) >= dep.metadata.generation \
+                and (st.updated_replicas or 0) == replicas \
+                and (st.available_replicas or 0) == replicas \
+                and (st.replicas or 0) == replicas:
+            return True
+        time.sleep(2)
+    return False
+
+
+def scale(apps, name, replicas, timeout, namespace=NAMESPACE):
+    log(f"[SWEEP] Scaling {name} to {replicas} replica(s)...")
+    apps.patch_namespaced_deployment_scale(name, namespace, {"spec": {"replicas": replicas}})
+    if not wait_rollout(apps, name, replicas, timeout, namespace):
+        raise RuntimeError(f"{name} did not reach {replicas} ready replicas within {timeout:.0f}s")
+
+
+def restart(apps, name, timeout, namespace=NAMESPACE):
+    # What `kubectl rollout restart` does: bump a pod template annotation.
+    stamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    patch = {"spec": {"template": {"metadata": {"annotations": {"kubectl.kubernetes.io/restartedAt": stamp}}}}}
+    dep = apps.patch_namespaced_deployment(name, namespace, patch)
+    if not wait_rollout(apps, name, dep.spec.replicas, timeout, namespace):
+        raise RuntimeError(f"{name} restart did not finish within {timeout:.0f}s")
+
+
+def current_replicas(apps, name, namespace=NAMESPACE):
+    return apps.read_namespaced_deployment(name, namespace).spec.replicas
+
+
+def pgbouncer_settings(core, namespace=NAMESPACE):
+    return dict(core.read_namespaced_config_map(PGBOUNCER_CONFIGMAP, namespace).data)
+
+
+def current_pool_size(core, namespace=NAMESPACE):
+    return int(pgbouncer_settings(core, namespace)["DEFAULT_POOL_SIZE"])
+
+
+def set_pgbouncer_settings(apps, core, settings, timeout, namespace=NAMESPACE):
+    # PgBouncer reads its settings from the ConfigMap at start; Langflow is restarted as well so
+    # its SQLAlchemy pool does not keep connections to the old PgBouncer pod.
+    log(f"[SWEEP] Setting PgBouncer {', '.join(f'{k}={v}' for k, v in settings.items())}...")
+    core.patch_namespaced_config_map(PGBOUNCER_CONFIGMAP, namespace, {"data": {k: str(v) for k, v in settings.items()}})
+    restart(apps, PGBOUNCER_DEPLOYMENT, timeout, namespace)
+    restart(apps, LANGFLOW_DEPLOYMENT, timeout, namespace)
+
+
+def set_pool_size(apps, core, size, timeout, namespace=NAMESPACE):
+    set_pgbouncer_settings(apps, core, {"DEFAULT_POOL_SIZE": size}, timeout, namespace)
+
+
+# --- Load ---
+
+def run_window(args, concurrency, duration, label, replicas=None, output=None):
+    # output: append the report to this JSONL, the same loadgen.jsonl steps mode writes, so the measured
+    # windows of every mode can go into the results store (results_store.py record).
+    lg_args = loadgen.parse_args([
+        "--url", args.url, "--flow-id", args.flow_id, "--api-key", args.api_key,
+        "--mode", "closed", "--concurrency", str(concurrency), "--duration", str(duration),
+        "--timeout", str(args.timeout), "--label", label,
+    ] + (["--replicas", str(replicas)] if replicas is not None else [])
+        + (["--payload", args.payload] if args.payload else []) + (["--stream"] if args.stream else []))
+    stats, elapsed = asyncio.run(loadgen.run_step(lg_args))
+    report = loadgen.build_report(lg_args, stats, elapsed)
+    if output:
+        with open(output, "a") as f:
+            f.write(json.dumps(report) + "\n")
+    return report
+
+
+def warm_up(args, concurrency, label):
+    # Steady state: the last `steady_windows` throughput samples vary by less than `steady_cv`.
+    samples = []
+    started = time.perf_counter()
+    while time.perf_counter() - started < args.warmup_max:
+        report = run_window(args, concurrency, args.window, f"{label}-warmup")
+        samples.append(report["throughput_rps"])
+        recent = samples[-args.steady_windows:]
+        if len(recent) == args.steady_windows:
+            mean = statistics.fmean(recent)
+            cv = statistics.pstdev(recent) / mean if mean else 0.0
+            if cv <= args.steady_cv:
+                return True, round(time.perf_counter() - started, 1), round(cv, 4)
+    return False, round(time.perf_counter() - started, 1), None
+
+
+def measure_point(args, replicas, pool_size, concurrency):
+    label = f"r{replicas}-p{pool_size}-c{concurrency}"
+    steady, warmup_s, cv = warm_up(args, concurrency, label)
+    if not steady:
+        log(f"[SWEEP] {label}: no steady state after {warmup_s}s of warm-up, measuring anyway")
+    report = run_window(args, concurrency, args.measure, label, replicas,
+                        os.path.join(os.path.dirname(args.output) or ".", WINDOWS_FILE))
+    lat = report["latency_ms"]
+    point = {
+        "concurrency": concurrency,
+        "throughput_rps": report["throughput_rps"],
+        "p50_ms": lat["p50"],
+        "p99_ms": lat["p99"],
+        "error_rate": round(report["error_count"] / report["requests"], 4) if report["requests"] else 0.0,
+        "ttfb_p99_ms": report["stream"]["ttfb_ms"]["p99"] if report["stream"] else None,
+        "steady": steady,
+        "warmup_s": warmup_s,
+        "steady_cv": cv,
+        "report": report,
+    }
+    log(f"[SWEEP] {label}: {point['throughput_rps']} ok/s, p50 {point['p50_ms']}ms p99 {point['p99_ms']}ms, "
+        f"errors {point['error_rate']:.2%}")
+    return point
+
+
+# --- Analysis ---
+
+def find_knee(points, min_gain):
+    # Throughput knee: last level whose step up still bought at least `min_gain` of the ideal linear
+    # gain (throughput per user at the first level times users added). Past it, users only queue.
+    if not points:
+        return None
+    base = points[0]
+    per_user = base["throughput_rps"] / base["concurrency"] if base["concurrency"] else 0.0
+    knee = base
+    for prev, cur in zip(points, points[1:]):
+        ideal = per_user * (cur["concurrency"] - prev["concurrency"])
+        gain = cur["throughput_rps"] - prev["throughput_rps"]
+        if ideal <= 0 or gain < min_gain * ideal:
+            break
+        knee = cur
+    return {"concurrency": knee["concurrency"], "throughput_rps": knee["throughput_rps"], "p99_ms": knee["p99_ms"]}
+
+
+def find_cliff(points, p99_factor, max_error_rate):
+    # Latency cliff: first level where p99 exceeds `p99_factor` x the p99 at the lowest level, or errors appear.
+    if not points:
+        return None
+    base_p99 = points[0]["p99_ms"] or 0.0
+    for p in points:
+        if p["error_rate"] > max_error_rate:
+            return {"concurrency": p["concurrency"], "reason": "errors", "error_rate": p["error_rate"], "p99_ms": p["p99_ms"]}
+        if base_p99 and p["p99_ms"] > p99_factor * base_p99:
+            return {"concurrency": p["concurrency"], "reason": "p99", "error_rate": p["error_rate"], "p99_ms": p["p99_ms"]}
+    return None
+
+
+def sweep_config(args, replicas, pool_size):
+    points = []
+    for users in args.users_per_replica:
+        points.append(measure_point(args, replicas, pool_size, replicas * users))
+        # One level past the cliff is enough to show it; further levels just hammer a saturated system.
+        cliff = find_cliff(points, args.cliff_p99_factor, args.cliff_error_rate)
+        if cliff and cliff["concurrency"] < points[-1]["concurrency"]:
+            break
+    peak = max(points, key=lambda p: p["throughput_rps"])
+    return {
+        "replicas": replicas,
+        "pool_size": pool_size,
+        "knee": find_knee(points, args.knee_gain),
+        "cliff": find_cliff(points, args.cliff_p99_factor, args.cliff_error_rate),
+        "peak": {"concurrency": peak["concurrency"], "throughput_rps": peak["throughput_rps"], "p99_ms": peak["p99_ms"]},
+        "points": points,
+    }
+
+
+def recommend(configs):
+    # Cheapest configuration whose knee throughput is within 5% of the best knee seen.
+    with_knee = [c for c in configs if c["knee"]]
+    if not with_knee:
+        return None
+    best = max(c["knee"]["throughput_rps"] for c in with_knee)
+    fits = [c for c in with_knee if c["knee"]["throughput_rps"] >= 0.95 * best]
+    choice = min(fits, key=lambda c: (c["replicas"], c["pool_size"]))
+    return {"replicas": choice["replicas"], "pool_size": choice["pool_size"],
+            "concurrency": choice["knee"]["concurrency"], "throughput_rps": choice["knee"]["throughput_rps"]}
+
+
+def print_table(configs):
+    log("=" * 78)
+    log(f"{'replicas':>8} {'pool':>6} {'knee users':>11} {'knee rps':>10} {'peak rps':>10} {'cliff users':>12} {'cliff':>8}")
+    for c in configs:
+        knee, cliff = c["knee"] or {}, c["cliff"] or {}
+        log(f"{c['replicas']:>8} {c['pool_size']:>6} {knee.get('concurrency', '-'):>11} "
+            f"{knee.get('throughput_rps', '-'):>10} {c['peak']['throughput_rps']:>10} "
+            f"{cliff.get('concurrency', '-'):>12} {cliff.get('reason', '-'):>8}")
+    log("=" * 78)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replica / concurrency / pool-size sweep with knee detection.")
+    parser.add_argument("--url", default=loadgen.LANGFLOW_URL)
+    parser.add_argument("--flow-id", required=True)
+    parser.add_argument("--api-key", required=True)
+    parser.add_argument("--payload", default=None)
+    parser.add_argument("--stream", action="store_true", help="measure with stream=true (adds TTFB per point)")
+    parser.add_argument("--replicas", type=int_list, default=os.getenv("SWEEP_REPLICAS") or "1 2 4 8 16")
+    parser.add_argument("--users-per-replica", type=int_list, default=os.getenv("SWEEP_USERS_PER_REPLICA") or "5 10 25 50 100")
+    parser.add_argument("--pool-sizes", type=int_list, default=os.getenv("SWEEP_POOL_SIZES", ""),
+                        help="PgBouncer default_pool_size values (default: keep the current one)")
+    parser.add_argument("--window", type=float, default=5.0, help="warm-up window, seconds")
+    parser.add_argument("--steady-windows", type=int, default=3, help="windows that must agree for steady state")
+    parser.add_argument("--steady-cv", type=float, default=0.05, help="max coefficient of variation of throughput")
+    parser.add_argument("--warmup-max", type=float, default=60.0, help="give up waiting for steady state after N seconds")
+    parser.add_argument("--measure", type=float, default=float(os.getenv("LOAD_DURATION", "30")), help="measured window, seconds")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--knee-gain", type=float, default=0.25, help="min fraction of linear throughput gain per step")
+    parser.add_argument("--cliff-p99-factor", type=float, default=3.0)
+    parser.add_argument("--cliff-error-rate", type=float, default=0.01)
+    parser.add_argument("--rollout-timeout", type=float, default=300.0)
+    parser.add_argument("--output", default=os.path.join(os.getenv("RESULTS_DIR", "/app/results"), "sweep.json"))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    apps, core = load_kube_config()
+    original_replicas = current_replicas(apps, LANGFLOW_DEPLOYMENT)
+    original_pool = current_pool_size(core)
+    pool_sizes = args.pool_sizes or [original_pool]
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+
+    log(f"[SWEEP] replicas {args.replicas} x users/replica {args.users_per_replica} x pool sizes {pool_sizes}")
+    report = {
+        "started_at": time.time(),
+        "flow_id": args.flow_id,
+        "params": {k: v for k, v in vars(args).items() if k not in ("api_key", "payload")},
+        "configs": [],
+    }
+    try:
+        for pool_size in pool_sizes:
+            if pool_size != current_pool_size(core):
+                set_pool_size(apps, core, pool_size, args.rollout_timeout)
+            for replicas in args.replicas:
+                scale(apps, LANGFLOW_DEPLOYMENT, replicas, args.rollout_timeout)
+                report["configs"].append(sweep_config(args, replicas, pool_size))
+    finally:
+        log("[SWEEP] Restoring original pool size and replica count...")
+        if current_pool_size(core) != original_pool:
+            set_pool_size(apps, core, original_pool, args.rollout_timeout)
+        scale(apps, LANGFLOW_DEPLOYMENT, original_replicas, args.rollout_timeout)
+
+    report["finished_at"] = time.time()
+    report["recommendation"] = recommend(report["configs"])
+    print_table(report["configs"])
+    if report["recommendation"]:
+        r = report["recommendation"]
+        log(f"[SWEEP] Recommended: {r['replicas']} replica(s), pool size {r['pool_size']}, "
+            f"~{r['concurrency']} concurrent users for {r['throughput_rps']} ok/s")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    log(f"[SWEEP] Report written to {args.output}")
+    print(json.dumps({k: v for k, v in report.items() if k != "configs"} |
+                     {"configs": [{k: v for k, v in c.items() if k != "points"} for c in report["configs"]]}))
+
+
+if __name__ == "__main__":
+    main()
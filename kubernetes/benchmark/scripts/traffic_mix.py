@@ -0,0 +1,259 @@
+import os
+import re
+import sys
+import json
+import math
+import time
+import random
+import string
+import asyncio
+import argparse
+
+import httpx
+
+import loadgen
+from loadgen import RunStats, send_one, send_one_stream, summarize_stats
+
+# Mixed-workload load: several flows at once, driven by a traffic profile (JSON, see profiles/).
+# Each flow gets its own open-loop arrival process with a share of the total rate given by its weight,
+# shaped by an arrival pattern (steady, burst, diurnal), and its own payload template. Every request is
+# timed from its scheduled start as in loadgen.py, and latency / errors are reported per flow and per
+# time window, so one flow's bursts show up as latency on the others when replicas and pools are shared.
+#
+# {"rate": 40, "duration": 120, "pattern": {"type": "steady"},
+#  "flows": [{"name": "chatbot", "flow": "Demo Chatbot", "weight": 5, "stream": true, "sessions": 50,
+#             "payload": {"input_value": "question $n", "session_id": "$session"},
+#             "pattern": {"type": "burst", "period": 60, "length": 10, "factor": 4}}]}
+#
+# "flow" is a flow name resolved over the API, "flow_id" an id; "api_key" (optional) overrides
+# --api-key for flows owned by another user. ${VAR} in those flow fields (name, flow, flow_id, api_key)
+# is expanded from the environment; payloads are left alone, their $n / $session are per-request values.
+
+DEFAULT_PROFILE = os.getenv("TRAFFIC_PROFILE") or "/app/profiles/mixed.json"
+ENV_FIELDS = ("name", "flow", "flow_id", "api_key")
+ENV_REF = re.compile(r"\$\{(\w+)\}")
+
+
+def log(msg):
+    print(msg, file=sys.stderr, flush=True)
+
+
+def pattern_factor(pattern, t):
+    kind = pattern.get("type", "steady")
+    if kind == "steady":
+        return 1.0
+    if kind == "burst":
+        # `factor` x the rate for the first `length` seconds of every `period`.
+        in_burst = t % pattern.get("period", 60) < pattern.get("length", 10)
+        return pattern.get("factor", 4.0) if in_burst else pattern.get("base", 1.0)
+    if kind == "diurnal":
+        # One compressed "day" per `period`: from the trough at t=0 up to the peak at period/2 and back.
+        low, high = pattern.get("trough", 0.2), pattern.get("peak", 1.0)
+        return low + (high - low) * (1 - math.cos(2 * math.pi * t / pattern.get("period", 300))) / 2
+    raise ValueError(f"unknown arrival pattern '{kind}', expected steady, burst or diurnal")
+
+
+def render(template, values):
+    if isinstance(template, str):
+        return string.Template(template).safe_substitute(values)
+    if isinstance(template, dict):
+        return {k: render(v, values) for k, v in template.items()}
+    if isinstance(template, list):
+        return [render(v, values) for v in template]
+    return template
+
+
+class FlowStats(RunStats):
+    # RunStats plus one RunStats per time window, keyed by completion time.
+    def __init__(self, origin, window):
+        super().__init__()
+        self.origin = origin
+        self.window = window
+        self.windows = {}
+
+    def observe(self, latency_s, status=None, exc=None):
+        super().observe(latency_s, status, exc)
+        index = int((time.perf_counter() - self.origin) // self.window)
+        self.windows.setdefault(index, RunStats()).observe(latency_s, status, exc)
+
+
+def expand_env(value):
+    # An unset variable expands to nothing.
+    return ENV_REF.sub(lambda m: os.environ.get(m.group(1), ""), value)
+
+
+def load_profile(path, args):
+    with open(path) as f:
+        profile = json.load(f)
+    flows = profile.get("flows") or []
+    if not flows:
+        raise ValueError(f"{path}: profile has no flows")
+    for i, flow in enumerate(flows):
+        for key in ENV_FIELDS:
+            if isinstance(flow.get(key), str):
+                flow[key] = expand_env(flow[key])
+        flow.setdefault("name", flow.get("flow") or flow.get("flow_id") or f"flow-{i + 1}")
+        if not flow.get("flow") and not flow.get("flow_id"):
+            raise ValueError(f"{path}: flow '{flow['name']}' needs 'flow' (name) or 'flow_id'")
+        if flow.get("weight", 1) <= 0:
+            raise ValueError(f"{path}: flow '{flow['name']}' needs a positive weight")
+        # No key, or a ${VAR} that is not set, means "use --api-key".
+        if not flow.get("api_key"):
+            flow["api_key"] = args.api_key
+        pattern_factor(flow.setdefault("pattern", profile.get("pattern") or {"type": "steady"}), 0)
+        flow.setdefault("stream", profile.get("stream", args.stream))
+        flow.setdefault("payload", profile.get("payload") or loadgen.DEFAULT_PAYLOAD)
+    if len({f["name"] for f in flows}) != len(flows):
+        raise ValueError(f"{path}: flow names must be unique")
+    return profile, flows
+
+
+def resolve_flow_ids(base_url, flows, timeout):
+    # Names are looked up with each flow's own key, since a key only sees its owner's flows.
+    by_key = {}
+    for flow in flows:
+        if not flow.get("flow_id"):
+            by_key.setdefault(flow["api_key"], []).append(flow)
+    for api_key, pending in by_key.items():
+        resp = httpx.get(f"{base_url}/api/v1/flows/", headers={"x-api-key": api_key},
+                         params={"get_all": "true", "header_flows": "true"}, timeout=timeout)
+        resp.raise_for_status()
+        ids = {f.get("name"): f.get("id") for f in resp.json() if isinstance(f, dict)}
+        missing = [f["flow"] for f in pending if f["flow"] not in ids]
+        if missing:
+            raise ValueError(f"flows not found for this API key: {', '.join(missing)}")
+        for flow in pending:
+            flow["flow_id"] = ids[flow["flow"]]
+
+
+async def drive_flow(client, base_url, flow, rate, duration, stats, inflight, max_inflight, rng):
+    url = f"{base_url}/api/v1/run/{flow['flow_id']}?stream={'true' if flow['stream'] else 'false'}"
+    send = send_one_stream if flow["stream"] else send_one
+    headers = {"x-api-key": flow["api_key"]}
+    sessions = [f"{flow['name']}-{i}" for i in range(max(1, flow.get("sessions", 1)))]
+
+    started = time.perf_counter()
+    t, n = 0.0, 0
+    while t < duration:
+        scheduled_at = started + t
+        delay = scheduled_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(inflight) >= max_inflight:
+            stats.observe(time.perf_counter() - scheduled_at, exc=loadgen.ClientOverload())
+        else:
+            payload = render(flow["payload"], {"n": n, "flow": flow["name"], "session": rng.choice(sessions)})
+            task = asyncio.create_task(send(client, url, payload, stats, scheduled_at, headers))
+            inflight.add(task)
+            task.add_done_callback(inflight.discard)
+        n += 1
+        # Next arrival from the current rate; a near-zero rate is clamped so the schedule keeps moving.
+        t += 1.0 / max(rate * pattern_factor(flow["pattern"], t), 0.01)
+    return n
+
+
+async def run_mix(args, flows, rate, duration):
+    total_weight = sum(f.get("weight", 1) for f in flows)
+    limits = httpx.Limits(max_connections=args.max_inflight, max_keepalive_connections=args.max_inflight)
+    inflight = set()
+    rng = random.Random(args.seed)
+    async with httpx.AsyncClient(headers={"Content-Type": "application/json"}, limits=limits,
+                                 timeout=args.timeout) as client:
+        origin = time.perf_counter()
+        stats = {f["name"]: FlowStats(origin, args.window) for f in flows}
+        for s in stats.values():
+            s.started_at = time.time()
+        scheduled = await asyncio.gather(*(
+            drive_flow(client, args.url, f, rate * f.get("weight", 1) / total_weight, duration,
+                       stats[f["name"]], inflight, args.max_inflight, random.Random(rng.random()))
+            for f in flows))
+        if inflight:
+            await asyncio.gather(*inflight)
+        elapsed = time.perf_counter() - origin
+    return stats, dict(zip((f["name"] for f in flows), scheduled)), elapsed
+
+
+def window_summary(stats):
+    lat = stats.histogram.summary_ms()
+    return {"requests": stats.completed, "ok": stats.ok, "errors": sum(stats.errors.values()),
+            "p50_ms": lat["p50"], "p99_ms": lat["p99"]}
+
+
+def build_report(args, profile_path, flows, stats, scheduled, elapsed):
+    total = RunStats()
+    for s in stats.values():
+        total.histogram.merge(s.histogram)
+        total.error_histogram.merge(s.error_histogram)
+        total.status_codes.update(s.status_codes)
+        total.errors.update(s.errors)
+        total.completed += s.completed
+        total.ok += s.ok
+    windows = sorted({i for s in stats.values() for i in s.windows})
+    return {
+        "timestamp": time.time(),
+        "label": args.label,
+        "profile": profile_path,
+        "duration_s": round(elapsed, 3),
+        "total": summarize_stats(total, elapsed),
+        "flows": {
+            f["name"]: {
+                "flow_id": f["flow_id"],
+                "weight": f.get("weight", 1),
+                "pattern": f["pattern"],
+                "scheduled": scheduled[f["name"]],
+                **summarize_stats(stats[f["name"]], elapsed, f["stream"]),
+            } for f in flows
+        },
+        "timeline": [
+            {"t": i * args.window, "flows": {
+                name: window_summary(s.windows[i]) for name, s in stats.items() if i in s.windows
+            }} for i in windows
+        ],
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Weighted multi-flow load against the Langflow run endpoint.")
+    parser.add_argument("--url", default=loadgen.LANGFLOW_URL)
+    parser.add_argument("--profile", default=DEFAULT_PROFILE)
+    parser.add_argument("--api-key", required=True, help="default key for flows without their own")
+    parser.add_argument("--rate", type=float, default=None, help="total arrivals per second (overrides the profile)")
+    parser.add_argument("--duration", type=float, default=None, help="seconds (overrides the profile)")
+    parser.add_argument("--stream", action="store_true", help="default for flows that do not set 'stream'")
+    parser.add_argument("--max-inflight", type=int, default=2000, help="client-side cap across all flows")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--window", type=float, default=10.0, help="seconds per timeline window")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", default="mix")
+    parser.add_argument("--output", default=None, help="write the JSON report here")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.url = args.url.rstrip("/")
+    try:
+        profile, flows = load_profile(args.profile, args)
+        resolve_flow_ids(args.url, flows, args.timeout)
+    except (OSError, ValueError, httpx.HTTPError) as e:
+        sys.exit(f"[MIX] {e}")
+    rate = args.rate or profile.get("rate", 20.0)
+    duration = args.duration or profile.get("duration", 60.0)
+    log(f"[MIX] {len(flows)} flow(s) at {rate}/s total for {duration:.0f}s: " +
+        ", ".join(f"{f['name']} x{f.get('weight', 1)} ({f['pattern'].get('type', 'steady')})" for f in flows))
+
+    stats, scheduled, elapsed = asyncio.run(run_mix(args, flows, rate, duration))
+    report = build_report(args, args.profile, flows, stats, scheduled, elapsed)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    for name, r in report["flows"].items():
+        lat = r["latency_ms"]
+        log(f"[MIX] {name}: {r['requests']} requests, {r['throughput_rps']} ok/s, errors {r['errors'] or 0} | "
+            f"p50 {lat['p50']}ms p99 {lat['p99']}ms")
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -145,6 +145,8 @@ export PG_MAX_WORKER_PROCESSES="${CPU_CORES}"
 export PG_MAX_PARALLEL_WORKERS="${CPU_CORES}"
 
 # 2. PgBouncer Calculation
+# Static starting point; `make run-benchmark-pool-tune` measures pool_mode / pool size per replica count
+# and renders helm values for pgbouncer.pool (see kubernetes/benchmark/scripts/pool_tuner.py).
 # OLD: CPU * 3 -> Too low for laptops (16*3=48).
 # NEW: CPU * 10. Allows more concurrency while trusting the OS scheduler.
 # 16 Cores -> 160 Pool Size. 64 Cores -> 640 Pool Size (capped below).
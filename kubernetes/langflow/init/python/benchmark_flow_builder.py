@@ -0,0 +1,218 @@
+# Builds benchmark flows of configurable size and shape:
+#   chain:  TextInput -> W1 -> W2 -> ... -> Wn -> TextOutput
+#   fanout: TextInput -> `width` parallel chains of work nodes -> Join -> TextOutput
+# Every work node does the same configurable unit of work (sleep / cpu / io / none); the join only
+# collects its inputs, so a flow of `nodes` work nodes does exactly `nodes` units whatever its shape.
+# The TextInput carries a payload of `payload_bytes`, so run latency can be compared across graph
+# size and shape with everything else held constant.
+
+TOPOLOGIES = ("chain", "fanout")
+WORK_KINDS = ("none", "sleep", "cpu", "io")
+
+X_STEP = 400
+Y_STEP = 200
+
+TEXT_INPUT_CODE = "from langflow.base.io.text import TextComponent\nfrom langflow.io import MultilineInput, Output\nfrom langflow.schema.message import Message\n\n\nclass TextInputComponent(TextComponent):\n    display_name = \"Text Input\"\n    description = \"Get text inputs from the Playground.\"\n    icon = \"type\"\n    name = \"TextInput\"\n\n    inputs = [\n        MultilineInput(\n            name=\"input_value\",\n            display_name=\"Text\",\n            info=\"Text to be passed as input.\",\n        ),\n    ]\n    outputs = [\n        Output(display_name=\"Message\", name=\"text\", method=\"text_response\"),\n    ]\n\n    def text_response(self) -> Message:\n        return Message(\n            text=self.input_value,\n        )\n"
+
+TEXT_OUTPUT_CODE = "from langflow.base.io.text import TextComponent\nfrom langflow.io import MultilineInput, Output\nfrom langflow.schema.message import Message\n\n\nclass TextOutputComponent(TextComponent):\n    display_name = \"Text Output\"\n    description = \"Display a text output in the Playground.\"\n    icon = \"type\"\n    name = \"TextOutput\"\n\n    inputs = [\n        MultilineInput(\n            name=\"input_value\",\n            display_name=\"Text\",\n            info=\"Text to be passed as output.\",\n        ),\n    ]\n    outputs = [\n        Output(display_name=\"Message\", name=\"text\", method=\"text_response\"),\n    ]\n\n    def text_response(self) -> Message:\n        message = Message(\n            text=self.input_value,\n        )\n        self.status = self.input_value\n        return message\n"
+
+# Work body shared by the work and join components; WORK_KIND / WORK_MS are baked in per flow.
+WORK_CODE_TEMPLATE = '''import os
+import time
+import hashlib
+import tempfile
+from langflow.custom import Component
+from langflow.io import {input_class}, Output
+from langflow.schema.message import Message
+
+WORK_KIND = {work_kind!r}
+WORK_MS = {work_ms!r}
+
+
+def do_work(text):
+    if WORK_KIND == "sleep":
+        time.sleep(WORK_MS / 1000.0)
+    elif WORK_KIND == "cpu":
+        deadline = time.perf_counter() + WORK_MS / 1000.0
+        digest = text.encode()
+        while time.perf_counter() < deadline:
+            digest = hashlib.sha256(digest).digest()
+    elif WORK_KIND == "io":
+        deadline = time.perf_counter() + WORK_MS / 1000.0
+        block = (text or " ").encode()
+        with tempfile.TemporaryFile() as f:
+            while True:
+                f.write(block)
+                f.flush()
+                os.fsync(f.fileno())
+                f.seek(0)
+                f.read()
+                if time.perf_counter() >= deadline:
+                    break
+
+
+class {class_name}(Component):
+    display_name = {display_name!r}
+    description = "Synthetic benchmark node."
+    icon = "timer"
+    name = {component_name!r}
+
+    inputs = [
+        {input_class}(name="input_value", display_name="Text"{list_arg}),
+    ]
+    outputs = [
+        Output(display_name="Message", name="text", method="text_response"),
+    ]
+
+    def text_response(self) -> Message:
+        values = self.input_value if isinstance(self.input_value, list) else [self.input_value]
+        texts = [v.text if isinstance(v, Message) else str(v or "") for v in values]
+        text = texts[0] if texts else ""
+        do_work(text)
+        self.status = f"{{WORK_KIND}} {{WORK_MS}}ms, {{len(values)}} input(s)"
+        return Message(text=text)
+'''
+
+
+def _message_output():
+    return [{"types": ["Message"], "selected": "Message", "name": "text", "display_name": "Message", "method": "text_response"}]
+
+
+def _code_field(code):
+    return {"type": "code", "show": True, "value": code, "name": "code", "advanced": True}
+
+
+def _node(node_id, node_type, x, y, template, display_name, description, icon, edited=False):
+    node = {
+        "template": {"_type": "Component", **template},
+        "description": description,
+        "icon": icon,
+        "base_classes": ["Message"],
+        "display_name": display_name,
+        "outputs": _message_output(),
+    }
+    if edited:
+        node["edited"] = True
+    return {
+        "id": node_id,
+        "type": "genericNode",
+        "position": {"x": x, "y": y},
+        "data": {"node": node, "type": node_type, "id": node_id},
+    }
+
+
+def text_input_node(node_id, x, y, value=""):
+    return _node(node_id, "TextInput", x, y, {
+        "code": _code_field(TEXT_INPUT_CODE),
+        "input_value": {"trace_as_input": True, "multiline": True, "required": False, "show": True, "name": "input_value", "value": value, "display_name": "Text", "advanced": False, "input_types": ["Message"], "type": "str"},
+    }, "Text Input", "Get text inputs from the Playground.", "type")
+
+
+def text_output_node(node_id, x, y):
+    return _node(node_id, "TextOutput", x, y, {
+        "code": _code_field(TEXT_OUTPUT_CODE),
+        "input_value": {"multiline": True, "required": False, "show": True, "name": "input_value", "value": "", "display_name": "Text", "advanced": False, "input_types": ["Message"], "type": "str"},
+    }, "Text Output", "Display a text output in the Playground.", "type", edited=True)
+
+
+def work_node(node_id, x, y, work, work_ms, join=False):
+    component_name = "BenchmarkJoin" if join else "BenchmarkWork"
+    code = WORK_CODE_TEMPLATE.format(
+        input_class="MessageInput" if join else "MultilineInput",
+        list_arg=", is_list=True" if join else "",
+        work_kind=work,
+        work_ms=work_ms,
+        class_name=f"{component_name}Component",
+        display_name="Benchmark Join" if join else "Benchmark Work",
+        component_name=component_name,
+    )
+    input_field = {"required": False, "show": True, "name": "input_value", "value": "", "display_name": "Text", "advanced": False, "input_types": ["Message"], "type": "str"}
+    if join:
+        input_field.update({"list": True, "type": "other", "value": []})
+    else:
+        input_field["multiline"] = True
+    return _node(node_id, component_name, x, y, {
+        "code": _code_field(code),
+        "input_value": input_field,
+    }, "Benchmark Join" if join else "Benchmark Work", "Synthetic benchmark node.", "timer", edited=True)
+
+
+def edge(source, target):
+    source_id, source_type = source["id"], source["data"]["type"]
+    target_id = target["id"]
+    target_field = target["data"]["node"]["template"]["input_value"]
+    return {
+        "id": f"edge-{source_id}-{target_id}",
+        "source": source_id,
+        "target": target_id,
+        "data": {
+            "sourceHandle": {"dataType": source_type, "id": source_id, "name": "text", "output_types": ["Message"]},
+            "targetHandle": {"fieldName": "input_value", "id": target_id, "inputTypes": ["Message"], "type": target_field["type"]},
+        },
+    }
+
+
+def make_payload_text(payload_bytes):
+    # Printable and deterministic, so runs with the same size are byte-identical.
+    alphabet = "abcdefghijklmnopqrstuvwxyz0123456789"
+    return "".join(alphabet[(i * 7) % len(alphabet)] for i in range(max(payload_bytes, 0)))
+
+
+def build_benchmark_flow(name, nodes=1, topology="chain", width=2, work="sleep", work_ms=500, payload_bytes=16):
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Unknown topology '{topology}', expected one of {TOPOLOGIES}")
+    if work not in WORK_KINDS:
+        raise ValueError(f"Unknown work kind '{work}', expected one of {WORK_KINDS}")
+    nodes = max(int(nodes), 0)
+    width = max(int(width), 1)
+
+    source = text_input_node("TextInput-1", 0, 0, make_payload_text(payload_bytes))
+    graph_nodes = [source]
+    graph_edges = []
+
+    if topology == "chain" or nodes == 0:
+        previous = source
+        for i in range(nodes):
+            node = work_node(f"BenchmarkWork-{i + 1}", X_STEP * (i + 1), 0, work, work_ms)
+            graph_nodes.append(node)
+            graph_edges.append(edge(previous, node))
+            previous = node
+        last_column = nodes
+        tails = [previous]
+    else:
+        # Spread the work nodes over `width` branches; the join node does no work of its own.
+        branches = min(width, nodes)
+        base, extra = divmod(nodes, branches)
+        depth = base + (1 if extra else 0)
+        tails = []
+        for b in range(branches):
+            previous = source
+            for d in range(base + (1 if b < extra else 0)):
+                node = work_node(f"BenchmarkWork-{b + 1}-{d + 1}", X_STEP * (d + 1), Y_STEP * b, work, work_ms)
+                graph_nodes.append(node)
+                graph_edges.append(edge(previous, node))
+                previous = node
+            tails.append(previous)
+        join = work_node("BenchmarkJoin-1", X_STEP * (depth + 1), 0, "none", 0, join=True)
+        graph_nodes.append(join)
+        graph_edges.extend(edge(tail, join) for tail in tails)
+        last_column = depth + 1
+        tails = [join]
+
+    sink = text_output_node("TextOutput-1", X_STEP * (last_column + 1), 0)
+    graph_nodes.append(sink)
+    graph_edges.append(edge(tails[0], sink))
+
+    description = (f"Benchmark flow: {topology}, {nodes} work node(s)"
+                   f"{f', width {width}' if topology == 'fanout' else ''}, {work} {work_ms}ms/node, "
+                   f"{payload_bytes}B payload.")
+    return {
+        "name": name,
+        "description": description,
+        "data": {
+            "nodes": graph_nodes,
+            "edges": graph_edges,
+            "viewport": {"x": 0, "y": 0, "zoom": 1},
+        },
+    }
+
@@ -0,0 +1,93 @@
+import os
+import json
+import fcntl
+import threading
+
+# Shared writer for the Next.js env file. All keys of one init stage go in a single batch: the file
+# is read once, merged, written to a temp file and renamed over the original, so a reader never sees
+# it half-written. With ENV_STORE_REDIS_URL set the same keys are also stored in a Redis hash and
+# announced on a channel, so consumers can pick up new flow IDs / API keys without polling the file.
+
+ENV_FILE_PATH = os.getenv("ENV_FILE_PATH", "/app/tmp/.env.nextjs-langflow")
+ENV_STORE_REDIS_URL = os.getenv("ENV_STORE_REDIS_URL")
+ENV_STORE_REDIS_KEY = os.getenv("ENV_STORE_REDIS_KEY", "langflow:init:env")
+
+# flock only serialises separate processes; stages of init_all.py share one process.
+_thread_lock = threading.Lock()
+
+
+def merge_env_lines(lines, updates):
+    pending = dict(updates)
+    merged = []
+    for line in lines:
+        key = line.split("=", 1)[0].strip() if "=" in line and not line.lstrip().startswith("#") else None
+        if key in pending:
+            merged.append(f"{key}={pending.pop(key)}\n")
+        else:
+            merged.append(line if line.endswith("\n") else line + "\n")
+    merged.extend(f"{key}={value}\n" for key, value in pending.items())
+    return merged
+
+
+def read_env(key, file_path=ENV_FILE_PATH):
+    # Value of key in the env file, None when the file or the key is missing.
+    try:
+        with open(file_path) as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    value = None
+    for line in lines:
+        if "=" in line and not line.lstrip().startswith("#") and line.split("=", 1)[0].strip() == key:
+            value = line.split("=", 1)[1].rstrip("\n")
+    return value
+
+
+def write_env_file(updates, file_path=ENV_FILE_PATH):
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    with _thread_lock, open(f"{file_path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            lines = []
+            mode = 0o644
+            if os.path.exists(file_path):
+                with open(file_path) as f:
+                    lines = f.readlines()
+                mode = os.stat(file_path).st_mode & 0o777
+
+            tmp_path = f"{file_path}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+            with os.fdopen(fd, "w") as f:
+                f.writelines(merge_env_lines(lines, updates))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, file_path)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def publish_env(updates, url=ENV_STORE_REDIS_URL, key=ENV_STORE_REDIS_KEY):
+    import redis
+    client = redis.Redis.from_url(url)
+    values = {k: str(v) for k, v in updates.items()}
+    pipe = client.pipeline()
+    pipe.hset(key, mapping=values)
+    pipe.publish(key, json.dumps(values))
+    pipe.execute()
+
+
+def update_env(updates, file_path=ENV_FILE_PATH):
+    if not updates:
+        return
+    write_env_file(updates, file_path)
+    for key, value in updates.items():
+        print(f"Updated {file_path} with {key}={value}")
+
+    if ENV_STORE_REDIS_URL:
+        # The file is the source of truth; a Redis outage must not fail the init run.
+        try:
+            publish_env(updates)
+            print(f"Published {len(updates)} key(s) to Redis '{ENV_STORE_REDIS_KEY}'")
+        except Exception as e:
+            print(f"WARNING: could not publish env keys to Redis: {e}")
@@ -0,0 +1,328 @@
+import os
+import time
+import uuid
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from flow_index import invalidate_flow_index
+from flow_prepare import code_digests, dumps, loads, minify_flow, print_prepare_summary
+from langflow_client import make_session
+from flow_uploader import (
+    UPLOAD_TIMEOUT_SECONDS,
+    collect_flow_files,
+    ensure_projects,
+    find_flows,
+    print_summary,
+    request_with_retry,
+    upload_flow_tree,
+)
+
+# Bulk import: load + validate + minify every flow file in a process pool (see flow_prepare.py), then create them in a few
+# requests against /api/v1/flows/batch/ ("batch"), or in one transaction straight into the
+# Langflow database ("db", in-cluster only, uses LANGFLOW_DATABASE_URL).
+
+FLOW_IMPORT_MODE = os.getenv("FLOW_IMPORT_MODE", "sync")
+FLOW_BATCH_SIZE = int(os.getenv("FLOW_BATCH_SIZE", "50"))
+FLOW_VALIDATE_WORKERS = int(os.getenv("FLOW_VALIDATE_WORKERS", str(os.cpu_count() or 2)))
+LANGFLOW_DATABASE_URL = os.getenv("LANGFLOW_DATABASE_URL")
+# Where the API puts flows uploaded without a folder_id; the DB path mirrors it.
+LANGFLOW_DEFAULT_FOLDER = os.getenv("LANGFLOW_DEFAULT_FOLDER", "My Collection")
+
+
+def validate_flow(flow):
+    errors = []
+    if not isinstance(flow, dict):
+        return ["flow is not a JSON object"]
+    if not flow.get("name"):
+        errors.append("missing 'name'")
+    data = flow.get("data")
+    if not isinstance(data, dict):
+        return errors + ["missing 'data' object"]
+    nodes = data.get("nodes")
+    edges = data.get("edges", [])
+    if not isinstance(nodes, list):
+        return errors + ["'data.nodes' is not a list"]
+    if not isinstance(edges, list):
+        return errors + ["'data.edges' is not a list"]
+
+    node_ids = set()
+    for node in nodes:
+        node_id = node.get("id") if isinstance(node, dict) else None
+        if not node_id:
+            errors.append("node without 'id'")
+        elif node_id in node_ids:
+            errors.append(f"duplicate node id '{node_id}'")
+        node_ids.add(node_id)
+    for e in edges:
+        if not isinstance(e, dict):
+            errors.append("edge is not an object")
+            continue
+        for end, handle in (("source", "sourceHandle"), ("target", "targetHandle")):
+            if e.get(end) not in node_ids:
+                errors.append(f"edge {e.get('id', '?')} {end} '{e.get(end)}' is not a node")
+            # Langflow edges repeat the endpoint ids in data.sourceHandle / data.targetHandle.
+            ref = e.get("data", {}).get(handle) if isinstance(e.get("data"), dict) else None
+            if isinstance(ref, dict) and ref.get("id") not in (None, e.get(end)):
+                errors.append(f"edge {e.get('id', '?')} {handle} points at '{ref['id']}', not its {end}")
+    return errors
+
+
+def load_flow_file(path):
+    # Runs in a worker process: everything in and out must be picklable.
+    stats = {"bytes_in": 0, "bytes_out": 0, "code": []}
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        stats["bytes_in"] = len(raw)
+        content = loads(raw)
+    except (OSError, ValueError) as e:
+        return path, [], [f"cannot parse: {e}"], stats
+
+    # Langflow exports are either a single flow or a {"flows": [...]} bundle.
+    flows = content.get("flows") if isinstance(content, dict) and isinstance(content.get("flows"), list) else [content]
+    errors = []
+    for i, flow in enumerate(flows):
+        if isinstance(flow, dict) and not flow.get("name"):
+            flow["name"] = os.path.splitext(os.path.basename(path))[0] + (f" {i + 1}" if len(flows) > 1 else "")
+        errors.extend(validate_flow(flow))
+        stats["code"].extend(code_digests(flow))
+    if not errors:
+        try:
+            flows = [minify_flow(flow) for flow in flows]
+        except ValueError as e:
+            errors.append(str(e))
+    stats["bytes_out"] = len(dumps(flows))
+    return path, flows, errors, stats
+
+
+def load_flow_tree(root_dir, workers=FLOW_VALIDATE_WORKERS):
+    jobs = collect_flow_files(root_dir)
+    if not jobs:
+        return []
+    workers = max(1, workers)
+    started = time.perf_counter()
+    project_by_path = {path: project for project, path in jobs}
+    paths = [path for _, path in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        loaded = list(pool.map(load_flow_file, paths, chunksize=max(1, len(paths) // (workers * 4))))
+    items = [
+        {"project": project_by_path[path], "path": path, "flows": flows, "errors": errors, "stats": stats}
+        for path, flows, errors, stats in loaded
+    ]
+    print_prepare_summary(items, time.perf_counter() - started)
+    return items
+
+
+def prepared_uploads(items):
+    # File bodies for /api/v1/flows/upload/, which takes one flow or a {"flows": [...]} bundle.
+    return {i["path"]: dumps(i["flows"][0] if len(i["flows"]) == 1 else {"flows": i["flows"]}) for i in items}
+
+
+def flow_create_payload(flow, folder_id):
+    payload = {
+        "name": flow["name"],
+        "description": flow.get("description") or "",
+        "data": flow["data"],
+        "is_component": bool(flow.get("is_component", False)),
+    }
+    for key in ("icon", "icon_bg_color", "gradient", "endpoint_name", "tags", "webhook"):
+        if flow.get(key) is not None:
+            payload[key] = flow[key]
+    if folder_id:
+        payload["folder_id"] = folder_id
+    return payload
+
+
+def split_valid(items):
+    valid, results = [], []
+    for item in items:
+        if item["errors"]:
+            results.append({"file": item["path"], "ok": False, "status": None, "attempts": 0,
+                            "seconds": 0.0, "error": "; ".join(item["errors"][:5])})
+        else:
+            valid.append(item)
+    return valid, results
+
+
+def submit_batches(session, base_url, headers, items, project_ids, batch_size=FLOW_BATCH_SIZE):
+    # Flatten to (file, payload) so one batch can mix flows from different files and projects. Flows of a
+    # project that could not be created fail here rather than landing in the default folder.
+    entries, results = [], []
+    for item in items:
+        if item["project"] and not project_ids.get(item["project"]):
+            results.append({"file": item["path"], "ok": False, "status": None, "attempts": 0,
+                            "seconds": 0.0, "error": f"project '{item['project']}' unavailable"})
+            continue
+        entries.extend((item["path"], flow_create_payload(flow, project_ids.get(item["project"])))
+                       for flow in item["flows"])
+    for start in range(0, len(entries), batch_size):
+        batch = entries[start:start + batch_size]
+        wanted = [(payload["name"], payload.get("folder_id")) for _, payload in batch]
+        started = time.perf_counter()
+        resp, attempts, error, found = request_with_retry(
+            session, "POST", f"{base_url}/api/v1/flows/batch/",
+            created=lambda wanted=wanted: find_flows(session, base_url, headers, wanted),
+            headers={**headers, "Content-Type": "application/json", "accept": "application/json"},
+            data=dumps({"flows": [payload for _, payload in batch]}),
+            timeout=UPLOAD_TIMEOUT_SECONDS * 5,
+        )
+        status = resp.status_code if resp is not None else None
+        # No batch endpoint: fall back to per-file uploads, but only before anything was created.
+        if status in (404, 405) and start == 0:
+            return None
+        ok = error is None
+        if found:
+            print(f"Batch {start // batch_size + 1}: request failed but its flows are there, not sending it again")
+        seconds = time.perf_counter() - started
+        print(f"Batch {start // batch_size + 1}: {len(batch)} flow(s) -> {status} "
+              f"({seconds:.3f}s, {attempts} attempt(s))")
+        for path, _ in batch:
+            results.append({"file": path, "ok": ok, "status": status, "attempts": attempts,
+                            "seconds": seconds, "error": None if ok else error})
+    return results
+
+
+def _connect_db(database_url):
+    try:
+        import psycopg2
+        import psycopg2.extras
+    except ImportError:
+        raise RuntimeError("psycopg2 is required for FLOW_IMPORT_MODE=db")
+    # SQLAlchemy-style URLs carry the driver in the scheme, libpq does not understand it.
+    dsn = database_url.replace("postgresql+psycopg2://", "postgresql://").replace("postgresql+psycopg://", "postgresql://")
+    return psycopg2.connect(dsn), psycopg2.extras
+
+
+def _unique_name(name, taken):
+    candidate, n = name, 1
+    while candidate in taken:
+        candidate = f"{name} ({n})"
+        n += 1
+    taken.add(candidate)
+    return candidate
+
+
+def insert_flows_db(database_url, owner_username, items, project_description):
+    conn, extras = _connect_db(database_url)
+    started = time.perf_counter()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute('SELECT id FROM "user" WHERE username = %s', (owner_username,))
+            row = cur.fetchone()
+            if not row:
+                raise RuntimeError(f"user '{owner_username}' not found in the Langflow database")
+            user_id = row[0]
+
+            project_ids = {}
+            cur.execute("SELECT name, id FROM folder WHERE user_id = %s", (user_id,))
+            existing_folders = dict(cur.fetchall())
+            for project in sorted({i["project"] for i in items if i["project"]}):
+                if project not in existing_folders:
+                    folder_id = str(uuid.uuid4())
+                    cur.execute("INSERT INTO folder (id, name, description, user_id) VALUES (%s, %s, %s, %s)",
+                                (folder_id, project, project_description, user_id))
+                    existing_folders[project] = folder_id
+                    print(f"Created project {project} with ID: {folder_id}")
+                project_ids[project] = existing_folders[project]
+            project_ids[None] = existing_folders.get(LANGFLOW_DEFAULT_FOLDER)
+
+            # Only write the columns this Langflow version has; fill NOT NULL flags it added later.
+            cur.execute("""SELECT column_name, is_nullable, column_default, data_type
+                           FROM information_schema.columns WHERE table_name = 'flow'""")
+            columns = {r[0]: r for r in cur.fetchall()}
+            cur.execute("SELECT name FROM flow WHERE user_id = %s", (user_id,))
+            taken = {r[0] for r in cur.fetchall()}
+
+            now = datetime.datetime.now(datetime.timezone.utc)
+            rows, row_files = [], []
+            for item in items:
+                for flow in item["flows"]:
+                    values = {
+                        "id": str(uuid.uuid4()),
+                        "name": _unique_name(flow["name"], taken),
+                        "description": flow.get("description") or "",
+                        "data": extras.Json(flow["data"]),
+                        "user_id": user_id,
+                        "folder_id": project_ids.get(item["project"]),
+                        "updated_at": now,
+                        "is_component": bool(flow.get("is_component", False)),
+                        "icon": flow.get("icon"),
+                        "icon_bg_color": flow.get("icon_bg_color"),
+                        "gradient": flow.get("gradient"),
+                        "endpoint_name": flow.get("endpoint_name"),
+                        "tags": extras.Json(flow.get("tags") or []),
+                    }
+                    for name, nullable, default, data_type in columns.values():
+                        if name in values or nullable == "YES" or default is not None:
+                            continue
+                        if data_type == "boolean":
+                            values[name] = False
+                        elif name == "access_type":
+                            values[name] = "PRIVATE"
+                    rows.append({k: v for k, v in values.items() if k in columns})
+                    row_files.append(item["path"])
+
+            if rows:
+                names = list(rows[0])
+                extras.execute_values(
+                    cur,
+                    f"INSERT INTO flow ({', '.join(names)}) VALUES %s",
+                    [tuple(r[n] for n in names) for r in rows],
+                    page_size=FLOW_BATCH_SIZE,
+                )
+    finally:
+        conn.close()
+
+    seconds = time.perf_counter() - started
+    print(f"Inserted {len(rows)} flow(s) in one transaction ({seconds:.3f}s)")
+    return [{"file": path, "ok": True, "status": "db", "attempts": 1, "seconds": seconds, "error": None}
+            for path in dict.fromkeys(row_files)]
+
+
+def import_flow_tree(base_url, headers, root_dir, project_description, mode=FLOW_IMPORT_MODE,
+                     owner_username=None, database_url=LANGFLOW_DATABASE_URL, session=None):
+    # "sync" only applies changes since the last run (flow_sync), "upload" is one request per
+    # file (flow_uploader), "batch" / "db" are bulk creates.
+    base_url = base_url.rstrip("/")
+    if mode == "sync":
+        from flow_sync import sync_flow_tree
+        return sync_flow_tree(base_url, headers, root_dir, project_description, session=session)
+    if mode == "upload":
+        # Validated and minified first, so a broken file fails here instead of after its round-trip.
+        valid, rejected = split_valid(load_flow_tree(root_dir))
+        results = upload_flow_tree(base_url, headers, root_dir, project_description, session=session,
+                                   prepared=prepared_uploads(valid), rejected=rejected)
+        invalidate_flow_index(base_url)
+        return results
+    if mode not in ("batch", "db"):
+        raise ValueError(f"Unknown FLOW_IMPORT_MODE '{mode}', expected sync, upload, batch or db")
+
+    started = time.perf_counter()
+
+    items = load_flow_tree(root_dir)
+    valid, results = split_valid(items)
+    print(f"Loaded {len(items)} flow file(s) under {root_dir} in {time.perf_counter() - started:.3f}s "
+          f"({len(valid)} valid, {len(results)} rejected before upload)")
+
+    if mode == "db":
+        if not database_url or not owner_username:
+            raise RuntimeError("FLOW_IMPORT_MODE=db needs LANGFLOW_DATABASE_URL and an owner username")
+        results.extend(insert_flows_db(database_url, owner_username, valid, project_description))
+    else:
+        session = session or make_session()
+        project_ids = ensure_projects(session, base_url, headers, {i["project"] for i in valid if i["project"]},
+                                      project_description)
+        batch_results = submit_batches(session, base_url, headers, valid, project_ids)
+        if batch_results is None:
+            print("Batch endpoint not available on this Langflow, falling back to concurrent uploads.")
+            results = upload_flow_tree(base_url, headers, root_dir, project_description, session=session,
+                                       prepared=prepared_uploads(valid), rejected=results)
+            invalidate_flow_index(base_url)
+            return results
+        results.extend(batch_results)
+
+    # These modes do not track what they created; the next lookup has to list flows again.
+    invalidate_flow_index(base_url)
+
+    print_summary(results, time.perf_counter() - started)
+    return results
@@ -0,0 +1,89 @@
+import threading
+
+from flow_uploader import UPLOAD_TIMEOUT_SECONDS
+
+# Name -> id index of the flows a user can see. It is built from the header-only listing
+# (header_flows=true), which leaves out the graph JSON, so fetch time and memory scale with the number
+# of flows rather than their size. One index per (server, credentials) is cached for the process,
+# so every init stage run by init_all.py shares it; writers keep it current or invalidate it.
+
+HEADER_FIELDS = ("id", "name", "folder_id", "endpoint_name", "updated_at", "is_component", "user_id")
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class FlowIndex:
+    def __init__(self, flows=()):
+        self.by_id = {}
+        self.by_name = {}
+        self.by_name_folder = {}
+        for flow in flows:
+            self.add(flow)
+
+    @classmethod
+    def fetch(cls, session, base_url, headers):
+        resp = session.get(f"{base_url.rstrip('/')}/api/v1/flows/", headers=headers,
+                           params={"get_all": "true", "header_flows": "true"}, timeout=UPLOAD_TIMEOUT_SECONDS)
+        resp.raise_for_status()
+        return cls(f for f in resp.json() if isinstance(f, dict) and f.get("id"))
+
+    def add(self, flow):
+        self.remove(flow["id"])
+        header = {k: flow.get(k) for k in HEADER_FIELDS}
+        self.by_id[header["id"]] = header
+        self.by_name[header["name"]] = header["id"]
+        self.by_name_folder[(header["name"], header["folder_id"])] = header["id"]
+
+    def remove(self, flow_id):
+        header = self.by_id.pop(flow_id, None)
+        if header is None:
+            return
+        if self.by_name.get(header["name"]) == flow_id:
+            self.by_name.pop(header["name"])
+        self.by_name_folder.pop((header["name"], header["folder_id"]), None)
+
+    def id_for(self, name, folder_id=None):
+        # Without a folder any flow of that name matches (top-level flows sit in the user's default folder).
+        if folder_id is not None:
+            return self.by_name_folder.get((name, folder_id))
+        return self.by_name.get(name)
+
+    def adoptable(self, name, folder_id, user_id):
+        # A same-named regular flow in exactly this folder and not owned by someone else. The listing only
+        # returns the caller's flows, and Langflow leaves user_id out of the headers, so a missing one is fine.
+        header = self.by_id.get(self.by_name_folder.get((name, folder_id)))
+        if header is None or header["is_component"] or header["user_id"] not in (None, user_id):
+            return None
+        return header["id"]
+
+    def ids_for(self, names):
+        return {name: self.id_for(name) for name in names}
+
+    def __contains__(self, flow_id):
+        return flow_id in self.by_id
+
+    def __len__(self):
+        return len(self.by_id)
+
+
+def cache_key(base_url, headers):
+    return base_url.rstrip("/"), headers.get("Authorization") or headers.get("x-api-key")
+
+
+def get_flow_index(session, base_url, headers, refresh=False):
+    key = cache_key(base_url, headers)
+    with _cache_lock:
+        index = None if refresh else _cache.get(key)
+    if index is None:
+        index = FlowIndex.fetch(session, base_url, headers)
+        with _cache_lock:
+            _cache[key] = index
+    return index
+
+
+def invalidate_flow_index(base_url=None):
+    # The same flows are visible under several credentials (bearer token, API key), so drop them all.
+    with _cache_lock:
+        for key in [k for k in _cache if base_url is None or k[0] == base_url.rstrip("/")]:
+            del _cache[key]
@@ -0,0 +1,85 @@
+import os
+import json
+import hashlib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Flow pre-processing shared by the import modes: parse with orjson when it is installed (the
+# Langflow image ships it), drop editor-only state that React Flow rebuilds on render, and account
+# for the bytes before / after. Component code is not deduplicated on the wire or in the flow rows:
+# Langflow needs the full source in every node, so repeated code is only reported.
+
+# off | safe | ui ("ui" also drops the saved canvas viewport; the editor opens at its default view)
+FLOW_MINIFY = os.getenv("FLOW_MINIFY", "safe")
+
+# Selection / drag state and the size React Flow measures itself. width / height are kept:
+# resized nodes (notes) store their size there.
+NODE_STATE_KEYS = ("selected", "dragging", "resizing", "measured")
+EDGE_STATE_KEYS = ("selected",)
+
+
+def loads(raw):
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+
+def dumps(obj):
+    # Compact bytes; requests' json= would add a space after every separator.
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def minify_flow(flow, level=FLOW_MINIFY):
+    if level not in ("off", "safe", "ui"):
+        raise ValueError(f"Unknown FLOW_MINIFY '{level}', expected off, safe or ui")
+    data = flow.get("data") if isinstance(flow, dict) else None
+    if level == "off" or not isinstance(data, dict):
+        return flow
+    for node in data.get("nodes") or []:
+        if not isinstance(node, dict):
+            continue
+        for key in NODE_STATE_KEYS:
+            node.pop(key, None)
+        # positionAbsolute only differs from position inside a group, and is recomputed either way.
+        if level == "ui" or node.get("positionAbsolute") == node.get("position"):
+            node.pop("positionAbsolute", None)
+    for edge in data.get("edges") or []:
+        if isinstance(edge, dict):
+            for key in EDGE_STATE_KEYS:
+                edge.pop(key, None)
+    if level == "ui":
+        data.pop("viewport", None)
+    return flow
+
+
+def code_digests(flow):
+    # (sha1, bytes) of every component's source, to spot code repeated across nodes and flows.
+    digests = []
+    nodes = (flow.get("data") or {}).get("nodes") if isinstance(flow, dict) else None
+    for node in nodes or []:
+        template = ((node.get("data") or {}).get("node") or {}).get("template") if isinstance(node, dict) else None
+        code = (template or {}).get("code")
+        value = code.get("value") if isinstance(code, dict) else None
+        if isinstance(value, str) and value:
+            raw = value.encode()
+            digests.append((hashlib.sha1(raw).hexdigest(), len(raw)))
+    return digests
+
+
+def print_prepare_summary(items, seconds, level=FLOW_MINIFY):
+    bytes_in = sum(i["stats"]["bytes_in"] for i in items)
+    bytes_out = sum(i["stats"]["bytes_out"] for i in items)
+    seen, code_bytes, repeated = set(), 0, 0
+    for item in items:
+        for digest, size in item["stats"]["code"]:
+            code_bytes += size
+            if digest in seen:
+                repeated += size
+            seen.add(digest)
+    saved = (1 - bytes_out / bytes_in) * 100.0 if bytes_in else 0.0
+    print(f"Pre-processed {len(items)} flow file(s) in {seconds:.3f}s ({'orjson' if orjson else 'json'}, "
+          f"minify={level}): {bytes_in / 1024:.1f} KiB -> {bytes_out / 1024:.1f} KiB ({saved:.0f}% smaller); "
+          f"component code {code_bytes / 1024:.1f} KiB, {repeated / 1024:.1f} KiB of it repeated")
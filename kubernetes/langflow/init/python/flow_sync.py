@@ -0,0 +1,286 @@
+import os
+import json
+import time
+import fcntl
+import hashlib
+import contextlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from flow_uploader import (
+    UPLOAD_TIMEOUT_SECONDS,
+    UPLOAD_WORKERS,
+    ensure_projects,
+    find_flows,
+    print_summary,
+    request_with_retry,
+)
+from flow_bulk import LANGFLOW_DEFAULT_FOLDER, flow_create_payload, load_flow_tree, split_valid
+from flow_prepare import dumps
+from flow_index import get_flow_index, invalidate_flow_index
+from langflow_client import make_session
+
+# Incremental, idempotent flow sync. Every flow is hashed (canonical JSON + target project) and a
+# manifest keeps hash -> flow id per scope, so a restart only creates / updates / deletes what
+# actually changed. The manifest lives on the langflow-flows PVC (or in Redis when
+# FLOW_SYNC_REDIS_URL is set) and also remembers the id and hash of the API keys the init scripts minted.
+
+FLOW_SYNC_MANIFEST = os.getenv("FLOW_SYNC_MANIFEST", "/app/flows/.init-manifest.json")
+FLOW_SYNC_REDIS_URL = os.getenv("FLOW_SYNC_REDIS_URL")
+FLOW_SYNC_REDIS_KEY = os.getenv("FLOW_SYNC_REDIS_KEY", "langflow:init:manifest")
+MANIFEST_VERSION = 1
+
+
+def flow_hash(flow, project):
+    canonical = json.dumps({"project": project, "flow": flow}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def empty_manifest():
+    return {"version": MANIFEST_VERSION, "scopes": {}, "api_keys": {}}
+
+
+class FileManifestStore:
+    def __init__(self, path=FLOW_SYNC_MANIFEST):
+        self.path = path
+
+    @contextlib.contextmanager
+    def lock(self):
+        # Serialises concurrent init runs (e.g. several pods starting at once) on the shared volume.
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.lock", "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return empty_manifest()
+        return manifest if manifest.get("version") == MANIFEST_VERSION else empty_manifest()
+
+    def save(self, manifest):
+        tmp_path = f"{self.path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class RedisManifestStore:
+    def __init__(self, url=FLOW_SYNC_REDIS_URL, key=FLOW_SYNC_REDIS_KEY):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.key = key
+
+    @contextlib.contextmanager
+    def lock(self):
+        # Held only for a read or a read-merge-write, never across HTTP calls, so a short lease is enough.
+        with self.client.lock(f"{self.key}:lock", timeout=30, blocking_timeout=120):
+            yield
+
+    def load(self):
+        raw = self.client.get(self.key)
+        if not raw:
+            return empty_manifest()
+        manifest = json.loads(raw)
+        return manifest if manifest.get("version") == MANIFEST_VERSION else empty_manifest()
+
+    def save(self, manifest):
+        self.client.set(self.key, json.dumps(manifest, sort_keys=True))
+
+
+def open_manifest_store():
+    return RedisManifestStore() if FLOW_SYNC_REDIS_URL else FileManifestStore()
+
+
+def read_manifest(store):
+    with store.lock():
+        return store.load()
+
+
+def save_manifest_entry(store, section, key, value):
+    # Re-read under the lock and replace only this entry, so concurrent stages never drop each other's.
+    with store.lock():
+        manifest = store.load()
+        manifest.setdefault(section, {})[key] = value
+        store.save(manifest)
+
+
+def api_key_digest(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def reuse_or_create_api_key(session, base_url, bearer_headers, key_name, store, current_key=None):
+    # The manifest only keeps the id and sha256 of a key, never the key itself. current_key is the copy the
+    # caller already published (the Next.js env file); it is reused while it matches the recorded hash and
+    # still authenticates. Otherwise a new key is minted and the one it replaces is revoked by id.
+    base_url = base_url.rstrip("/")
+    entry = read_manifest(store).get("api_keys", {}).get(key_name)
+    legacy = isinstance(entry, str)
+    if legacy:
+        # Written by an older run with the plaintext key; replaced by the hashed form below.
+        entry = {"id": None, "sha256": api_key_digest(entry)}
+    entry = entry or {}
+    if current_key and entry.get("sha256") == api_key_digest(current_key):
+        check = session.get(f"{base_url}/api/v1/users/whoami", headers={"x-api-key": current_key},
+                            timeout=UPLOAD_TIMEOUT_SECONDS)
+        if check.ok:
+            if legacy:
+                save_manifest_entry(store, "api_keys", key_name, entry)
+            print(f"Reusing existing API key '{key_name}'")
+            return current_key, False
+        print(f"Stored API key '{key_name}' no longer valid ({check.status_code}), creating a new one")
+
+    resp = session.post(f"{base_url}/api/v1/api_key/",
+                        headers={**bearer_headers, "Content-Type": "application/json"},
+                        json={"name": key_name}, timeout=UPLOAD_TIMEOUT_SECONDS)
+    created = resp.json() if resp.ok else {}
+    api_key = created.get("api_key")
+    if not api_key:
+        print(f"API_KEY_RESPONSE: {resp.text}")
+        return None, True
+    save_manifest_entry(store, "api_keys", key_name, {"id": created.get("id"), "sha256": api_key_digest(api_key)})
+    if entry.get("id"):
+        try:
+            revoked = session.delete(f"{base_url}/api/v1/api_key/{entry['id']}", headers=bearer_headers,
+                                     timeout=UPLOAD_TIMEOUT_SECONDS)
+            if not revoked.ok and revoked.status_code != 404:
+                print(f"WARNING: could not revoke the previous API key '{key_name}': {revoked.status_code}")
+        except requests.exceptions.RequestException as e:
+            print(f"WARNING: could not revoke the previous API key '{key_name}': {e}")
+    return api_key, True
+
+
+def adoption_scope(session, base_url, headers):
+    # (user id, default folder id) of this credential; adoption is off when either is unknown.
+    who = session.get(f"{base_url}/api/v1/users/whoami", headers=headers, timeout=UPLOAD_TIMEOUT_SECONDS)
+    projects = session.get(f"{base_url}/api/v1/projects/", headers=headers, timeout=UPLOAD_TIMEOUT_SECONDS)
+    user_id = who.json().get("id") if who.ok else None
+    folders = projects.json() if projects.ok else []
+    default_folder = next((p.get("id") for p in folders if isinstance(p, dict) and p.get("name") == LANGFLOW_DEFAULT_FOLDER),
+                          None)
+    return user_id, default_folder
+
+
+def sync_flow_tree(base_url, headers, root_dir, project_description, scope=None, store=None,
+                   workers=UPLOAD_WORKERS, session=None):
+    base_url = base_url.rstrip("/")
+    scope = scope or os.path.basename(os.path.normpath(root_dir))
+    store = store or open_manifest_store()
+    session = session or make_session(workers)
+    started = time.perf_counter()
+
+    items = load_flow_tree(root_dir)
+    valid, results = split_valid(items)
+
+    # The manifest lock is only held to read and to write back this scope: the HTTP work below runs
+    # unlocked, so stages syncing other scopes (init_all.py runs them concurrently) are not serialised.
+    previous = read_manifest(store).get("scopes", {}).get(scope, {})
+    # Fresh listing for this credential; indexes cached under other credentials go stale once we write.
+    invalidate_flow_index(base_url)
+    index = get_flow_index(session, base_url, headers)
+    project_ids = ensure_projects(session, base_url, headers,
+                                  {i["project"] for i in valid if i["project"]}, project_description)
+
+    # Work out the plan: key -> (action, payload, flow id)
+    desired = {}
+    for item in valid:
+        rel = os.path.relpath(item["path"], root_dir)
+        for i, flow in enumerate(item["flows"]):
+            key = rel if len(item["flows"]) == 1 else f"{rel}#{i}"
+            desired[key] = (item, flow, flow_hash(flow, item["project"]))
+
+    # Files that fail validation this time keep their previous flow rather than being deleted.
+    invalid_rels = {os.path.relpath(item["path"], root_dir) for item in items if item["errors"]}
+    plan, current, scope_ids = [], {}, None
+    for key, (item, flow, digest) in desired.items():
+        if item["project"] and not project_ids.get(item["project"]):
+            # Never let a flow whose project could not be created fall back to the default folder.
+            results.append({"file": item["path"], "ok": False, "status": None, "attempts": 0,
+                            "seconds": 0.0, "error": f"project '{item['project']}' unavailable"})
+            if key in previous:
+                current[key] = previous[key]
+            continue
+        folder_id = project_ids.get(item["project"])
+        payload = flow_create_payload(flow, folder_id)
+        entry = previous.get(key)
+        if entry and entry.get("flow_id") in index:
+            action = "unchanged" if entry.get("hash") == digest else "update"
+            plan.append((key, item["path"], action, payload, entry["flow_id"], digest))
+            continue
+        # Not tracked yet (first sync after plain uploads) or deleted server-side: adopt a flow of the
+        # same name, but only one of ours in the folder this flow goes to. Starter / example flows,
+        # components and flows of other projects are never patched or later deleted by the sync.
+        if scope_ids is None:
+            scope_ids = adoption_scope(session, base_url, headers)
+        user_id, default_folder = scope_ids
+        adopted = index.adoptable(flow["name"], folder_id or default_folder, user_id) if user_id else None
+        plan.append((key, item["path"], "update" if adopted else "create", payload, adopted, digest))
+    for key, entry in previous.items():
+        if key in desired:
+            continue
+        if key.split("#")[0] in invalid_rels:
+            current[key] = entry
+        elif entry.get("flow_id") in index:
+            plan.append((key, key, "delete", None, entry["flow_id"], None))
+
+    def apply(step):
+        # Same retries as flow uploads; a step that still fails is reported without stopping the others.
+        key, path, action, payload, flow_id, digest = step
+        t0 = time.perf_counter()
+        resp, attempts, error = None, 0, None
+        json_headers = {**headers, "Content-Type": "application/json"}
+        try:
+            if action == "create":
+                resp, attempts, error, _ = request_with_retry(
+                    session, "POST", f"{base_url}/api/v1/flows/", data=dumps(payload),
+                    headers=json_headers, timeout=UPLOAD_TIMEOUT_SECONDS)
+                flow_id = resp.json().get("id") if resp is not None and resp.ok else None
+                if error is None and not flow_id:
+                    error = "no flow id in the create response"
+            elif action == "update":
+                resp, attempts, error, _ = request_with_retry(
+                    session, "PATCH", f"{base_url}/api/v1/flows/{flow_id}", data=dumps(payload),
+                    headers=json_headers, timeout=UPLOAD_TIMEOUT_SECONDS)
+            elif action == "delete":
+                resp, attempts, error, _ = request_with_retry(
+                    session, "DELETE", f"{base_url}/api/v1/flows/{flow_id}", headers=headers,
+                    timeout=UPLOAD_TIMEOUT_SECONDS)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            error = f"{type(e).__name__}: {e}"
+        ok = error is None
+        return key, flow_id, digest, payload, {
+            "file": path, "ok": ok, "status": action, "attempts": attempts,
+            "seconds": time.perf_counter() - t0, "error": error,
+        }
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        for key, flow_id, digest, payload, result in pool.map(apply, plan):
+            results.append(result)
+            if result["status"] == "delete":
+                if not result["ok"]:
+                    current[key] = previous[key]
+                else:
+                    index.remove(flow_id)
+            elif result["ok"]:
+                current[key] = {"hash": digest, "flow_id": flow_id}
+                # Keep the shared index current so later stages need not list flows again.
+                index.add({**payload, "id": flow_id})
+            elif key in previous:
+                current[key] = previous[key]
+
+    save_manifest_entry(store, "scopes", scope, current)
+
+    counts = Counter(r["status"] if r["ok"] else "failed" for r in results)
+    print(f"Flow sync '{scope}': " + ", ".join(f"{n} {k}" for k, n in sorted(counts.items())))
+    print_summary([r for r in results if r["status"] != "unchanged"], time.perf_counter() - started)
+    return results
@@ -0,0 +1,221 @@
+import os
+import json
+import glob
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from langflow_client import make_session
+
+# Tunables (overridable from the pod environment)
+UPLOAD_WORKERS = int(os.getenv("FLOW_UPLOAD_WORKERS", "8"))
+UPLOAD_MAX_RETRIES = int(os.getenv("FLOW_UPLOAD_MAX_RETRIES", "4"))
+UPLOAD_BACKOFF_SECONDS = float(os.getenv("FLOW_UPLOAD_BACKOFF_SECONDS", "0.5"))
+UPLOAD_TIMEOUT_SECONDS = float(os.getenv("FLOW_UPLOAD_TIMEOUT_SECONDS", "60"))
+
+# Status codes worth another attempt; everything else in 4xx is a bad flow file.
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Refused before any work was done; the others may come after the server already committed the request.
+REJECTED_STATUS = {429, 503}
+# Safe to send twice. PATCH bodies here are whole flow payloads, so replaying one changes nothing.
+REPLAYABLE_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "PATCH", "DELETE"}
+
+
+def collect_flow_files(root_dir):
+    # Top-level JSONs have no project; each subdirectory is a project of the same name.
+    jobs = [(None, path) for path in sorted(glob.glob(os.path.join(root_dir, "*.json")))]
+    for project_dir in sorted(glob.glob(os.path.join(root_dir, "*/"))):
+        if not os.path.isdir(project_dir):
+            continue
+        project_name = os.path.basename(os.path.normpath(project_dir))
+        for path in sorted(glob.glob(os.path.join(project_dir, "*.json"))):
+            jobs.append((project_name, path))
+    return jobs
+
+
+def ensure_projects(session, base_url, headers, project_names, description):
+    # Pre-pass: one listing, create only what is missing, never re-fetch the list.
+    project_ids = {}
+    if not project_names:
+        return project_ids
+
+    resp = session.get(f"{base_url}/api/v1/projects/", headers=headers, timeout=UPLOAD_TIMEOUT_SECONDS)
+    existing = resp.json() if resp.ok and isinstance(resp.json(), list) else []
+    for p in existing:
+        if p.get("name") in project_names:
+            project_ids[p["name"]] = p.get("id")
+
+    for project_name in sorted(project_names):
+        if project_ids.get(project_name):
+            print(f"Project already exists: {project_name} (ID: {project_ids[project_name]})")
+            continue
+        print(f"Creating project: {project_name}")
+        create_resp = session.post(
+            f"{base_url}/api/v1/projects/",
+            headers={**headers, "Content-Type": "application/json"},
+            json={
+                "name": project_name,
+                "description": description,
+                "components_list": [],
+                "flows_list": [],
+            },
+            timeout=UPLOAD_TIMEOUT_SECONDS,
+        )
+        if not create_resp.ok:
+            print(f"Failed to create project {project_name}: {create_resp.text}")
+            continue
+        project_ids[project_name] = create_resp.json().get("id")
+        print(f"Created project {project_name} with ID: {project_ids[project_name]}")
+
+    return project_ids
+
+
+def never_sent(e):
+    # Connect timeouts and refused / unresolvable connections: the server never saw the request.
+    if isinstance(e, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(e.args[0], "reason", None) if e.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+def request_with_retry(session, method, url, created=None, **kwargs):
+    # Retries RETRYABLE_STATUS and dropped / timed-out connections; returns (last response or None, attempts,
+    # error, found). A POST that may already have been applied (500/502/504, read timeout, connection lost
+    # mid-request) is only sent again once created() has re-listed flows and returned None (not there).
+    # When it finds them, its result comes back as `found` with no error; without created() there is no retry.
+    resp, error = None, None
+    for attempt in range(1, UPLOAD_MAX_RETRIES + 1):
+        try:
+            resp = session.request(method, url, **kwargs)
+            if resp.status_code not in RETRYABLE_STATUS:
+                return resp, attempt, None if resp.ok else resp.text, None
+            error = resp.text
+            maybe_applied = resp.status_code not in REJECTED_STATUS
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            resp, error = None, str(e)
+            maybe_applied = not never_sent(e)
+
+        if maybe_applied and method.upper() not in REPLAYABLE_METHODS:
+            if created is None:
+                break
+            try:
+                found = created()
+            except requests.exceptions.RequestException as e:
+                error = f"{error} (could not check whether it was applied: {e})"
+                break
+            if found:
+                return resp, attempt, None, found
+
+        if attempt < UPLOAD_MAX_RETRIES:
+            # Exponential backoff with full jitter so retrying workers do not stampede together.
+            time.sleep(random.uniform(0, UPLOAD_BACKOFF_SECONDS * (2 ** (attempt - 1))))
+
+    return resp, attempt, error, None
+
+
+def find_flows(session, base_url, headers, wanted):
+    # [(name, folder_id)] -> their ids when every one of them exists, else None. A folder of None matches any
+    # folder (uploads without a project land in the user's default folder).
+    from flow_index import FlowIndex
+    index = FlowIndex.fetch(session, base_url, headers)
+    ids = [index.id_for(name, folder_id) for name, folder_id in wanted]
+    return ids if ids and all(ids) else None
+
+
+def flow_names(content):
+    # Names inside an upload body (one flow or a {"flows": [...]} bundle); the uploader names unnamed flows itself.
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return []
+    flows = data.get("flows") if isinstance(data, dict) and isinstance(data.get("flows"), list) else [data]
+    return [f.get("name") for f in flows if isinstance(f, dict) and f.get("name")]
+
+
+def upload_flow(session, base_url, headers, flow_file, project_id=None, content=None):
+    url = f"{base_url}/api/v1/flows/upload/"
+    if project_id:
+        url = f"{url}?folder_id={project_id}"
+
+    if content is None:
+        with open(flow_file, "rb") as f:
+            content = f.read()
+
+    # Flows of these names in the target folder after an ambiguous failure mean the upload went through.
+    names = flow_names(content)
+    created = (lambda: find_flows(session, base_url, headers, [(n, project_id) for n in names])) if names else None
+
+    started = time.perf_counter()
+    resp, attempts, error, found = request_with_retry(
+        session, "POST", url, created=created,
+        headers={**headers, "accept": "application/json"},
+        files={"file": (os.path.basename(flow_file), content, "application/json")},
+        timeout=UPLOAD_TIMEOUT_SECONDS,
+    )
+    if found:
+        print(f"{flow_file}: request failed but the flow(s) are there, not uploading again")
+    ok = error is None
+    return {"file": flow_file, "ok": ok, "status": resp.status_code if resp is not None else None,
+            "attempts": attempts, "seconds": time.perf_counter() - started, "error": error}
+
+
+def print_summary(results, total_seconds):
+    ok = [r for r in results if r["ok"]]
+    failed = [r for r in results if not r["ok"]]
+    durations = sorted(r["seconds"] for r in results)
+    retried = sum(1 for r in results if r["attempts"] > 1)
+
+    print("------------------------------------------------------------")
+    print(f"Flow upload summary: {len(ok)} ok, {len(failed)} failed, {retried} retried, "
+          f"{total_seconds:.2f}s wall clock")
+    if durations:
+        p50 = durations[len(durations) // 2]
+        p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+        print(f"Per-file upload time: min {durations[0]:.3f}s | p50 {p50:.3f}s | "
+              f"p95 {p95:.3f}s | max {durations[-1]:.3f}s | sum {sum(durations):.2f}s")
+    for r in failed:
+        print(f"FAILED: {r['file']} (status {r['status']}, {r['attempts']} attempts): {r['error']}")
+    print("------------------------------------------------------------")
+
+
+def upload_flow_tree(base_url, headers, root_dir, project_description, workers=UPLOAD_WORKERS, session=None,
+                     prepared=None, rejected=()):
+    # prepared: path -> body already validated and minified (flow_bulk.load_flow_tree); files left out of
+    # it were rejected before upload and come in as `rejected` results.
+    base_url = base_url.rstrip("/")
+    session = session or make_session(workers)
+    started = time.perf_counter()
+
+    jobs = collect_flow_files(root_dir)
+    if prepared is not None:
+        jobs = [(name, path) for name, path in jobs if path in prepared]
+    print(f"Found {len(jobs)} flow file(s) under {root_dir}")
+    project_ids = ensure_projects(
+        session, base_url, headers, {name for name, _ in jobs if name}, project_description
+    )
+
+    results = list(rejected)
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        futures = {}
+        for project_name, flow_file in jobs:
+            if project_name and not project_ids.get(project_name):
+                results.append({"file": flow_file, "ok": False, "status": None, "attempts": 0,
+                                "seconds": 0.0, "error": f"project '{project_name}' unavailable"})
+                continue
+            project_id = project_ids.get(project_name) if project_name else None
+            content = prepared.get(flow_file) if prepared is not None else None
+            futures[pool.submit(upload_flow, session, base_url, headers, flow_file, project_id, content)] = flow_file
+
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result["ok"]:
+                print(f"Done: {result['file']} ({result['seconds']:.3f}s)")
+            else:
+                print(f"Failed to upload {result['file']}: {result['error']}")
+
+    print_summary(results, time.perf_counter() - started)
+    return results
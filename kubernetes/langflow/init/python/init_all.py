@@ -0,0 +1,142 @@
+import os
+import sys
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import init_benchmark_flow
+import init_public_user
+import init_service_user
+from flow_uploader import UPLOAD_WORKERS
+from init_common import die, superuser_token
+from init_trace import span
+from langflow_client import make_session
+
+# Single init entry point: wait for Langflow, log in once, then run the init stages concurrently.
+# A stage starts as soon as the stages it depends on have finished, so a fresh pod is ready after
+# roughly the critical path instead of the sum of all stages. Stages must not hold a shared lock across
+# HTTP calls (the flow_sync manifest and env_store lock only around their own read/merge/write), or
+# they run one after another again; the "wall time" vs "sum of stages" line below shows the overlap.
+
+# name -> (run(access_token, session), dependencies)
+STAGES = {
+    "service": (init_service_user.run, ()),
+    "public": (init_public_user.run, ()),
+    "benchmark": (init_benchmark_flow.run, ()),
+}
+
+INIT_STAGES = [s.strip() for s in os.getenv("INIT_STAGES", "service,public").split(",") if s.strip()]
+
+
+class StagePrefixedStream:
+    # Tags every line written from a stage thread with the stage name so interleaved output stays readable.
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def write(self, text):
+        stage = getattr(self.local, "stage", None)
+        if stage is None:
+            return self.stream.write(text)
+        buffered = getattr(self.local, "buffer", "") + text
+        *lines, self.local.buffer = buffered.split("\n")
+        with self.lock:
+            for line in lines:
+                self.stream.write(f"[{stage}] {line}\n")
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def resolve_order(selected):
+    for name in selected:
+        if name not in STAGES:
+            die(f"Unknown init stage '{name}' (known: {', '.join(STAGES)})")
+    missing = {dep for name in selected for dep in STAGES[name][1] if dep not in selected}
+    if missing:
+        die(f"INIT_STAGES is missing dependencies: {', '.join(sorted(missing))}")
+    return selected
+
+
+def run_stage(name, token, session, streams):
+    for stream in streams:
+        stream.local.stage = name
+    started = time.perf_counter()
+    try:
+        with span(name, kind="stage"):
+            STAGES[name][0](token, session)
+        return True, time.perf_counter() - started
+    except BaseException as e:
+        # The stage scripts sys.exit() on failure; keep that inside the stage.
+        code = e.code if isinstance(e, SystemExit) else f"{type(e).__name__}: {e}"
+        print(f"Stage failed ({code})", file=sys.stderr)
+        return False, time.perf_counter() - started
+    finally:
+        for stream in streams:
+            if getattr(stream.local, "buffer", ""):
+                stream.write("\n")
+            stream.local.stage = None
+
+
+def main():
+    wall_started = time.perf_counter()
+    selected = resolve_order(INIT_STAGES)
+    print(f"--- Init stages: {', '.join(selected)} ---")
+
+    # --- Step 1: Readiness probe + one superuser login shared by every stage ---
+    session = make_session(UPLOAD_WORKERS * len(selected))
+    token = superuser_token(session)
+
+    streams = [StagePrefixedStream(sys.stdout), StagePrefixedStream(sys.stderr)]
+    sys.stdout, sys.stderr = streams
+
+    # --- Step 2: Run stages as their dependencies complete ---
+    timings, failed = {}, set()
+    pending = list(selected)
+    running = {}
+    try:
+        with ThreadPoolExecutor(max_workers=len(selected) or 1) as pool:
+            while pending or running:
+                for name in list(pending):
+                    deps = STAGES[name][1]
+                    if any(d in failed for d in deps):
+                        pending.remove(name)
+                        failed.add(name)
+                        print(f"Skipping stage '{name}': dependency failed")
+                    elif all(d in timings for d in deps):
+                        pending.remove(name)
+                        running[pool.submit(run_stage, name, token, session, streams)] = name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    ok, seconds = future.result()
+                    timings[name] = seconds
+                    if not ok:
+                        failed.add(name)
+    finally:
+        sys.stdout, sys.stderr = streams[0].stream, streams[1].stream
+
+    # --- Step 3: Summary ---
+    wall = time.perf_counter() - wall_started
+    print("--- Init summary ---")
+    for name in selected:
+        status = "FAILED" if name in failed else "ok"
+        seconds = f"{timings[name]:.2f}s" if name in timings else "skipped"
+        print(f"  {name:<10} {status:<6} {seconds}")
+    print(f"  wall time {wall:.2f}s (sum of stages {sum(timings.values()):.2f}s)")
+
+    if failed:
+        die(f"Init stages failed: {', '.join(n for n in selected if n in failed)}")
+    print("All init stages finished successfully.")
+
+
+if __name__ == "__main__":
+    with span("init_all", kind="run", stages=",".join(INIT_STAGES)):
+        main()
@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+import random
+
+import requests
+
+import init_trace
+from init_trace import span
+from langflow_client import make_session
+
+# Shared pieces of the init scripts: readiness probe and superuser login.
+# Importing this module turns on HTTP timing spans for every script (see init_trace.py).
+init_trace.install()
+
+LANGFLOW_URL = os.getenv("LANGFLOW_URL", "http://localhost:7860").rstrip("/")
+SUPERUSER = os.getenv("LANGFLOW_SUPERUSER")
+SUPERUSER_PASSWORD = os.getenv("LANGFLOW_SUPERUSER_PASSWORD")
+# Parent of service_flows/ and public_flows/ (overridable to run against a local stub).
+INIT_FLOWS_DIR = os.getenv("INIT_FLOWS_DIR", "/app/init")
+
+# Readiness: exponential backoff with full jitter, bounded by a total deadline rather than a retry count.
+READY_TIMEOUT_SECONDS = float(os.getenv("LANGFLOW_READY_TIMEOUT_SECONDS", "300"))
+READY_BASE_DELAY_SECONDS = float(os.getenv("LANGFLOW_READY_BASE_DELAY_SECONDS", "0.25"))
+READY_MAX_DELAY_SECONDS = float(os.getenv("LANGFLOW_READY_MAX_DELAY_SECONDS", "8"))
+
+
+def die(msg, err=None):
+    details = f" | Details: {err}" if err else ""
+    print(f"FATAL: {msg}{details}", file=sys.stderr)
+    sys.exit(1)
+
+
+def wait_for_langflow(session, base_url=LANGFLOW_URL, timeout=READY_TIMEOUT_SECONDS):
+    with span("readiness") as s:
+        ready = _wait_for_langflow(session, base_url, timeout)
+        s.attrs["ready"] = ready
+        return ready
+
+
+def _wait_for_langflow(session, base_url, timeout):
+    # /health_check also verifies the database; older Langflow only has /health.
+    deadline = time.monotonic() + timeout
+    attempt = 0
+    paths = ["/health_check", "/health"]
+    print(f"--- Waiting for Langflow at {base_url} ---")
+    while True:
+        attempt += 1
+        try:
+            resp = session.get(f"{base_url}{paths[0]}", timeout=5)
+            if resp.status_code == 404 and len(paths) > 1:
+                paths.pop(0)
+                continue
+            if resp.ok:
+                print(f"Langflow is ready ({paths[0]}, attempt {attempt}).")
+                return True
+            reason = f"status {resp.status_code}"
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            reason = type(e).__name__
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        delay = min(remaining, random.uniform(0, min(READY_MAX_DELAY_SECONDS, READY_BASE_DELAY_SECONDS * 2 ** attempt)))
+        print(f"Langflow not ready yet ({reason}), next probe in {delay:.2f}s...")
+        time.sleep(delay)
+
+
+def login(session, username, password, base_url=LANGFLOW_URL):
+    with span("login", user=username):
+        resp = session.post(
+            f"{base_url}/api/v1/login",
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            data={"username": username, "password": password, "grant_type": "password"},
+            timeout=10,
+        )
+    token = resp.json().get("access_token") if resp.status_code == 200 else None
+    if not token:
+        raise RuntimeError(f"login for '{username}' failed with status {resp.status_code}: {resp.text}")
+    return token
+
+
+def superuser_token(session, base_url=LANGFLOW_URL):
+    if not SUPERUSER or not SUPERUSER_PASSWORD:
+        die("LANGFLOW_SUPERUSER or LANGFLOW_SUPERUSER_PASSWORD not set")
+    # The probe loop is its own retry policy; transport retries would only stretch each probe.
+    with make_session(1, retries=0) as probe:
+        ready = wait_for_langflow(probe, base_url)
+    if not ready:
+        die(f"Langflow at {base_url} did not become ready within {READY_TIMEOUT_SECONDS:.0f}s")
+    try:
+        token = login(session, SUPERUSER, SUPERUSER_PASSWORD, base_url)
+    except (RuntimeError, requests.exceptions.RequestException) as e:
+        die("Could not get access token for superuser", e)
+    print("Superuser login successful!")
+    return token
+
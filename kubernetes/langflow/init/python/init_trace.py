@@ -0,0 +1,222 @@
+import os
+import re
+import sys
+import json
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+
+# Timing spans for the init scripts: stages and steps are marked with span(), and every HTTP call made
+# through requests (sessions and module-level helpers alike) gets a child span via install().
+# Finished spans go to INIT_TRACE_FILE as JSON lines (or as OTLP/JSON, the OpenTelemetry collector file
+# exporter format, with INIT_TRACE_FORMAT=otlp), and the slowest stages and requests are printed at exit.
+# Each run replaces the file, so it always holds the latest init and never grows across pod restarts.
+# Spans opened on threads without an open span (e.g. upload workers) hang off the first kind="run" span.
+
+TRACE_FILE = os.getenv("INIT_TRACE_FILE", "/app/tmp/init-trace.jsonl")
+TRACE_FORMAT = os.getenv("INIT_TRACE_FORMAT", "jsonl")
+TRACE_TOP = int(os.getenv("INIT_TRACE_TOP", "10"))
+SERVICE_NAME = "langflow-init"
+
+ID_SEGMENT = re.compile(r"/(?:[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}|\d+)(?=/|$)")
+
+_trace_id = os.urandom(16).hex()
+_local = threading.local()
+_lock = threading.Lock()
+_spans = []
+_root = None
+_file = None
+_installed = False
+
+
+class Span:
+    def __init__(self, name, kind, parent, attrs):
+        self.name = name
+        self.kind = kind
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.stage = name if kind == "stage" else getattr(parent, "stage", None)
+        self.attrs = attrs
+        self.status = "ok"
+        self.thread = threading.current_thread().name
+        self.start_ns = time.time_ns()
+        self.started = time.perf_counter()
+        self.duration_ms = None
+
+    def finish(self):
+        self.duration_ms = (time.perf_counter() - self.started) * 1000.0
+
+    def to_dict(self):
+        return {
+            "trace_id": _trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "stage": self.stage,
+            "start_unix_nano": self.start_ns,
+            "end_unix_nano": self.start_ns + int(self.duration_ms * 1e6),
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "thread": self.thread,
+            "attrs": self.attrs,
+        }
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def current():
+    stack = _stack()
+    return stack[-1] if stack else _root
+
+
+@contextmanager
+def span(name, kind="step", parent=None, **attrs):
+    global _root
+    stack = _stack()
+    s = Span(name, kind, parent or current(), attrs)
+    with _lock:
+        if _root is None and kind == "run":
+            _root = s
+    stack.append(s)
+    try:
+        yield s
+    except BaseException as e:
+        # die() / sys.exit(0) inside a span still counts as the span's outcome.
+        if not (isinstance(e, SystemExit) and e.code in (0, None)):
+            s.status = "error"
+            s.attrs["error"] = f"SystemExit({e.code})" if isinstance(e, SystemExit) else f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        stack.pop()
+        s.finish()
+        _record(s)
+
+
+def _record(s):
+    global _file, TRACE_FILE
+    with _lock:
+        _spans.append(s)
+        if not TRACE_FILE or TRACE_FORMAT == "otlp":
+            return
+        try:
+            if _file is None:
+                os.makedirs(os.path.dirname(TRACE_FILE) or ".", exist_ok=True)
+                _file = open(TRACE_FILE, "w", buffering=1)
+            _file.write(json.dumps(s.to_dict()) + "\n")
+        except OSError as e:
+            print(f"WARNING: init trace disabled, cannot write {TRACE_FILE}: {e}", file=sys.stderr)
+            TRACE_FILE = ""
+
+
+def route(url):
+    # Path with ids folded, so repeated calls to the same endpoint group together in the summary.
+    path = urlsplit(url).path or "/"
+    return ID_SEGMENT.sub("/{id}", path)
+
+
+def install():
+    # Wrap Session.request once; requests.get/post/... go through a throwaway Session as well.
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    original = requests.Session.request
+
+    def traced_request(self, method, url, *args, **kwargs):
+        attrs = {"http.method": method.upper(), "http.url": url.split("?")[0]}
+        with span(f"{method.upper()} {route(url)}", kind="http", **attrs) as s:
+            resp = original(self, method, url, *args, **kwargs)
+            s.attrs["http.status_code"] = resp.status_code
+            if resp.status_code >= 500:
+                s.status = "error"
+            return resp
+
+    requests.Session.request = traced_request
+    atexit.register(finish)
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(s):
+    d = s.to_dict()
+    attrs = {**s.attrs, "init.kind": s.kind, "init.stage": s.stage or "", "thread.name": s.thread}
+    out = {
+        "traceId": _trace_id,
+        "spanId": s.span_id,
+        "name": s.name,
+        "kind": 3 if s.kind == "http" else 1,  # SPAN_KIND_CLIENT / SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(d["start_unix_nano"]),
+        "endTimeUnixNano": str(d["end_unix_nano"]),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attrs.items()],
+        "status": {"code": 2 if s.status == "error" else 1},
+    }
+    if s.parent_id:
+        out["parentSpanId"] = s.parent_id
+    return out
+
+
+def write_otlp(path, spans):
+    request = {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": "init_trace"}, "spans": [_otlp_span(s) for s in spans]}],
+    }]}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        f.write(json.dumps(request) + "\n")
+
+
+def print_summary(spans, top):
+    stages = sorted((s for s in spans if s.kind != "http"), key=lambda s: -s.duration_ms)[:top]
+    routes = {}
+    for s in spans:
+        if s.kind == "http":
+            r = routes.setdefault(s.name, {"count": 0, "errors": 0, "total": 0.0, "max": 0.0})
+            r["count"] += 1
+            r["errors"] += s.status == "error"
+            r["total"] += s.duration_ms
+            r["max"] = max(r["max"], s.duration_ms)
+    print(f"--- Init trace: slowest stages (trace {_trace_id}) ---")
+    for s in stages:
+        name = f"{s.stage} > {s.name}" if s.stage and s.kind != "stage" else s.name
+        print(f"  {s.duration_ms / 1000.0:>8.2f}s  {s.kind:<6} {name}{'  FAILED' if s.status == 'error' else ''}")
+    print("--- Init trace: slowest requests (by total time) ---")
+    print(f"  {'total':>9} {'max':>9} {'count':>6} {'errors':>6}  request")
+    for name, r in sorted(routes.items(), key=lambda kv: -kv[1]["total"])[:top]:
+        print(f"  {r['total'] / 1000.0:>8.2f}s {r['max']:>7.0f}ms {r['count']:>6} {r['errors']:>6}  {name}")
+
+
+def finish():
+    global _file
+    with _lock:
+        spans = list(_spans)
+        if _file is not None:
+            _file.close()
+            _file = None
+    if not spans:
+        return
+    if TRACE_FILE and TRACE_FORMAT == "otlp":
+        try:
+            write_otlp(TRACE_FILE, spans)
+        except OSError as e:
+            print(f"WARNING: could not write init trace to {TRACE_FILE}: {e}", file=sys.stderr)
+    if TRACE_TOP > 0:
+        print_summary(spans, TRACE_TOP)
+    if TRACE_FILE:
+        print(f"Init trace written to {TRACE_FILE} ({len(spans)} spans, {TRACE_FORMAT})")
@@ -0,0 +1,60 @@
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# HTTP layer shared by the init scripts: one keep-alive pool per process (init_all.py hands the same
+# session to every stage), a default (connect, read) timeout on every call so a hung endpoint cannot
+# stall pod readiness, and transport retries for idempotent methods only. POSTs and PATCHes are not
+# retried here; flow uploads have their own retry loop (flow_uploader.py).
+
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("INIT_HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+HTTP_READ_TIMEOUT_SECONDS = float(os.getenv("INIT_HTTP_READ_TIMEOUT_SECONDS", "60"))
+HTTP_RETRIES = int(os.getenv("INIT_HTTP_RETRIES", "3"))
+HTTP_BACKOFF_SECONDS = float(os.getenv("INIT_HTTP_BACKOFF_SECONDS", "0.5"))
+# One socket per upload worker, so no worker waits for a connection.
+HTTP_POOL_SIZE = int(os.getenv("FLOW_UPLOAD_WORKERS", "8"))
+
+RETRY_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUS = (429, 502, 503, 504)
+
+
+class LangflowSession(requests.Session):
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, *args, **kwargs):
+        # An explicit timeout (uploads, readiness probe) still wins.
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().request(method, url, *args, **kwargs)
+
+
+def make_session(workers=HTTP_POOL_SIZE, retries=HTTP_RETRIES):
+    session = LangflowSession((HTTP_CONNECT_TIMEOUT_SECONDS, HTTP_READ_TIMEOUT_SECONDS))
+    retry = Retry(
+        total=retries,
+        backoff_factor=HTTP_BACKOFF_SECONDS,
+        allowed_methods=RETRY_METHODS,
+        status_forcelist=RETRY_STATUS,
+        # Hand the last response back instead of raising, callers already branch on the status.
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(workers, 1), max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def api_key(key):
+    return {"x-api-key": key}
+
+
+def json_headers(headers):
+    return {**headers, "Content-Type": "application/json", "accept": "application/json"}
@@ -11,6 +11,7 @@ export LISTEN_PORT=${LISTEN_PORT:-6432}
 export POOL_MODE=${POOL_MODE:-session}
 export MAX_CLIENT_CONN=${MAX_CLIENT_CONN:-1000}
 export DEFAULT_POOL_SIZE=${DEFAULT_POOL_SIZE:-20}
+export MIN_POOL_SIZE=${MIN_POOL_SIZE:-50}
 
 # Substitute variables in templates to generate actual config files
 # We explicitly output to the final configuration paths
@@ -52,6 +52,7 @@ else
     "pool_mode"
     "max_client_conn"
     "default_pool_size"
+    "min_pool_size"
   )
 
   kubectl exec "$PGBOUNCER_POD" -- sh -c "if [ ! -f '$PGB_CONF_PATH' ]; then echo '  ❌ PgBouncer config file not found at $PGB_CONF_PATH'; exit 0; fi"